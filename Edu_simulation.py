@@ -1,53 +1,351 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 from datetime import datetime
+import contextlib
+import functools
 import io
+import os
+import tempfile
+import threading
 import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures.process import BrokenProcessPool
+
+from audit_analysis import (
+    AUDIT_LOG_PATH, DERIVED_COLUMNS, DI_RULES, MASK_COLUMN, REASON_REUSE_MIN_LIFT, REASON_REUSE_MIN_SHARE,
+    REASON_REUSE_MIN_USES, RULES_COLUMN, STREAMING_THRESHOLD_BYTES,
+    analyze_audit_trail, file_signature, filter_audit_rows, format_for_display, load_audit_trail,
+    load_stored_analysis, load_tail_state, new_tail_state, save_tail_state, scan_audit_trail, scan_result,
+    store_analysis, tail_audit_trail,
+)
+from audit_export import EXPORT_FORMATS, VIOLATION_STYLE, export_bytes
+from audit_batch import (
+    MULTISITE_ROOT_ENV, WEB_MAX_WORKERS, analyze_sites, create_site_executor, discover_audit_files, merge_site_results,
+    multisite_root, resolve_site_directory, spool_uploads,
+)
+from regulatory_store import SNIPPET_PATH, load_citation_store, search_citations, store_signature
+from citation_index import RETRIEVAL_TOP_K, open_citation_retriever, retrieve_citations
+from grading import answer_options, grade_answer
+from perf_metrics import (
+    METRICS_PATH, PERF_HISTORY_RERUNS, PROFILING_ENV, append_metrics, finish_recorder, new_recorder, span,
+    span_breakdown, span_summary,
+)
+
+# ==============================================================================
+# 성능 계측 (선택 사항: EDU_PROFILING=1 또는 URL에 ?profile=1)
+# ==============================================================================
+# 계측이 꺼져 있으면 perf_span()은 dict 조회 한 번 후 재사용 가능한 빈 컨텍스트를 반환하므로
+# 구간 계측 비용은 무시할 수 있습니다. 켜져 있으면 rerun마다 구간 시간을 지표 파일에 기록하고
+# 사이드바에 최근 rerun의 구간별 시간 분포를 표시합니다.
+# 현재 기록은 st.session_state(조회마다 잠금) 대신 스크립트 전역 PERF_STATE에 둡니다. 스크립트는 rerun마다
+# 새 네임스페이스에서 실행되고 fragment rerun은 직전 전체 rerun의 네임스페이스를 사용하므로 세션별로 분리됩니다.
+
+PERF_HISTORY_KEY = '_perf_history'
+PERF_SESSION_KEY = '_perf_session'
+NULL_SPAN = contextlib.nullcontext()
+
+
+def profiling_enabled():
+    """
+    서버 전체(EDU_PROFILING=1) 또는 이 세션(URL 쿼리 ?profile=1)에서 계측을 켰는지 확인합니다.
+    """
+    return os.environ.get(PROFILING_ENV) == '1' or st.query_params.get('profile') == '1'
+
+
+def begin_rerun_profile():
+    """
+    전체 rerun의 계측 기록을 시작합니다 (계측이 꺼져 있으면 None).
+    """
+    if not profiling_enabled():
+        return None
+    session = st.session_state.setdefault(PERF_SESSION_KEY, uuid.uuid4().hex[:8])
+    return new_recorder('script', session)
+
+
+def record_rerun_profile(recorder):
+    """
+    계측 기록을 끝내 세션 기록(최근 PERF_HISTORY_RERUNS개)과 지표 파일에 추가합니다.
+    """
+    record = finish_recorder(recorder, module=st.session_state.get('active_module'),
+                             m2_step=st.session_state.get('m2_step'))
+    st.session_state.setdefault(PERF_HISTORY_KEY, deque(maxlen=PERF_HISTORY_RERUNS)).append(record)
+    append_metrics(record)
+
+
+@contextlib.contextmanager
+def _fragment_rerun_span(session, name):
+    # fragment 단독 rerun은 스크립트 상단을 거치지 않으므로 별도의 기록으로 계측합니다.
+    recorder = new_recorder('fragment', session)
+    PERF_STATE["recorder"] = recorder
+    try:
+        with span(recorder, name):
+            yield
+    finally:
+        record_rerun_profile(recorder)
+
+
+def perf_span(name):
+    """
+    화면 구간 하나의 실행 시간을 현재 rerun 기록에 추가하는 컨텍스트를 반환합니다.
+    """
+    recorder = PERF_STATE["recorder"]
+    if recorder is None:
+        return NULL_SPAN
+    if recorder["finished"]:
+        return _fragment_rerun_span(recorder["session"], name)
+    return span(recorder, name)
+
+
+def timed_section(name):
+    """
+    렌더링 함수 전체를 perf_span(name)으로 계측하는 데코레이터입니다 (@st.fragment 아래에 둡니다).
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with perf_span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def render_perf_panel():
+    """
+    사이드바에 이 세션의 최근 rerun 구간별 시간 분포와 구간별 집계를 표시합니다.
+    fragment 단독 rerun 기록은 다음 전체 rerun 때 함께 표시됩니다.
+    """
+    history = list(st.session_state.get(PERF_HISTORY_KEY, []))
+    with st.sidebar:
+        st.subheader('⏱️ Rerun 프로파일')
+        st.caption(f"세션 {st.session_state.get(PERF_SESSION_KEY)} · 지표 파일: {METRICS_PATH}")
+        if not history:
+            return
+        last_n = st.slider('최근 rerun 수', 1, PERF_HISTORY_RERUNS, min(10, PERF_HISTORY_RERUNS), key='perf_last_n')
+        records = history[-last_n:]
+        latest = records[-1]
+        st.metric('마지막 rerun', f"{latest['total_ms']:.0f} ms", help=f"{latest['kind']} · {latest['ts']}")
+        st.bar_chart(span_breakdown(records), horizontal=True)
+        st.dataframe(
+            span_summary(records).style.format({
+                'total_ms': '{:.1f}', 'mean_ms': '{:.1f}', 'p95_ms': '{:.1f}', 'max_ms': '{:.1f}', 'share': '{:.0%}',
+            }),
+            use_container_width=True,
+            hide_index=True,
+        )
+
+
+PERF_STATE = {"recorder": begin_rerun_profile()}
 
 # ==============================================================================
 # 0. 규제 근거 로딩 및 매핑 함수
 # ==============================================================================
 
-def load_regulatory_data(snippet_path='regulatory_snippets.txt'):
+@st.cache_resource
+def get_citation_store(snippet_path, mtime_ns):
     """
-    규제 스니펫 및 번역 데이터를 로드합니다.
+    규제 스니펫 및 번역 데이터를 색인된 저장소로 한 번만 만들어 모든 세션이 공유합니다.
+    캐시 키에 스니펫 파일 수정 시각이 포함되어 파일이 바뀔 때만 다시 만듭니다.
     """
-    snippets = {}
-    
-    translations = {
-        "PIC/S_R2": "원본 데이터는 종이에 기록되었거나 전자적으로 기록된 정보의 첫 번째 획득으로 설명할 수 있는 원본 기록(데이터)으로 정의된다. 원래 동적 상태에서 획득한 정보는 해당 상태에서 계속 사용할 수 있어야 한다.",
-        "A22_8": "AI 모델의 출력은 설명 가능해야 합니다. 이는 AI 모델이 주어진 출력에 어떻게 도달했는지 설명할 수 있어야 함을 의미합니다.",
-        "P11_300": "식별 코드와 암호 발행은 주기적으로 점검, 회수 또는 개정되어야 합니다 (예: 암호 유효 기간 만료와 같은 이벤트를 다루기 위함).",
-        "P11_10_B": "회사는 전자 기록 및 서명의 진위, 무결성 그리고 적절한 경우 **기밀성**을 보장하도록 설계된 절차 및 통제를 적용해야 합니다. (21 CFR Part 11)",
-        "21_CFR_211_194_A": "시험소 기록에는 설정된 규격 및 표준 준수를 보장하는 데 필요한 **모든 시험으로부터 도출된 완전한 데이터**가 포함되어야 합니다. (21 CFR 211.194(a))",
-        "21_CFR_820_70_I": "컴퓨터 또는 자동화된 데이터 처리 시스템이 품질 시스템의 일부로 사용될 경우, 제조업체는 해당 컴퓨터 소프트웨어가 **의도된 용도에 대해 검증**되었음을 보장하는 절차를 수립해야 합니다. (21 CFR 820.70(i))",
-        "DI_Contemporaneous": "데이터 기록 및 변경은 발생 시점에 이루어져야 합니다. (PIC/S DI - ALCOA+)",
-        "DI_RNR": "각 개인은 자신의 역할에 따른 책임과 권한을 가져야 하며, 시스템 접근 권한은 이 책임에 따라 제한되어야 합니다. (Part 11, Annex 11 - RNR)",
-        "DI_Attributable": "데이터를 누가, 언제, 왜 기록 또는 수정했는지 명확히 추적 가능해야 합니다. (PIC/S DI - ALCOA+)",
-        "GAMP5_CriticalThinking": "시스템의 복잡성, 기능 및 리스크에 따라 적절한 GAMP Category를 선택해야 하며, 낮은 Category 선택은 Validation 불충분을 의미합니다.",
-        "GAMP5_RiskBased": "Validation 노력은 시스템의 품질 및 환자 안전에 미치는 리스크에 비례해야 합니다. 단순 시스템에 과도한 노력을 투입하는 것은 비효율적입니다.",
-    }
+    return load_citation_store(snippet_path)
+
+
+with perf_span('regulatory_load'):
+    CITATION_STORE = get_citation_store(*store_signature(SNIPPET_PATH))
+REGULATORY_DATA = CITATION_STORE["citations"]
+
+
+@st.cache_resource(show_spinner="규제 근거 벡터 색인 로딩 중...")
+def get_citation_retriever(snippet_signature):
+    """
+    오프라인으로 만들어 둔 LanceDB 색인과 로컬 임베딩 모델을 프로세스 전체에서 한 번만 엽니다.
+    색인/모델이 없으면 None이며, 이 경우 질문 검색은 키워드 색인으로 대체됩니다.
+    """
+    return open_citation_retriever(store=CITATION_STORE)
+
+
+def citation_index_version():
+    """
+    질문 검색 결과 캐시 키로 사용할 색인 버전입니다 (색인이 없으면 스니펫 파일 서명).
+    """
+    retriever = get_citation_retriever(store_signature(SNIPPET_PATH))
+    return retriever["meta"]["version"] if retriever else f"keyword:{store_signature(SNIPPET_PATH)[1]}"
+
 
+@st.cache_data(max_entries=512, show_spinner=False)
+def retrieve_for_question(question, k, index_version):
+    """
+    질문별 top-k 규제 근거 검색 결과를 캐싱합니다 (같은 질문은 색인이 바뀌기 전까지 다시 검색하지 않음).
+    """
+    return retrieve_citations(get_citation_retriever(store_signature(SNIPPET_PATH)), CITATION_STORE, question, k)
+
+
+@st.cache_resource(max_entries=8, show_spinner="Audit Trail 분석 중...")
+def get_audit_analysis(path, mtime_ns, size):
+    """
+    Audit Trail 로딩 및 DI 분석 결과를 캐싱합니다.
+    캐시 키는 (경로, 수정 시각, 크기)이므로 파일이 변경될 때만 다시 파싱하며,
+    모든 세션이 같은 캐시를 공유하고 최근 항목 8개만 유지합니다.
+    st.cache_data와 달리 세션마다 복사본을 만들지 않고 같은 객체를 공유하므로,
+    호출 측은 결과(df 등)를 수정하지 않고 필요한 행만 잘라 사용해야 합니다.
+    앱 재시작 후에도 같은 내용의 파일은 영속 저장소에서 바로 읽습니다.
+    """
+    analysis = load_stored_analysis(path)
+    if analysis is None:
+        analysis = analyze_audit_trail(load_audit_trail(path))
+        store_analysis(path, analysis)
+    return analysis
+
+
+STREAMING_CACHE_ENTRIES = 4
+
+
+@st.cache_resource
+def get_streaming_cache():
+    """
+    스트리밍 분석 결과를 보관하는 프로세스 공용 캐시(최근 항목 순서 유지)와 잠금을 반환합니다.
+    st.cache_data 내부에서는 외부에서 만든 진행률 표시줄을 갱신할 수 없으므로 직접 관리합니다.
+    """
+    return OrderedDict(), threading.Lock()
+
+
+def load_module2_analysis(path=AUDIT_LOG_PATH):
+    """
+    파일 크기에 따라 전체 로딩 또는 스트리밍 분석을 선택합니다.
+    스트리밍 분석 중에는 진행률을 페이지에 표시합니다.
+    """
+    signature = file_signature(path)
+    if signature[2] <= STREAMING_THRESHOLD_BYTES:
+        return get_audit_analysis(*signature)
+
+    cache, lock = get_streaming_cache()
+    with lock:
+        if signature in cache:
+            cache.move_to_end(signature)
+            return cache[signature]
+
+    # 같은 내용을 이전에 분석했다면 영속 저장소에서 바로 읽습니다.
+    analysis = load_stored_analysis(path)
+    if analysis is None:
+        progress_bar = st.progress(0.0, text="대용량 Audit Trail 스트리밍 분석 중...")
+
+        def report_progress(rows_read, bytes_read, total_bytes):
+            progress_bar.progress(
+                min(bytes_read / total_bytes, 1.0) if total_bytes else 1.0,
+                text=f"대용량 Audit Trail 스트리밍 분석 중... ({rows_read:,}행 처리)",
+            )
+
+        analysis = scan_audit_trail(path, progress=report_progress)
+        progress_bar.empty()
+        store_analysis(path, analysis)
+
+    with lock:
+        cache[signature] = analysis
+        while len(cache) > STREAMING_CACHE_ENTRIES:
+            cache.popitem(last=False)
+    return analysis
+
+
+TAIL_REFRESH_SECONDS = 5
+
+
+@st.cache_resource
+def get_tail_store():
+    """
+    파일별 tail 상태(바이트 오프셋, 누적 집계, 컨텍스트 행)를 보관하는 프로세스 공용 저장소와 잠금을 반환합니다.
+    """
+    return {}, threading.Lock()
+
+
+def refresh_tail_analysis(path=AUDIT_LOG_PATH):
+    """
+    마지막 갱신 이후 추가된 행만 분석하여 tail 상태를 갱신하고 현재까지의 분석 결과를 반환합니다.
+    상태는 파일로도 저장되므로 앱을 다시 시작해도 처음부터 다시 읽지 않습니다.
+    한 번에 약 스트리밍 청크 하나(TAIL_READ_BYTES)만 읽으므로 큰 로그에서 처음 켜면 갱신마다 나누어 따라잡습니다.
+    새 행이 없거나 다른 세션이 갱신 중이면 모든 세션이 마지막 결과(읽기 전용)를 그대로 공유합니다.
+    """
+    store, lock = get_tail_store()
+    key = file_signature(path)[0]
+    # 다른 세션이 갱신하는 동안 기다리지 않고 직전 결과를 보여 줍니다 (처음 한 번은 결과가 없으므로 기다림).
+    if not lock.acquire(blocking=(key, 'snapshot') not in store):
+        return store[(key, 'snapshot')]["analysis"]
     try:
-        with open(snippet_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                if ':' in line:
-                    code, snippet_en = line.split(':', 1)
-                    code = code.strip()
-                    snippet_en = snippet_en.strip()
-                    snippets[code] = {"en": snippet_en, "ko": translations.get(code, f"번역 내용 없음 (코드: {code})")}
-    except FileNotFoundError:
-        # File not found error handling should be done in the environment where the file is expected to be
-        pass
-    
-    # Ensure all required regulatory texts are present even if file loading fails
-    for code, ko_text in translations.items():
-        if code not in snippets:
-             snippets[code] = {"en": f"Regulatory principle related to {code}", "ko": ko_text}
+        state = store.get(key) or load_tail_state(path) or new_tail_state(path)
+        new_rows = tail_audit_trail(state)
+        if new_rows:
+            save_tail_state(state)
+        store[key] = state
+
+        position = (state["inode"], state["offset"])
+        snapshot = store.get((key, 'snapshot'))
+        if snapshot is None or snapshot["position"] != position:
+            analysis = scan_result(state, provisional=True)
+            analysis.update(new_rows=new_rows, pending_bytes=state["pending_bytes"])
+            snapshot = {"position": position, "analysis": analysis}
+            store[(key, 'snapshot')] = snapshot
+    finally:
+        lock.release()
+    return snapshot["analysis"]
 
-    return snippets
 
-REGULATORY_DATA = load_regulatory_data()
+VIEWER_PAGE_SIZES = (25, 50, 100, 200)
+
+
+@st.fragment
+@timed_section('module2.viewer')
+def render_audit_viewer(analysis, key, show_violations):
+    """
+    Audit Trail을 서버 측에서 페이지 단위로 잘라 현재 페이지만 렌더링합니다.
+    fragment로 분리되어 필터/페이지 변경 시 뷰어만 다시 실행됩니다.
+    show_violations가 True이면 규칙/사용자/레코드 필터, 위반 행만 보기, 위반 행 하이라이트를 제공합니다.
+    """
+    df = analysis["df"]
+    hidden_columns = DERIVED_COLUMNS + ([MASK_COLUMN] if show_violations else [MASK_COLUMN, RULES_COLUMN])
+
+    filter_cols = st.columns([2, 2, 2, 1, 1]) if show_violations else st.columns([2, 4, 1])
+    if show_violations:
+        with filter_cols[0]:
+            rule_ids = st.multiselect('탐지 규칙', [rule["id"] for rule in DI_RULES], key=f'{key}_rules')
+        with filter_cols[1]:
+            user_ids = st.multiselect('UserID', analysis["user_ids"], key=f'{key}_users')
+        with filter_cols[2]:
+            record_query = st.text_input('RecordID 검색', key=f'{key}_record')
+        with filter_cols[3]:
+            violations_only = st.toggle('위반 행만 보기', value=len(df) > VIEWER_PAGE_SIZES[0], key=f'{key}_violations_only')
+    else:
+        rule_ids, violations_only = None, False
+        with filter_cols[0]:
+            user_ids = st.multiselect('UserID', analysis["user_ids"], key=f'{key}_users')
+        with filter_cols[1]:
+            record_query = st.text_input('RecordID 검색', key=f'{key}_record')
+    with filter_cols[-1]:
+        page_size = st.selectbox('페이지 크기', VIEWER_PAGE_SIZES, key=f'{key}_page_size')
+
+    with perf_span('module2.viewer.filter'):
+        positions = filter_audit_rows(df, rule_ids, user_ids, record_query, violations_only)
+    page_count = max(1, -(-len(positions) // page_size))
+    page = st.number_input('페이지', min_value=1, max_value=page_count, value=1, step=1, key=f'{key}_page') if page_count > 1 else 1
+    start = (page - 1) * page_size
+    with perf_span('module2.viewer.format'):
+        page_df = format_for_display(df.iloc[positions[start:start + page_size]])
+
+    st.caption(f"필터 결과 {len(positions):,}행 / 전체 {len(df):,}행 중 {min(start + 1, len(positions)):,}–{min(start + page_size, len(positions)):,}행 표시")
+
+    view = page_df.drop(columns=hidden_columns, errors='ignore')
+    if show_violations and not page_df.empty:
+        flagged = page_df[MASK_COLUMN].to_numpy() != 0
+        view = view.style.apply(
+            lambda frame: pd.DataFrame(
+                np.broadcast_to(np.where(flagged, VIOLATION_STYLE, '')[:, None], frame.shape),
+                index=frame.index, columns=frame.columns,
+            ),
+            axis=None,
+        )
+    # Styler 계산과 Arrow 직렬화는 st.dataframe 호출 안에서 일어납니다.
+    with perf_span('module2.viewer.dataframe'):
+        st.dataframe(view, use_container_width=True)
+
 
 # ==============================================================================
 # MVP 설정 및 디자인 및 Session State 초기화 
@@ -62,16 +360,6 @@ if 'm2_step' not in st.session_state:
 
 st.markdown("---")
 
-# ==============================================================================
-# 상단 탭 내비게이션 적용
-# ==============================================================================
-tab_names = [
-    "💡 모듈 1: AI/ML 규제 투명성",
-    "💡 모듈 2: Audit Trail DI 심층 분석",
-    "💡 모듈 3: GAMP 5 Validation 리스크"
-]
-tab1, tab2, tab3 = st.tabs(tab_names)
-
 # --- FDA Warning Letter Citation (21 CFR 820.70(i) - COTS/Excel) ---
 WL_SNIPPET_EN = "Your firm failed to adequately validate computer software used as part of the quality system for its intended use, as required by 21 CFR 820.70(i). Specifically, your firm utilized a commercially available software (Excel spreadsheet) to record and manage critical Quality System data, such as CAPA and Complaint records. You did not establish procedures to assure that this spreadsheet was validated for its intended use, including ensuring data integrity, traceability, and access control."
 WL_SNIPPET_KO = "귀사는 21 CFR 820.70(i)에 따라 품질 시스템의 일부로 사용되는 컴퓨터 소프트웨어가 의도된 용도에 대해 적절하게 검증되었음을 보장하는 데 실패했습니다. 특히, 귀사는 CAPA 및 불만사항 기록과 같은 중요한 품질 시스템 데이터를 기록하고 관리하기 위해 상용 소프트웨어(Excel 스프레드시트)를 사용했지만, 데이터 무결성, 추적성 및 접근 통제를 포함하여 이 스프레드시트가 의도된 용도에 대해 검증되었음을 보장하는 절차를 수립하지 않았습니다."
@@ -81,11 +369,11 @@ WL_SNIPPET_KO = "귀사는 21 CFR 820.70(i)에 따라 품질 시스템의 일부
 # ==============================================================================
 # 모듈 1: AI 규정 근거 및 모델 관리 
 # ==============================================================================
-with tab1:
-    # 탭 진입 시, 모듈 2의 상태 초기화 (다른 모듈로 넘어왔음을 감지)
-    if st.session_state.m2_step != 0:
-        st.session_state.m2_step = 0
-    
+@timed_section('module1')
+def render_module1():
+    """
+    모듈 1 화면을 렌더링합니다.
+    """
     st.header('1. AI 규정 근거 및 모델 관리 (Annex 22 집중)')
     st.markdown("---")
     
@@ -140,6 +428,48 @@ with tab1:
                     st.markdown("**(이미지 대체: 데이터 보안 및 접근 통제 매트릭스)**") 
             else:
                 st.warning("경고: 해당 질문에 대한 규제 근거를 찾을 수 없습니다.")
+
+        st.markdown('---')
+        st.markdown("**💬 직접 질문하기:** 규제 질문을 입력하면 관련 규제 근거 조항을 유사도 순으로 찾아 원문/번역과 함께 제시합니다.")
+        free_question = st.text_input('규제 질문 입력', key='ai_free_question',
+                                      placeholder='예: 전자 기록의 무결성을 보장하려면 어떤 통제가 필요합니까?')
+        if free_question.strip():
+            with perf_span('module1.retrieval'):
+                retriever = get_citation_retriever(store_signature(SNIPPET_PATH))
+                results = retrieve_for_question(free_question.strip(), RETRIEVAL_TOP_K, citation_index_version())
+            if retriever is None:
+                st.caption("벡터 색인이 없어 키워드 일치 기준으로 검색했습니다. (색인 생성: python citation_index.py build)")
+            elif retriever["meta"].get("stale"):
+                st.caption("⚠️ 규제 스니펫이 색인 생성 이후 변경되었습니다. 색인을 다시 생성하십시오.")
+            if not results:
+                st.warning("경고: 해당 질문에 대한 규제 근거를 찾을 수 없습니다.")
+            for rank, result in enumerate(results, start=1):
+                score = f" (유사도 {result['score']:.2f})" if result["score"] is not None else ""
+                st.markdown(f"**{rank}. {result['code']}** · {result['source']}{score}")
+                st.code(result['en'], language='text')
+                st.info(result['ko'])
+
+        with st.expander('🔎 규제 근거 검색 (코드 / 원칙 / 키워드)'):
+            search_cols = st.columns([3, 2])
+            with search_cols[0]:
+                citation_query = st.text_input('키워드 또는 코드', key='citation_query',
+                                               placeholder='예: 원본 데이터, audit, P11_10_B')
+            with search_cols[1]:
+                citation_principle = st.selectbox('원칙', ['전체'] + CITATION_STORE["principles"],
+                                                  key='citation_principle')
+            principle_filter = None if citation_principle == '전체' else citation_principle
+            if citation_query or principle_filter:
+                exact = REGULATORY_DATA.get(citation_query.strip())
+                with perf_span('module1.citation_search'):
+                    matches = [exact] if exact else search_citations(CITATION_STORE, citation_query, principle_filter)
+                if matches:
+                    st.dataframe(pd.DataFrame([
+                        {"코드": c["code"], "출처": c["source"], "원칙": ', '.join(c["principles"]),
+                         "원문": c["en"], "번역": c["ko"]}
+                        for c in matches
+                    ]), use_container_width=True, hide_index=True)
+                else:
+                    st.info("검색 결과가 없습니다.")
             
     with subtab_1_2:
         st.subheader('AI 모델 변경 관리 리스크 평가')
@@ -150,22 +480,23 @@ with tab1:
         with col1:
             model_change_status = st.selectbox(
                 'AI 모델 변경 사항:',
-                ('선택 안 함', 'v1.0 -> v1.1 (알고리즘 Minor 변경)', 'v1.0 -> v1.2 (학습 데이터셋 Major 변경)'),
+                answer_options('1-2', 'model_change_status'),
                 key='model_change_status'
             )
         
         with col2:
             validation_status = st.selectbox(
                 '업데이트된 Validation Plan 검토 결과:',
-                ('선택 안 함', '재밸리데이션 범위가 Minor 변경에 맞춰 축소됨', '전체 기능에 대한 Full Validation이 계획됨'),
+                answer_options('1-2', 'validation_status'),
                 key='validation_status'
             )
         
         if st.button('리스크 분석 (Model Drift)', key='btn_model_drift'):
-            annex_22_10_ko = "AI 모델의 변경 사항이 모델 성능과 신뢰성에 미치는 영향도에 따라 재밸리데이션 범위를 설정해야 합니다. Major 변경 시 광범위한 재밸리데이션이 필수입니다."
+            annex_22_10_ko = REGULATORY_DATA.get("A22_10", {}).get("ko", "근거 조항을 찾을 수 없습니다.")
+            grade = grade_answer('1-2', model_change_status=model_change_status, validation_status=validation_status)
             
             # --- 1. CRITICAL WARNING: Major 변경 + Validation 축소 (오류) ---
-            if model_change_status == 'v1.0 -> v1.2 (학습 데이터셋 Major 변경)' and validation_status == '재밸리데이션 범위가 Minor 변경에 맞춰 축소됨':
+            if grade["rule"] == 'M12_SCOPE_INSUFFICIENT':
                 st.error("🚨 CRITICAL WARNING: 밸리데이션 범위 불충분")
                 st.markdown(f"""
                 **규제적 판단:** 학습 데이터셋의 **Major 변경**은 AI 모델 성능에 **심각한 드리프트(Drift)**를 유발할 수 있습니다. **[근거 조항: EU GMP Annex 22.10 (Operation)]**에 따라, 광범위한 재밸리데이션이 필요하나, 계획이 축소되어 **모델 신뢰성에 심각한 위험**이 있습니다.
@@ -190,10 +521,7 @@ with tab1:
                 st.markdown("**(이미지 대체: 시계열 차트로 표시된 AI 모델 예측 드리프트)**") 
 
             # --- 2. SUCCESS: 합리적인 변경 관리 ---
-            elif (model_change_status == 'v1.0 -> v1.1 (알고리즘 Minor 변경)' and validation_status == '재밸리데이션 범위가 Minor 변경에 맞춰 축소됨') or \
-                 (model_change_status == 'v1.0 -> v1.2 (학습 데이터셋 Major 변경)' and validation_status == '전체 기능에 대한 Full Validation이 계획됨') or \
-                 (model_change_status == 'v1.0 -> v1.1 (알고리즘 Minor 변경)' and validation_status == '전체 기능에 대한 Full Validation이 계획됨'):
-                 
+            elif grade["rule"] == 'M12_SCOPE_ADEQUATE':
                 st.success("✅ 현재 검토 결과, 밸리데이션 범위는 적정합니다.")
                 st.markdown(f"""
                 **규제적 판단:** 모델 변경의 영향도에 따라 밸리데이션 범위를 적절하게 판단하였습니다. **[근거 조항: EU GMP Annex 22.10 (Operation)]**
@@ -201,50 +529,58 @@ with tab1:
                 st.markdown(f"**📢 규제 근거:** {annex_22_10_ko}")
 
             # --- 3. WARNING: 선택 안 함 ---
-            elif model_change_status == '선택 안 함' or validation_status == '선택 안 함':
+            elif grade["rule"] == 'M12_INCOMPLETE':
                 st.warning("항목을 모두 선택해 주세요.")
 
 # ==============================================================================
 # 모듈 2: Audit Trail DI 심층 분석 
 # ==============================================================================
-with tab2:
-    
+@timed_section('module2')
+def render_module2():
+    """
+    모듈 2 화면을 렌더링합니다.
+    """
     st.header('2. Audit Trail DI 심층 분석') 
     st.markdown("---")
-    
-    # 데이터 로딩 및 분석 로직 (변화 없음)
+
+    if st.toggle('실시간 추적(tail) 모드: 추가된 행만 이어서 분석', key='m2_tail_mode'):
+        render_module2_live()
+    else:
+        render_module2_body(load_module2_analysis)
+
+    st.markdown("---")
+    render_multisite_analysis()
+
+
+def render_module2_body(load_analysis):
+    """
+    분석 결과를 불러와 모듈 2의 단계별 흐름을 렌더링합니다.
+    load_analysis(path)는 전체/스트리밍 분석 또는 tail 증분 분석 함수입니다.
+    """
+    # 데이터 로딩 및 분석 로직 (파일 서명 기반 캐시 사용)
     try:
         # 실제 환경에서는 로컬 파일로 대체해야 함
-        df = pd.read_csv('audit_log_error.csv') 
-        
-        if not df.empty:
-            df['TimeStamp(Server)'] = pd.to_datetime(df['TimeStamp(Server)'])
-            df['ActionTime(Client)'] = pd.to_datetime(df['ActionTime(Client)'])
-            time_diff_threshold = 120 # 2분(120초) 이상 차이
-            
-            df['TimeDifference'] = (df['TimeStamp(Server)'] - df['ActionTime(Client)']).dt.total_seconds().abs()
-            time_error_logs = df[df['TimeDifference'] > time_diff_threshold]
-            
-            reason_error_logs = df[
-                ((df['ActionType'] == 'MODIFY') | (df['ActionType'] == 'CHANGE_STATUS')) &
-                (df['ReasonForChange'].isna() | (df['ReasonForChange'].astype(str).str.strip() == ''))
-            ]
-            
-            role_error_logs = df[
-                (df['Role'] == 'QA_REVIEWER') & (df['ActionType'] == 'RAW_DATA_PROCESS')
-            ]
-            
-            error_indices = time_error_logs.index.union(reason_error_logs.index).union(role_error_logs.index)
-
-            def highlight_errors(row):
-                styles = [''] * len(row)
-                if row.name in error_indices:
-                    styles = ['color: red; background-color: #ffeeee'] * len(row)
-                return styles
+        with perf_span('module2.load_analysis'):
+            analysis = load_analysis(AUDIT_LOG_PATH)
+        df = analysis["df"]
 
-            df_display = df.copy()
-            df_display['TimeStamp(Server)'] = df_display['TimeStamp(Server)'].dt.strftime('%Y-%m-%d %H:%M:%S')
-            df_display['ActionTime(Client)'] = df_display['ActionTime(Client)'].dt.strftime('%Y-%m-%d %H:%M:%S')
+        if "new_rows" in analysis:
+            st.caption(
+                f"실시간 추적 모드: 전체 {analysis['total_rows']:,}행 중 DI 위반 가능성이 탐지된 {len(df):,}행만 표시합니다. "
+                f"(마지막 갱신 {datetime.now():%H:%M:%S}, 새 행 {analysis['new_rows']:,}건, {TAIL_REFRESH_SECONDS}초마다 갱신)"
+            )
+            if analysis["pending_bytes"]:
+                st.info(f"기존 Audit Trail을 나누어 읽는 중입니다. 남은 분량 {analysis['pending_bytes'] / 1024 ** 2:,.1f} MB "
+                        "(갱신마다 이어서 분석하며, 그동안의 결과는 지금까지 읽은 행 기준입니다).")
+            if df.empty:
+                st.success("✅ 지금까지 추가된 Audit Trail에서 DI 위반 가능성이 탐지되지 않았습니다.")
+        elif analysis.get("streamed"):
+            st.caption(
+                f"대용량 스트리밍 모드: 전체 {analysis['total_rows']:,}행 중 "
+                f"DI 위반 가능성이 탐지된 {len(df):,}행만 표시합니다."
+            )
+            if df.empty:
+                st.success("✅ 전체 Audit Trail에서 DI 위반 가능성이 탐지되지 않았습니다.")
             
     except FileNotFoundError:
         st.error("오류: audit_log_error.csv 파일이 작업 폴더에 없습니다. 파일을 생성해 주세요.")
@@ -255,134 +591,336 @@ with tab2:
         df = pd.DataFrame()
         
     
+    if not df.empty:
+        render_module2_flow(analysis)
+    
+    elif st.session_state.m2_step == 0 and df.empty:
+        st.info("⬆️ Audit Trail 원문을 검토하신 후, 'DI 자동 분석 시작' 버튼을 눌러 시스템 탐지 결과를 확인하십시오.")
+
+
+@st.fragment(run_every=TAIL_REFRESH_SECONDS)
+@timed_section('module2.live')
+def render_module2_live():
+    """
+    tail 모드에서 일정 주기로 새 행만 분석하여 모듈 2 화면을 갱신합니다.
+    """
+    render_module2_body(refresh_tail_analysis)
+
+
+@st.cache_resource
+def get_site_executor():
+    """
+    다중 사이트 분석용 프로세스 풀(WEB_MAX_WORKERS개)과 실행 잠금을 모든 세션이 공유합니다.
+    잠금으로 일괄 분석을 한 번에 하나씩 실행하므로 여러 세션이 동시에 실행해도 워커 수가 늘지 않습니다.
+    """
+    return create_site_executor(WEB_MAX_WORKERS), threading.Lock()
+
+
+def run_multisite_batch(uploaded_files, directory_sources, progress):
+    """
+    공용 풀에서 일괄 분석을 실행합니다. 업로드 파일은 임시 디렉터리로 옮겨 경로로 분석합니다.
+    다른 세션의 분석이 진행 중이면 끝날 때까지 기다립니다.
+    """
+    executor, lock = get_site_executor()
+    if not lock.acquire(blocking=False):
+        with st.spinner('다른 교육생의 일괄 분석이 끝나기를 기다리는 중...'):
+            lock.acquire()
+    try:
+        with tempfile.TemporaryDirectory(prefix='multisite_') as spool_dir:
+            sources = spool_uploads(uploaded_files, spool_dir) if uploaded_files else directory_sources
+            return analyze_sites(sources, max_workers=WEB_MAX_WORKERS, progress=progress, executor=executor)
+    except BrokenProcessPool:
+        # 워커가 비정상 종료되면 풀을 다시 만들도록 캐시를 비웁니다.
+        get_site_executor.clear()
+        raise
+    finally:
+        lock.release()
+
+
+@st.fragment
+@timed_section('module2.multisite')
+def render_multisite_analysis():
+    """
+    여러 사이트/시스템의 Audit Trail(업로드 또는 서버 디렉터리)을 병렬 분석하여 교차 사이트 요약을 표시합니다.
+    교육생은 파일 업로드로 분석하며, 서버 디렉터리 분석은 관리자가 MULTISITE_ROOT_ENV로 지정한 루트 아래에서만 가능합니다.
+    fragment로 분리되어 파일 선택/분석 실행 시 모듈 2의 나머지 화면은 다시 실행되지 않습니다.
+    """
+    with st.expander('🏭 다중 사이트 Audit Trail 일괄 분석', expanded='m2_multisite' in st.session_state):
+        uploaded_files = st.file_uploader('사이트별 Audit Trail CSV 업로드', type='csv',
+                                          accept_multiple_files=True, key='m2_multisite_uploads')
+        root = multisite_root()
+        directory = ''
+        if root is not None:
+            directory = st.text_input(f'또는 서버 디렉터리 ({MULTISITE_ROOT_ENV} 기준 하위 경로, 하위 폴더 포함, *.csv)',
+                                      key='m2_multisite_dir')
+
+        if st.button('병렬 분석 실행', key='m2_multisite_run', disabled=not (uploaded_files or directory)):
+            try:
+                directory_sources = (
+                    [] if uploaded_files
+                    else discover_audit_files(resolve_site_directory(root, directory), allowed_root=root)
+                )
+            except (FileNotFoundError, ValueError) as e:
+                st.error(str(e))
+                directory_sources = []
+
+            site_count = len(uploaded_files) if uploaded_files else len(directory_sources)
+            if site_count:
+                progress_bar = st.progress(0.0, text=f"{site_count}개 사이트 분석 중...")
+
+                def report_progress(done, total):
+                    progress_bar.progress(done / total, text=f"{site_count}개 사이트 분석 중... ({done}/{total})")
+
+                try:
+                    results = run_multisite_batch(uploaded_files, directory_sources, report_progress)
+                    st.session_state.m2_multisite = merge_site_results(results)
+                except BrokenProcessPool:
+                    st.error('분석 워커가 비정상 종료되었습니다. 다시 실행해 주십시오.')
+                progress_bar.empty()
+
+        summary = st.session_state.get('m2_multisite')
+        if summary is None:
+            return
+
+        st.caption(f"사이트 {summary['sites']}개, 전체 {summary['total_rows']:,}행 분석 결과")
+        if summary["failed_sites"]:
+            st.warning(f"분석 실패 사이트: {', '.join(summary['failed_sites'])}")
+        st.markdown("**사이트별 위반 건수**")
+        st.dataframe(summary["by_site"], use_container_width=True, hide_index=True)
+        by_rule_col, by_role_col = st.columns(2)
+        with by_rule_col:
+            st.markdown("**규칙별 위반 건수**")
+            st.dataframe(summary["by_rule"], use_container_width=True, hide_index=True)
+        with by_role_col:
+            st.markdown("**역할(Role)별 위반 건수**")
+            st.dataframe(summary["by_role"], use_container_width=True, hide_index=True)
+
+
+def set_module2_step(step):
+    """
+    모듈 2의 순차 공개 단계를 변경합니다 (버튼 on_click 콜백).
+    """
+    st.session_state.m2_step = step
+
+
+@st.fragment
+@timed_section('module2.flow')
+def render_module2_flow(analysis):
+    """
+    모듈 2의 Step 0/1 흐름(원문 → 자동 탐지 결과)을 렌더링합니다.
+    fragment로 분리되어 단계 전환 시 모듈 2 본문만 다시 실행됩니다.
+    """
     # ==========================================================================
-    # 2-1. Audit Trail 원문 제시 (고정 영역)
+    # 2-1. Audit Trail 원문 제시 및 Step 0: 초기 화면
     # ==========================================================================
-    if not df.empty:
-        df_to_display = df_display.drop(columns=['TimeDifference'], errors='ignore')
-        
+    if st.session_state.m2_step == 0:
         st.subheader('Audit Trail 원문 (참조)') 
         st.markdown("제약사에서 제출한 가상의 Audit Trail 원문입니다. **DI 위반 행을 찾을 때 참고**하십시오.")
-        st.dataframe(df_to_display, use_container_width=True)
+        render_audit_viewer(analysis, key='m2_raw', show_violations=False)
         st.markdown("---")
+
+        st.markdown("""
+        ### 📢 원칙 위반 가설 설정
+        위 로그에서 **PIC/S DI 원칙** 중 위반 가능성이 있는 항목을 찾아 토론해보십시오.
+        """)
         
-        # ==========================================================================
-        # Step 0: 초기 화면 
-        # ==========================================================================
-        if st.session_state.m2_step == 0:
+        st.button('DI 자동 분석 시작 및 심사자 판단 확인', key='audit_start',
+                  on_click=set_module2_step, args=(1,))
+
+    # ==========================================================================
+    # Step 1 이상의 모든 단계에서 고정되는 '자동 탐지 결과' 및 '심층 분석 버튼'
+    # ==========================================================================
+    else:
+        st.subheader('자동 탐지 결과 시각화') 
+        st.markdown("🚨 **빨간색 하이라이트 행**은 시스템이 탐지한 DI 위반 가능성 항목이며, **DetectedRules** 컬럼에 탐지된 규칙이 표시됩니다.")
+        
+        render_audit_viewer(analysis, key='m2_detect', show_violations=True)
+
+        # 규칙별 탐지 건수 요약 (규칙 레지스트리 기반)
+        rule_summary = pd.DataFrame([
+            {
+                "규칙 ID": rule["id"],
+                "위반 원칙": rule["principle"],
+                "규제 근거": rule["citation"],
+                "설명": rule["description"],
+                "탐지 건수": analysis["rule_counts"].get(rule["id"], 0),
+            }
+            for rule in DI_RULES
+        ])
+        st.dataframe(rule_summary, use_container_width=True, hide_index=True)
+        render_export_buttons(analysis)
+        
+        st.markdown("---")
+        
+        render_module2_steps(analysis)
+
+
+def render_export_buttons(analysis):
+    """
+    위반 하이라이트 Audit Trail을 Excel/HTML로 내려받는 버튼을 렌더링합니다.
+    파일은 버튼을 눌렀을 때만 청크 단위로 생성되므로(지연 생성) rerun마다 비용이 들지 않습니다.
+    """
+    with perf_span('module2.export'):
+        violations_only = st.toggle('위반 행만 내보내기', value=True, key='m2_export_violations_only',
+                                    help='끄면 분석된 전체 행을 내보냅니다 (대용량 로그는 생성에 시간이 걸립니다).')
+        labels = {'xlsx': 'Excel(.xlsx)로 내보내기', 'html': 'HTML로 내보내기'}
+        for column, fmt in zip(st.columns(len(EXPORT_FORMATS)), EXPORT_FORMATS):
+            with column:
+                st.download_button(
+                    labels[fmt],
+                    data=functools.partial(export_bytes, analysis, fmt, AUDIT_LOG_PATH, violations_only),
+                    file_name=f'audit_trail_di.{fmt}',
+                    mime=EXPORT_FORMATS[fmt],
+                    key=f'm2_export_{fmt}',
+                    on_click='ignore',
+                    use_container_width=True,
+                )
+
+
+SEQUENCE_RULE_IDS = ['PRE_INJECTION', 'ABORT_UNPRESERVED']
+SEQUENCE_PREVIEW_ROWS = 200
+SEQUENCE_PREVIEW_COLUMNS = ['TimeStamp(Server)', 'UserID', 'Role', 'ActionType', 'RecordID', RULES_COLUMN]
+
+
+@st.fragment
+@timed_section('module2.steps')
+def render_module2_steps(analysis):
+    """
+    '심층 분석' 버튼과 단계별 설명 패널을 렌더링합니다.
+    fragment로 분리되어 단계를 바꿔도 이 패널만 다시 실행되며, 위의 Audit Trail 표는 그대로 유지됩니다.
+    """
+    st.subheader('CRITICAL WARNING 심층 분석')
+
+    col_seq1, col_seq2, col_seq3, col_seq4 = st.columns(4)
+
+    # Step 1 이상의 모든 단계에서 버튼 노출
+    with col_seq1:
+        st.button('시간 동기화 오류 심층 분석 시작', key='btn_s1_start', disabled=(st.session_state.m2_step == 2),
+                  on_click=set_module2_step, args=(2,))
+
+    with col_seq2:
+        st.button('역할 권한 오용 심층 분석 시작', key='btn_s2_start', disabled=(st.session_state.m2_step == 3),
+                  on_click=set_module2_step, args=(3,))
+
+    with col_seq3:
+        st.button('사유 누락 오류 심층 분석 시작', key='btn_s3_start', disabled=(st.session_state.m2_step == 4),
+                  on_click=set_module2_step, args=(4,))
+
+    with col_seq4: 
+        st.button('Raw Data 불완전성 심층 분석 시작', key='btn_s4_start', disabled=(st.session_state.m2_step == 5),
+                  on_click=set_module2_step, args=(5,))
+
+    # ==========================================================================
+    # Step 2 이상의 단계에서만 나타나는 '심층 분석 결과'
+    # ==========================================================================
+    if st.session_state.m2_step >= 2:
+
+        if st.session_state.m2_step == 2:
+            contemporaneous_ko = REGULATORY_DATA.get("DI_Contemporaneous", {}).get("ko", "근거 조항을 찾을 수 없습니다.")
+            st.error("🔴 CRITICAL WARNING: 시간 동기화 오류")
+            st.markdown(f"**위반 원칙:** **Contemporaneous** (동시 기록) - 클라이언트와 서버 시간 차이.")
+            st.markdown(f"**📢 규제 근거 (PIC/S DI):** {contemporaneous_ko}")
+
+            # 로그 전체에 대한 사용자/워크스테이션별 체계적 시계 편차 (CLOCK_DRIFT 규칙)
+            st.markdown("**사용자/워크스테이션별 시계 편차 요약 (CLOCK_DRIFT):** 이동 중앙값 드리프트, 편차 급변, RecordID 내 클라이언트 시간 역전을 탐지합니다.")
+            with perf_span('module2.steps.drift_summary'):
+                st.dataframe(
+                    analysis["drift_summary"].rename(columns={
+                        "events": "이벤트 수",
+                        "mean_offset": "평균 편차(초)",
+                        "max_abs_offset": "최대 편차(초)",
+                        "drift_rows": "CLOCK_DRIFT 탐지 행",
+                    }),
+                    use_container_width=True,
+                    hide_index=True,
+                )
             st.markdown("""
-            ### 📢 원칙 위반 가설 설정
-            위 로그에서 **PIC/S DI 원칙** 중 위반 가능성이 있는 항목을 찾아 토론해보십시오.
+            **📢 토론 주제:** 1. 서버/클라이언트 시간 차이가 **데이터의 진실성(Truthfulness)**에 미치는 영향은 무엇입니까?
+            2. 이 오류가 **Batch Record의 최종 승인**에 어떤 영향을 미칠 수 있습니까?
             """)
-            
-            if st.button('DI 자동 분석 시작 및 심사자 판단 확인', key='audit_start'):
-                st.session_state.m2_step = 1
-                st.rerun()
-
-        # ==========================================================================
-        # Step 1 이상의 모든 단계에서 고정되는 '자동 탐지 결과' 및 '심층 분석 버튼'
-        # ==========================================================================
-        if st.session_state.m2_step >= 1:
-            
-            st.subheader('자동 탐지 결과 시각화') 
-            st.markdown("🚨 **빨간색 하이라이트 행**은 시스템이 탐지한 DI 위반 가능성 항목입니다.")
-            
-            styled_df = df_display.drop(columns=['TimeDifference'], errors='ignore').style.apply(highlight_errors, axis=1)
-            st.dataframe(styled_df, use_container_width=True)
-            
-            st.markdown("---")
-            
-            st.subheader('CRITICAL WARNING 심층 분석')
-            
-            col_seq1, col_seq2, col_seq3, col_seq4 = st.columns(4)
-            
-            # Step 1 이상의 모든 단계에서 버튼 노출
-            with col_seq1:
-                if st.button('시간 동기화 오류 심층 분석 시작', key='btn_s1_start', disabled=(st.session_state.m2_step == 2)):
-                    st.session_state.m2_step = 2
-                    st.rerun()
-            
-            with col_seq2:
-                if st.button('역할 권한 오용 심층 분석 시작', key='btn_s2_start', disabled=(st.session_state.m2_step == 3)):
-                    st.session_state.m2_step = 3
-                    st.rerun()
-            
-            with col_seq3:
-                if st.button('사유 누락 오류 심층 분석 시작', key='btn_s3_start', disabled=(st.session_state.m2_step == 4)):
-                    st.session_state.m2_step = 4
-                    st.rerun()
-            
-            with col_seq4: 
-                if st.button('Raw Data 불완전성 심층 분석 시작', key='btn_s4_start', disabled=(st.session_state.m2_step == 5)):
-                    st.session_state.m2_step = 5
-                    st.rerun()
-            
-            # ==========================================================================
-            # Step 2 이상의 단계에서만 나타나는 '심층 분석 결과'
-            # ==========================================================================
-            if st.session_state.m2_step >= 2:
-                
-                if st.session_state.m2_step == 2:
-                    contemporaneous_ko = REGULATORY_DATA.get("DI_Contemporaneous", {}).get("ko", "근거 조항을 찾을 수 없습니다.")
-                    st.error("🔴 CRITICAL WARNING: 시간 동기화 오류")
-                    st.markdown(f"**위반 원칙:** **Contemporaneous** (동시 기록) - 클라이언트와 서버 시간 차이.")
-                    st.markdown(f"**📢 규제 근거 (PIC/S DI):** {contemporaneous_ko}")
-                    st.markdown("**(이미지 대체: Audit Trail 시간 동기화 위반 시각화)**")
-                    st.markdown("""
-                    **📢 토론 주제:** 1. 서버/클라이언트 시간 차이가 **데이터의 진실성(Truthfulness)**에 미치는 영향은 무엇입니까?
-                    2. 이 오류가 **Batch Record의 최종 승인**에 어떤 영향을 미칠 수 있습니까?
-                    """)
-                
-                elif st.session_state.m2_step == 3:
-                    rnr_ko = REGULATORY_DATA.get("DI_RNR", {}).get("ko", "근거 조항을 찾을 수 없습니다.")
-                    st.error("🔴 CRITICAL WARNING: 승인되지 않은 역할 개입")
-                    st.markdown(f"**위반 원칙:** **RNR (Roles & Responsibilities)** - `QA_REVIEWER`가 `RAW_DATA_PROCESS` 시도.")
-                    st.markdown(f"**📢 규제 근거 (Part 11/Annex 11):** {rnr_ko}")
-                    st.markdown("**(이미지 대체: 전자 서명 역할 매트릭스)**")
-                    st.markdown("""
-                    **📢 토론 주제:** 1. 시스템 접근 통제(Access Control) 설정이 왜 실패했습니까?
-                    2. Part 11에서 정의하는 **전자 서명의 정당성**은 이 행위로 인해 어떻게 훼손됩니까?
-                    """)
-                
-                elif st.session_state.m2_step == 4:
-                    attributable_ko = REGULATORY_DATA.get("DI_Attributable", {}).get("ko", "근거 조항을 찾을 수 없습니다.")
-                    st.error("🔴 CRITICAL WARNING: 중요 행위에 대한 사유 누락")
-                    st.markdown(f"**위반 원칙:** **Attributable** (책임성) - 변경 사유 누락.")
-                    st.markdown(f"**📢 규제 근거 (PIC/S DI):** {attributable_ko}")
-                    st.markdown("**(이미지 대체: Audit Trail 책임성 위반 시각화)**")
-                    st.markdown("""
-                    **📢 토론 주제:** 1. 사유 누락이 **데이터 추적성(Traceability)**을 어떻게 파괴합니까?
-                    2. 이 경우, 해당 변경 행위 전체를 **무효(Invalid)** 처리해야 합니까? 심사자 판단은?
-                    """)
-                
-                elif st.session_state.m2_step == 5:
-                    incomplete_data_ko = REGULATORY_DATA.get("21_CFR_211_194_A", {}).get("ko", "근거 조항을 찾을 수 없습니다.")
-                    st.error("🔴 CRITICAL WARNING: Raw Data 불완전성 - Pre-Injection/Aborted Run 행위")
-                    st.markdown(f"**위반 원칙:** **Complete (데이터 완전성)** - QC 분석가가 실제 샘플 분석 전 **'Pre-Injection'**을 실행하거나, OOS 결과가 예상될 때 **분석 시퀀스를 중단(Abort)** 후 해당 원본 데이터를 보존하지 않은 행위를 가정합니다.")
-                    st.markdown(f"**📢 규제 근거 (21 CFR 211.194(a) - WL 기반):** {incomplete_data_ko}")
-                    st.markdown("**(이미지 대체: 크로마토그래피 Raw Data 불완전성)**")
-                    st.markdown("""
-                    **📢 토론 주제:** 1. Pre-Injection이 **데이터 조작(Data Fabrication)**으로 간주되는 이유는 무엇입니까?
-                    2. Audit Trail에 'Aborted'로 기록된 로그에 대해서도 **원본 Raw Data**를 보존하고 검토해야 하는 규제적 의무가 있습니까?
-                    """)
-                
-            
-            elif st.session_state.m2_step == 1:
-                st.info("⬆️ 위 **'CRITICAL WARNING 심층 분석'** 영역에서 분석을 원하는 항목의 버튼을 눌러 심층 분석 단계로 진입하십시오.")
 
-    
-    elif st.session_state.m2_step == 0 and df.empty:
-        st.info("⬆️ Audit Trail 원문을 검토하신 후, 'DI 자동 분석 시작' 버튼을 눌러 시스템 탐지 결과를 확인하십시오.")
+        elif st.session_state.m2_step == 3:
+            rnr_ko = REGULATORY_DATA.get("DI_RNR", {}).get("ko", "근거 조항을 찾을 수 없습니다.")
+            st.error("🔴 CRITICAL WARNING: 승인되지 않은 역할 개입")
+            st.markdown(f"**위반 원칙:** **RNR (Roles & Responsibilities)** - `QA_REVIEWER`가 `RAW_DATA_PROCESS` 시도.")
+            st.markdown(f"**📢 규제 근거 (Part 11/Annex 11):** {rnr_ko}")
+            st.markdown("**(이미지 대체: 전자 서명 역할 매트릭스)**")
+            st.markdown("""
+            **📢 토론 주제:** 1. 시스템 접근 통제(Access Control) 설정이 왜 실패했습니까?
+            2. Part 11에서 정의하는 **전자 서명의 정당성**은 이 행위로 인해 어떻게 훼손됩니까?
+            """)
+
+        elif st.session_state.m2_step == 4:
+            attributable_ko = REGULATORY_DATA.get("DI_Attributable", {}).get("ko", "근거 조항을 찾을 수 없습니다.")
+            st.error("🔴 CRITICAL WARNING: 중요 행위에 대한 사유 누락")
+            st.markdown(f"**위반 원칙:** **Attributable** (책임성) - 변경 사유 누락.")
+            st.markdown(f"**📢 규제 근거 (PIC/S DI):** {attributable_ko}")
+
+            # 로그 전체의 변경 사유 재사용 분석 (표기 변형을 묶은 상투적 사유의 습관적 반복)
+            with perf_span('module2.steps.reason_summary'):
+                reason_summary = analysis["reason_summary"]
+                findings = reason_summary[reason_summary['Boilerplate'].astype(bool)]
+                st.markdown(
+                    f"**상투적 변경 사유 반복 사용:** 사용자 {findings['UserID'].nunique():,}명, {len(findings):,}건 "
+                    f"(같은 사유와 그 표기 변형을 {REASON_REUSE_MIN_USES}건 이상, 본인 변경 건수의 {REASON_REUSE_MIN_SHARE:.0%} 이상 사용하고 "
+                    f"같은 사유를 쓰는 사용자들의 중앙값 비중보다 {REASON_REUSE_MIN_LIFT:g}배 이상 높은 경우)"
+                )
+                if not findings.empty:
+                    st.dataframe(
+                        findings.drop(columns=['Boilerplate']).rename(columns={
+                            "Reason": "대표 사유",
+                            "variants": "표기 변형 수",
+                            "uses": "사용 건수",
+                            "records": "RecordID 수",
+                            "max_record_uses": "RecordID당 최대 반복",
+                            "share": "본인 변경 대비 비중",
+                            "typical_share": "사용자 중앙값 비중",
+                            "users": "사용 사용자 수",
+                        }),
+                        use_container_width=True,
+                        hide_index=True,
+                    )
+            st.markdown("**(이미지 대체: Audit Trail 책임성 위반 시각화)**")
+            st.markdown("""
+            **📢 토론 주제:** 1. 사유 누락이 **데이터 추적성(Traceability)**을 어떻게 파괴합니까?
+            2. 이 경우, 해당 변경 행위 전체를 **무효(Invalid)** 처리해야 합니까? 심사자 판단은?
+            3. "Minor correction"처럼 수백 건의 변경에 반복된 상투적 사유는 **변경의 실제 이유를 설명**한다고 볼 수 있습니까?
+            """)
+
+        elif st.session_state.m2_step == 5:
+            incomplete_data_ko = REGULATORY_DATA.get("21_CFR_211_194_A", {}).get("ko", "근거 조항을 찾을 수 없습니다.")
+            st.error("🔴 CRITICAL WARNING: Raw Data 불완전성 - Pre-Injection/Aborted Run 행위")
+            st.markdown(f"**위반 원칙:** **Complete (데이터 완전성)** - QC 분석가가 실제 샘플 분석 전 **'Pre-Injection'**을 실행하거나, OOS 결과가 예상될 때 **분석 시퀀스를 중단(Abort)** 후 해당 원본 데이터를 보존하지 않은 행위를 가정합니다.")
+            st.markdown(f"**📢 규제 근거 (21 CFR 211.194(a) - WL 기반):** {incomplete_data_ko}")
+
+            # RecordID별 이벤트 시퀀스 탐지 결과 (PRE_INJECTION / ABORT_UNPRESERVED 규칙)
+            with perf_span('module2.steps.sequence_table'):
+                sequence_positions = filter_audit_rows(analysis["df"], rule_ids=SEQUENCE_RULE_IDS)
+                st.markdown(f"**RecordID별 이벤트 시퀀스 탐지 결과:** 총 {len(sequence_positions):,}건 (공식 분석 시작 전 처리/중단, 보존 이벤트 없는 ABORT)")
+                if len(sequence_positions):
+                    st.dataframe(
+                        format_for_display(analysis["df"].iloc[sequence_positions[:SEQUENCE_PREVIEW_ROWS]])[SEQUENCE_PREVIEW_COLUMNS],
+                        use_container_width=True,
+                    )
+            st.markdown("**(이미지 대체: 크로마토그래피 Raw Data 불완전성)**")
+            st.markdown("""
+            **📢 토론 주제:** 1. Pre-Injection이 **데이터 조작(Data Fabrication)**으로 간주되는 이유는 무엇입니까?
+            2. Audit Trail에 'Aborted'로 기록된 로그에 대해서도 **원본 Raw Data**를 보존하고 검토해야 하는 규제적 의무가 있습니까?
+            """)
+
+
+    elif st.session_state.m2_step == 1:
+        st.info("⬆️ 위 **'CRITICAL WARNING 심층 분석'** 영역에서 분석을 원하는 항목의 버튼을 눌러 심층 분석 단계로 진입하십시오.")
 
 
 # ==============================================================================
 # 모듈 3: GAMP 5 Validation 리스크 (심화)
 # ==============================================================================
-with tab3:
-    # 탭 진입 시, 모듈 2의 상태 초기화 (다른 모듈로 넘어왔음을 감지)
-    if st.session_state.m2_step != 0:
-        st.session_state.m2_step = 0
-        
+@timed_section('module3')
+def render_module3():
+    """
+    모듈 3 화면을 렌더링합니다.
+    """
     st.header('3. GAMP 5 기반 CSV 리스크 판단') 
     st.markdown("---")
     
@@ -396,14 +934,14 @@ with tab3:
         with col1:
             system_type = st.selectbox(
                 'URS(User Requirement Spec.)에 명시된 시스템의 핵심 기능:',
-                ('선택 안 함', '단순 데이터 로깅/저장 기능', '복잡한 Process Parameter 계산/결정 로직 포함', '데이터 처리 로직은 있으나 비판적이지 않은 시스템'),
+                answer_options('3-1', 'system_type_gamp'),
                 key='system_type_gamp'
             )
         
         with col2:
             validation_category = st.selectbox(
                 'Validation Plan에 명시된 GAMP 5 Category:',
-                ('선택 안 함', 'Category 3 (Non-Configured Software)', 'Category 4 (Configured Software)', 'Category 5 (Custom Application)'),
+                answer_options('3-1', 'validation_category_gamp'),
                 key='validation_category_gamp'
             )
         
@@ -411,9 +949,10 @@ with tab3:
             
             critical_ko = REGULATORY_DATA.get("GAMP5_CriticalThinking", {}).get("ko", "근거 조항을 찾을 수 없습니다.")
             risk_based_ko = REGULATORY_DATA.get("GAMP5_RiskBased", {}).get("ko", "근거 조항을 찾을 수 없습니다.")
+            grade = grade_answer('3-1', system_type_gamp=system_type, validation_category_gamp=validation_category)
             
             # --- 1. CRITICAL WARNING: Category 불일치 (리스크 과소평가) ---
-            if system_type == '복잡한 Process Parameter 계산/결정 로직 포함' and validation_category in ['Category 3 (Non-Configured Software)', 'Category 4 (Configured Software)']:
+            if grade["rule"] == 'M31_CATEGORY_UNDERESTIMATED':
                 st.error("🚨 CRITICAL WARNING: GAMP 5 Category 불일치 리스크")
                 st.markdown(f"""
                 **규제적 판단:** 복잡한 계산 로직은 **Category 5**에 해당합니다. 낮은 Category 분류는 **Validation 범위가 불충분**하다는 것을 의미하며, **데이터 무결성 및 제품 품질에 치명적인 위험**이 있습니다.
@@ -437,7 +976,7 @@ with tab3:
                 # ----------------------------------------------------
 
             # --- 2. WARNING: Validation 과도 적용 (비효율) ---
-            elif system_type == '단순 데이터 로깅/저장 기능' and validation_category == 'Category 5 (Custom Application)':
+            elif grade["rule"] == 'M31_CATEGORY_OVERAPPLIED':
                 st.warning("🟡 WARNING: Validation 과도 적용 리스크 (비효율)")
                 st.markdown(f"""
                 **규제적 판단:** 단순 로깅 시스템을 Category 5로 분류하면 **불필요한 리소스**가 낭비됩니다. **[근거 조항: GAMP 5 Second Edition - Risk-Based Approach Principle]**
@@ -452,8 +991,7 @@ with tab3:
                 """)
                 
             # --- 3. SUCCESS: 적정 분류 ---
-            elif (system_type == '단순 데이터 로깅/저장 기능' and validation_category in ['Category 3 (Non-Configured Software)', 'Category 4 (Configured Software)']) or \
-                 (system_type == '복잡한 Process Parameter 계산/결정 로직 포함' and validation_category == 'Category 5 (Custom Application)'):
+            elif grade["rule"] == 'M31_CATEGORY_MATCHED':
                 st.success("✅ GAMP 5 Category 분류가 의도된 용도(URS)와 적절하게 일치합니다.")
                 st.markdown(f"""
                 **규제적 판단:** 시스템의 리스크 기반으로 Validation 노력을 효율화했습니다. **[근거 조항: GAMP 5 Second Edition - Risk-Based Approach Principle]**
@@ -461,7 +999,7 @@ with tab3:
                 st.markdown(f"**📢 규제 근거:** {risk_based_ko}")
 
             # --- 4. WARNING: 선택 안 함 ---
-            elif system_type == '선택 안 함' or validation_category == '선택 안 함':
+            elif grade["rule"] == 'M31_INCOMPLETE':
                 st.warning("항목을 모두 선택해 주세요.")
 
     with subtab_3_2:
@@ -471,21 +1009,22 @@ with tab3:
         with col3:
             qs_tool = st.selectbox(
                 '품질 시스템(Quality System)에서 사용되는 소프트웨어:',
-                ('선택 안 함', 'Batch Record 관리용 Custom ERP', 'CAPA/Complaint 기록용 Excel 스프레드시트', '장비 제어용 펌웨어'),
+                answer_options('3-2', 'qs_tool_gamp'),
                 key='qs_tool_gamp'
             )
         with col4:
             validation_status_qs = st.selectbox(
                 '해당 소프트웨어에 대한 Validation 수행 여부:',
-                ('선택 안 함', 'Full Validation 수행', 'Vendor Qualification만 수행', '미수행 (상용 소프트웨어라 가정)'),
+                answer_options('3-2', 'validation_status_qs'),
                 key='validation_status_qs'
             )
 
         if st.button('QS 소프트웨어 Validation 리스크 분석', key='qs_validation_start'):
             
             qs_validation_ko = REGULATORY_DATA.get("21_CFR_820_70_I", {}).get("ko", "근거 조항을 찾을 수 없습니다.")
+            grade = grade_answer('3-2', qs_tool_gamp=qs_tool, validation_status_qs=validation_status_qs)
 
-            if qs_tool == 'CAPA/Complaint 기록용 Excel 스프레드시트' and validation_status_qs == '미수행 (상용 소프트웨어라 가정)':
+            if grade["rule"] == 'M32_QS_NOT_VALIDATED':
                 st.error("🚨 CRITICAL WARNING: 품질 시스템 소프트웨어 Validation 실패")
                 st.markdown("""
                 **규제적 판단:** 품질 시스템(CAPA, Complaint 등)의 일부로 사용되는 **상용 소프트웨어(Excel 포함)**라도 **의도된 용도**에 대한 검증(Validation)이 필수입니다. 미검증 시, 기록의 무결성 위반으로 **FDA Warning Letter (21 CFR 820.70(i) 위반)**의 주요 원인이 됩니다.
@@ -504,12 +1043,41 @@ with tab3:
                 """)
                 
                 st.markdown(f"**📢 규제 근거 (21 CFR 820.70(i) - WL 기반):** {qs_validation_ko}")
-            elif qs_tool == '선택 안 함' or validation_status_qs == '선택 안 함':
+            elif grade["rule"] == 'M32_INCOMPLETE':
                 st.warning("항목을 모두 선택해 주세요.")
             else:
                 st.success("✅ 품질 시스템 소프트웨어 Validation 상태는 적절합니다.")
                 st.markdown(f"**규제 근거 (21 CFR 820.70(i) - WL 기반):** {qs_validation_ko}")
 
+# ==============================================================================
+# 상단 모듈 내비게이션 적용 (선택된 모듈만 실행)
+# ==============================================================================
+# st.tabs는 모든 탭 본문을 매 rerun마다 실행하므로, 선택된 모듈의 렌더링 함수만 호출합니다.
+MODULES = {
+    "💡 모듈 1: AI/ML 규제 투명성": render_module1,
+    "💡 모듈 2: Audit Trail DI 심층 분석": render_module2,
+    "💡 모듈 3: GAMP 5 Validation 리스크": render_module3,
+}
+
+
+def reset_module2_step():
+    """
+    다른 모듈로 이동하면 모듈 2의 순차 공개 단계를 초기화합니다.
+    """
+    st.session_state.m2_step = 0
+
+
+active_module = st.radio(
+    '모듈 선택',
+    list(MODULES.keys()),
+    horizontal=True,
+    label_visibility='collapsed',
+    key='active_module',
+    on_change=reset_module2_step,
+)
+st.markdown("---")
+MODULES[active_module]()
+
 # ==============================================================================
 # 최종 푸터 및 저작권 정보 
 # ==============================================================================
@@ -519,4 +1087,9 @@ st.markdown("""
 <div style="text-align: center; color: #808080; font-size: 0.8em; padding-top: 10px;">
     © 2026 Educational Simulation (MVP) | 개발 및 콘텐츠 총괄 책임자: 최영진
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+# 계측이 켜져 있으면 이번 rerun 기록을 마치고 사이드바 패널을 표시합니다 (패널 자체는 계측하지 않음).
+if PERF_STATE["recorder"] is not None:
+    record_rerun_profile(PERF_STATE["recorder"])
+    render_perf_panel()
\ No newline at end of file
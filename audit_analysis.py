@@ -0,0 +1,1560 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+# ==============================================================================
+# Audit Trail 로딩 및 DI 분석 로직 (모듈 2)
+# ==============================================================================
+# Streamlit UI(Edu_simulation.py)와 분리된 순수 pandas 로직입니다.
+# UI 쪽에서 캐싱 레이어를 씌워 재실행(rerun)마다 CSV를 다시 읽지 않도록 합니다.
+
+AUDIT_LOG_PATH = os.environ.get('EDU_AUDIT_LOG', 'audit_log_error.csv')  # 부하 테스트/벤치마크용 경로 재지정
+TIMESTAMP_COLUMNS = ['TimeStamp(Server)', 'ActionTime(Client)']
+AUDIT_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'  # Audit Trail 원본의 타임스탬프 형식
+DISPLAY_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+TIME_DIFF_THRESHOLD = 120  # 2분(120초) 이상 차이
+
+# Audit Trail 컬럼 스키마: 반복 값이 많은 컬럼은 category, 자유 텍스트는 string으로 읽습니다.
+CATEGORY_COLUMNS = ['UserID', 'Role', 'ActionType', 'RecordID']
+STRING_COLUMNS = ['ReasonForChange']
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+STRING_DTYPE = 'string[pyarrow]' if HAS_PYARROW else 'string'
+
+
+def file_signature(path=AUDIT_LOG_PATH):
+    """
+    캐시 키로 사용할 파일 서명(경로, 수정 시각, 크기)을 반환합니다.
+    파일이 없으면 FileNotFoundError가 그대로 전달됩니다.
+    """
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+
+def audit_dtypes():
+    """
+    read_csv에 전달할 컬럼별 dtype 매핑을 반환합니다.
+    """
+    dtypes = {col: 'category' for col in CATEGORY_COLUMNS}
+    dtypes.update({col: STRING_DTYPE for col in STRING_COLUMNS})
+    return dtypes
+
+
+def parse_timestamps(values):
+    """
+    AUDIT_TIME_FORMAT으로 타임스탬프를 변환합니다.
+    형식이 다른 파일은 ISO 8601 파싱으로 대체합니다.
+    """
+    try:
+        return pd.to_datetime(values, format=AUDIT_TIME_FORMAT)
+    except (ValueError, TypeError):
+        return pd.to_datetime(values, format='ISO8601')
+
+
+def apply_schema(df):
+    """
+    타임스탬프를 datetime으로, 나머지 컬럼을 스키마 dtype으로 변환합니다.
+    """
+    for col in TIMESTAMP_COLUMNS:
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = parse_timestamps(df[col])
+    for col, dtype in audit_dtypes().items():
+        if col in df.columns and str(df[col].dtype) != dtype:
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+def read_audit_csv(source, **kwargs):
+    """
+    스키마 dtype을 지정하여 Audit Trail CSV를 읽습니다 (chunksize 등은 그대로 전달).
+    pyarrow가 설치되어 있고 청크 단위 읽기가 아니면 멀티스레드 pyarrow 엔진을 사용합니다.
+    """
+    if HAS_PYARROW and 'chunksize' not in kwargs:
+        kwargs.setdefault('engine', 'pyarrow')
+    return pd.read_csv(source, dtype=audit_dtypes(), **kwargs)
+
+
+def load_audit_trail(path=AUDIT_LOG_PATH):
+    """
+    Audit Trail CSV를 스키마 dtype으로 읽고 타임스탬프 컬럼을 datetime으로 변환합니다.
+    """
+    df = read_audit_csv(path)
+    if not df.empty:
+        apply_schema(df)
+    return df
+
+
+# ==============================================================================
+# DI 탐지 규칙 레지스트리
+# ==============================================================================
+# 각 규칙은 (규칙 ID, ALCOA+/Part 11 원칙, REGULATORY_DATA 인용 키, 벡터화된 predicate)로
+# 등록됩니다. analyze_audit_trail()은 등록된 모든 규칙을 한 번에 평가하여
+# 행마다 위반 규칙 비트마스크(ViolationMask)를 생성하며, 중간 DataFrame 복사본을 만들지 않습니다.
+
+DI_RULES = []
+MASK_COLUMN = 'ViolationMask'
+RULES_COLUMN = 'DetectedRules'
+DERIVED_COLUMNS = ['ClockOffset', 'TimeDifference']  # 규칙 평가용 파생 컬럼 (화면에는 숨김)
+OPEN_BITS_COLUMN = 'OpenRuleBits'  # 스트리밍 컨텍스트 행의 판정 보류 규칙 비트
+REASON_REQUIRED_ACTIONS = ['MODIFY', 'CHANGE_STATUS']  # 변경 사유가 필요한 행위
+
+
+def register_rule(rule_id, principle, citation_key, description, carry=None, lookahead=False):
+    """
+    DI 탐지 규칙을 레지스트리에 등록하는 데코레이터입니다.
+    predicate(df, options)는 행 수와 같은 길이의 bool 배열(또는 Series)을 반환해야 합니다.
+    그룹/순서에 의존하는 규칙은 carry(df, options)로 다음 청크 평가에 이어서 필요한
+    행의 인덱스 라벨을 반환합니다 (스트리밍 분석에서 청크 경계를 넘는 탐지에 사용).
+    lookahead=True인 규칙은 이후 이벤트에 따라 판정이 바뀌므로, carry로 넘긴 행을 다음 청크에서 다시 판정합니다.
+    """
+    def decorator(predicate):
+        if any(rule["id"] == rule_id for rule in DI_RULES):
+            raise ValueError(f"이미 등록된 규칙 ID입니다: {rule_id}")
+        DI_RULES.append({
+            "id": rule_id,
+            "bit": len(DI_RULES),
+            "principle": principle,
+            "citation": citation_key,
+            "description": description,
+            "predicate": predicate,
+            "carry": carry,
+            "lookahead": lookahead,
+        })
+        return predicate
+    return decorator
+
+
+def mask_dtype(rules=None):
+    """
+    등록된 규칙 수를 담을 수 있는 가장 작은 부호 없는 정수 dtype을 반환합니다.
+    """
+    rules = DI_RULES if rules is None else rules
+    max_bit = max((rule["bit"] for rule in rules), default=0)
+    for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+        if max_bit < np.iinfo(dtype).bits:
+            return dtype
+    raise ValueError("규칙 수가 64개를 초과하여 비트마스크로 표현할 수 없습니다.")
+
+
+@register_rule('TIME_SYNC', 'Contemporaneous', 'DI_Contemporaneous',
+               '서버/클라이언트 시간 차이가 허용 기준을 초과')
+def _rule_time_sync(df, options):
+    return df['TimeDifference'] > options.get('time_diff_threshold', TIME_DIFF_THRESHOLD)
+
+
+@register_rule('ROLE_MISUSE', 'RNR (Roles & Responsibilities)', 'DI_RNR',
+               'QA_REVIEWER가 RAW_DATA_PROCESS 수행')
+def _rule_role_misuse(df, options):
+    return (df['Role'] == 'QA_REVIEWER') & (df['ActionType'] == 'RAW_DATA_PROCESS')
+
+
+def _reason_missing(df):
+    reason = df['ReasonForChange'].astype(STRING_DTYPE)  # 스키마가 적용된 경우 변환 없음
+    return reason.str.strip().eq('').fillna(True).to_numpy(dtype=bool)
+
+
+@register_rule('REASON_MISSING', 'Attributable', 'DI_Attributable',
+               'MODIFY/CHANGE_STATUS 행위에 변경 사유 누락')
+def _rule_reason_missing(df, options):
+    return df['ActionType'].isin(REASON_REQUIRED_ACTIONS) & _reason_missing(df)
+
+
+def evaluate_rules(df, rules=None, **options):
+    """
+    등록된 규칙을 한 번에 평가하여 행 단위 위반 비트마스크(numpy 배열)를 반환합니다.
+    """
+    rules = DI_RULES if rules is None else rules
+    dtype = mask_dtype(rules)
+    mask = np.zeros(len(df), dtype=dtype)
+    for rule in rules:
+        hits = np.asarray(rule["predicate"](df, options), dtype=bool)
+        mask[hits] |= dtype(1 << rule["bit"])
+    return mask
+
+
+def carry_context(df, rules=None, **options):
+    """
+    다음 청크 평가 시 앞에 덧붙일 컨텍스트 행을 반환합니다 (carry가 없는 규칙만 있으면 None).
+    OPEN_BITS_COLUMN에는 해당 행을 판정 보류 상태로 넘긴 lookahead 규칙의 비트가 담기며,
+    다음 평가에서는 이 비트만 다시 판정하고 나머지 비트는 기존 판정을 유지합니다.
+    df에 OPEN_BITS_COLUMN이 있으면 이미 판정이 확정된 비트로는 다시 넘기지 않습니다.
+    """
+    rules = DI_RULES if rules is None else rules
+    carried = [(rule, rule["carry"](df, options)) for rule in rules if rule["carry"] is not None]
+    if not carried:
+        return None
+    previous_open = df[OPEN_BITS_COLUMN].to_numpy() if OPEN_BITS_COLUMN in df.columns else None
+    keep = np.zeros(len(df), dtype=bool)
+    open_bits = np.zeros(len(df), dtype=mask_dtype(rules))
+    for rule, labels in carried:
+        rows = df.index.isin(labels)
+        if rule["lookahead"]:
+            if previous_open is not None:
+                rows &= (previous_open & (1 << rule["bit"])) != 0
+            open_bits[rows] |= open_bits.dtype.type(1 << rule["bit"])
+        keep |= rows
+    context = df.loc[keep].copy()
+    context[OPEN_BITS_COLUMN] = open_bits[keep]
+    return context
+
+
+def rule_hit_counts(mask, rules=None):
+    """
+    비트마스크에서 규칙별 탐지 건수를 집계합니다.
+    """
+    rules = DI_RULES if rules is None else rules
+    mask = np.asarray(mask)
+    return {rule["id"]: int(np.count_nonzero(mask & (1 << rule["bit"]))) for rule in rules}
+
+
+def describe_violations(mask, rules=None):
+    """
+    비트마스크 Series를 규칙 ID 목록 문자열로 변환합니다.
+    고유 마스크 값에 대해서만 디코딩하므로 행 수와 무관하게 빠릅니다.
+    """
+    rules = DI_RULES if rules is None else rules
+    labels = {
+        value: ', '.join(rule["id"] for rule in rules if int(value) & (1 << rule["bit"]))
+        for value in pd.unique(mask)
+    }
+    return mask.map(labels)
+
+
+def add_derived_columns(df):
+    """
+    규칙 평가에 필요한 파생 컬럼(ClockOffset, TimeDifference)을 추가합니다.
+    ClockOffset은 서버 - 클라이언트 시간(초, 부호 포함)이며 TimeDifference는 그 절댓값입니다.
+    """
+    df['ClockOffset'] = (df['TimeStamp(Server)'] - df['ActionTime(Client)']).dt.total_seconds()
+    df['TimeDifference'] = df['ClockOffset'].abs()
+    return df
+
+
+def _group_codes(df, keys):
+    return df.groupby(keys, observed=True, sort=False, dropna=False).ngroup().to_numpy()
+
+
+def _epoch_ns(values):
+    return values.to_numpy(dtype='datetime64[ns]').view('i8')
+
+
+def _sorted_group_starts(sorted_codes):
+    starts = np.ones(len(sorted_codes), dtype=bool)
+    starts[1:] = sorted_codes[1:] != sorted_codes[:-1]
+    return starts
+
+
+# ==============================================================================
+# RecordID 세션과 압축 상태 (idle horizon)
+# ==============================================================================
+# RecordID 단위 규칙(클라이언트 시간 역전, Pre-Injection, Aborted Run)은 같은 RecordID의 앞뒤 이벤트와 비교합니다.
+# 스트리밍 분석에서 이를 위해 RecordID마다 행을 넘기면 컨텍스트가 RecordID 수(로그 크기)만큼 커지므로,
+# 행 대신 RecordID별 압축 상태(record state: 마지막 서버/클라이언트 시각, 세션의 첫 RUN_START 시각)만
+# 다음 청크로 넘깁니다. 이후 이벤트를 기다리는 판정 보류 행은 활성 세션의 것만 컨텍스트에 남습니다.
+#  - 같은 RecordID라도 이벤트 간격이 RECORD_IDLE_SECONDS를 넘으면 새 세션으로 보고 이전 세션과 비교하지 않습니다.
+#  - 스트림 시각(지금까지 읽은 최대 서버 시각)이 마지막 이벤트로부터 이 간격을 넘은 RecordID는 상태에서 제거합니다.
+# 전체 분석도 같은 세션 정의를 사용하므로 전체/스트리밍/tail 분석 결과가 같습니다.
+# 로그는 서버 시각 순서로 기록된다고 가정합니다 (상태에서 제거된 RecordID에 늦게 도착한 이벤트는 새 세션이 됩니다).
+
+RECORD_IDLE_SECONDS = 30 * 24 * 3600  # 30일 동안 이벤트가 없는 RecordID는 종료된 것으로 봄
+RECORD_STATE_COLUMNS = ['last_server', 'last_client', 'run_start']
+NO_TIME = np.iinfo(np.int64).min  # 시각 없음 (ns)
+STREAMING_OPTIONS = ('context_rows', 'record_state', 'record_sessions')  # scan_chunk()이 규칙에 넘기는 내부 옵션
+
+
+def new_record_state():
+    """
+    RecordID별 압축 상태(RecordID 인덱스, 시각은 epoch ns)를 담을 빈 DataFrame을 만듭니다.
+    """
+    columns = {col: pd.Series(dtype=np.int64) for col in RECORD_STATE_COLUMNS}
+    return pd.DataFrame(columns, index=pd.Index([], dtype=object, name='RecordID'))
+
+
+def _record_codes(df):
+    # RecordID 코드와 코드별 값(object, 결측은 None 하나로 묶음)
+    codes, records = pd.factorize(df['RecordID'])
+    records = np.asarray(records, dtype=object)
+    if (codes < 0).any():
+        codes = np.where(codes < 0, len(records), codes)
+        records = np.append(records, None)
+    return codes, records
+
+
+def record_sessions(df, options):
+    """
+    새 행과 판정 보류(lookahead) 컨텍스트 행을 RecordID·서버 시각순으로 정렬하여 RecordID 세션을 나눕니다.
+    스트리밍 분석에서는 options의 record_state(이전 청크까지의 압축 상태)와 context_rows(앞에 덧붙인
+    컨텍스트 행 수)를 반영하며, 상태가 있는 RecordID의 첫 새 행은 상태의 마지막 이벤트와 이어서 비교합니다.
+    반환 dict의 행 단위 배열은 정렬 순서(order) 기준이고, 세션 단위 배열은 세션 번호 기준입니다.
+    """
+    n = len(df)
+    horizon = int(options.get('record_idle_seconds', RECORD_IDLE_SECONDS) * 10**9)
+    state = options.get('record_state')
+    state = new_record_state() if state is None else state
+    is_new = np.arange(n) >= options.get('context_rows', 0)
+    participating = is_new.copy()
+    if OPEN_BITS_COLUMN in df.columns:
+        lookahead_bits = sum(1 << rule["bit"] for rule in DI_RULES if rule["lookahead"])
+        participating |= (df[OPEN_BITS_COLUMN].to_numpy() & lookahead_bits) != 0
+
+    codes, records = _record_codes(df)
+    server = _epoch_ns(df['TimeStamp(Server)'])
+    client = _epoch_ns(df['ActionTime(Client)'])
+    position = state.index.get_indexer(records) if len(state) else np.full(len(records), -1)
+    known = position >= 0
+    previous = {}
+    for col in RECORD_STATE_COLUMNS:
+        previous[col] = np.full(len(records), NO_TIME, dtype=np.int64)
+        previous[col][known] = state[col].to_numpy()[position[known]]
+
+    # 컨텍스트 행은 같은 RecordID의 새 행보다 앞에 둡니다 (컨텍스트 행은 항상 상태의 현재 세션에 속함).
+    rows = np.flatnonzero(participating)
+    order = rows[np.lexsort((server[rows], is_new[rows], codes[rows]))]
+    record = codes[order]
+    new = is_new[order]
+    sorted_server = server[order]
+    sorted_client = client[order]
+    first = _sorted_group_starts(record)
+
+    # 직전 이벤트: 같은 RecordID의 바로 앞 새 행, 없으면 압축 상태의 마지막 이벤트
+    previous_new = np.zeros(len(order), dtype=bool)
+    previous_new[1:] = new[:-1] & ~first[1:]
+    prev_server = previous["last_server"][record]
+    prev_client = previous["last_client"][record]
+    prev_server[1:] = np.where(previous_new[1:], sorted_server[:-1], prev_server[1:])
+    prev_client[1:] = np.where(previous_new[1:], sorted_client[:-1], prev_client[1:])
+    gap_break = new & ((prev_server == NO_TIME) | (sorted_server - prev_server > horizon))
+    session_starts = np.flatnonzero(first | gap_break)
+    session = np.cumsum(first | gap_break) - 1
+    session_ends = np.append(session_starts[1:], len(order)) - 1
+    session_record = record[session_starts]
+    continues = ~gap_break[session_starts]  # 압축 상태의 현재 세션을 이어받는 세션
+
+    out_of_order = new & ~gap_break & (prev_client != NO_TIME) & (sorted_client < prev_client)
+
+    # 세션의 첫 공식 분석 시작(RUN_START) 시각: 이어받은 세션은 압축 상태의 시각을 포함
+    is_start = df['ActionType'].isin(SEQUENCE_START_ACTIONS).to_numpy()[order]
+    latest_time = np.iinfo(np.int64).max
+    run_start = np.minimum.reduceat(np.where(is_start, sorted_server, latest_time), session_starts)
+    carried_start = previous["run_start"][session_record]
+    run_start = np.where(continues & (carried_start != NO_TIME), np.minimum(run_start, carried_start), run_start)
+    run_start[run_start == latest_time] = NO_TIME
+
+    # 세션의 마지막 이벤트 시각과 활성 여부 (RecordID의 마지막 세션이고 유휴 기간이 horizon 이내)
+    last_server = sorted_server[session_ends]
+    last_server = np.where(continues, np.maximum(last_server, previous["last_server"][session_record]), last_server)
+    clock = max(server[is_new].max(initial=NO_TIME), state["last_server"].max() if len(state) else NO_TIME)
+    latest = _sorted_group_starts(session_record[::-1])[::-1]
+    active = latest & (clock - last_server <= horizon)
+
+    return {
+        "order": order,
+        "records": records,
+        "new": new,
+        "server": sorted_server,
+        "client": sorted_client,
+        "session": session,
+        "session_starts": session_starts,
+        "out_of_order": out_of_order,
+        "session_record": session_record,
+        "session_ends": session_ends,
+        "continues": continues,
+        "last_server": last_server,
+        "run_start": run_start,
+        "active": active,
+        "record_state": state,
+        "horizon": horizon,
+        "clock": clock,
+        "context_rows": options.get('context_rows', 0),
+    }
+
+
+def _record_sessions(df, options):
+    # scan_chunk()/analyze_audit_trail()이 미리 계산한 세션 정보를 규칙들이 함께 사용합니다.
+    sessions = options.get('record_sessions')
+    return record_sessions(df, options) if sessions is None else sessions
+
+
+def update_record_state(sessions):
+    """
+    새 행이 있는 RecordID의 마지막 세션으로 압축 상태를 갱신하고, 유휴 기간이 horizon을 넘은 RecordID를 제거합니다.
+    (새 상태, 제거된 RecordID 목록)을 반환합니다.
+    """
+    state = sessions["record_state"]
+    ends = sessions["session_ends"]
+    latest = _sorted_group_starts(sessions["session_record"][::-1])[::-1]
+    changed = latest & sessions["new"][ends]  # 새 행은 RecordID 안에서 컨텍스트 행 뒤에 정렬됨
+    updated = pd.DataFrame({
+        "last_server": sessions["last_server"][changed],
+        "last_client": sessions["client"][ends[changed]],
+        "run_start": sessions["run_start"][changed],
+    }, index=pd.Index(sessions["records"][sessions["session_record"][changed]], dtype=object, name='RecordID'))
+    state = pd.concat([state[~state.index.isin(updated.index)], updated])
+    idle = sessions["clock"] - state["last_server"].to_numpy() > sessions["horizon"]
+    return state[~idle], state.index[idle]
+
+
+# ==============================================================================
+# 사용자/워크스테이션별 시계 편차(Clock Drift) 탐지
+# ==============================================================================
+# 행 단위 TIME_SYNC 규칙과 달리, 정렬 + 그룹 단위 벡터 연산으로 로그 전체의 체계적 편차를 찾습니다.
+#  - 사용자(및 워크스테이션)별 최근 N건 ClockOffset 이동 중앙값이 기준 초과
+#  - 직전 이동 중앙값 대비 ClockOffset 급변(Jump)
+#  - 같은 RecordID 세션 안에서 서버 시간 순서와 클라이언트 시간 순서가 역전(Out-of-order)
+
+WORKSTATION_COLUMN = 'Workstation'
+DRIFT_WINDOW = 20
+DRIFT_MIN_PERIODS = 3
+DRIFT_MEDIAN_THRESHOLD = 60  # 이동 중앙값 편차 60초 초과 시 체계적 드리프트
+DRIFT_JUMP_THRESHOLD = 300   # 직전 이동 중앙값 대비 5분 이상 급변
+
+
+def drift_group_keys(df):
+    """
+    시계 편차를 추적할 그룹 키(UserID, 워크스테이션 컬럼이 있으면 함께)를 반환합니다.
+    """
+    return ['UserID'] + ([WORKSTATION_COLUMN] if WORKSTATION_COLUMN in df.columns else [])
+
+
+def detect_clock_drift(df, window=DRIFT_WINDOW, min_periods=DRIFT_MIN_PERIODS,
+                       median_threshold=DRIFT_MEDIAN_THRESHOLD, jump_threshold=DRIFT_JUMP_THRESHOLD, sessions=None):
+    """
+    사용자/워크스테이션별 드리프트, 급변, RecordID 세션 내 클라이언트 시간 역전을 탐지합니다.
+    원래 행 순서의 DataFrame(RollingOffset, Drift, Jump, OutOfOrder)을 반환합니다.
+    sessions는 record_sessions() 결과이며, 없으면 df만으로 세션을 나눕니다.
+    """
+    n = len(df)
+    server = _epoch_ns(df['TimeStamp(Server)'])
+    client = _epoch_ns(df['ActionTime(Client)'])
+    offset = df['ClockOffset'].to_numpy(dtype=float) if 'ClockOffset' in df.columns else (server - client) / 1e9
+
+    # 1) 사용자/워크스테이션별 시간순 정렬 후 이동 중앙값과 급변 탐지
+    codes = _group_codes(df, drift_group_keys(df))
+    order = np.lexsort((server, codes))
+    sorted_codes = codes[order]
+    rolling = (
+        pd.Series(offset[order])
+        .groupby(sorted_codes, sort=False)
+        .rolling(window, min_periods=min_periods)
+        .median()
+        .reset_index(level=0, drop=True)
+        .sort_index()
+        .to_numpy()
+    )
+    previous = np.empty(n)
+    previous[:1] = np.nan
+    previous[1:] = rolling[:-1]
+    previous[_sorted_group_starts(sorted_codes)] = np.nan
+
+    with np.errstate(invalid='ignore'):
+        drift_sorted = np.abs(rolling) > median_threshold
+        jump_sorted = np.abs(offset[order] - previous) > jump_threshold
+
+    # 2) RecordID 세션별 서버 시간순으로 직전 이벤트와 비교하여 클라이언트 시간 역전 탐지
+    sessions = record_sessions(df, {}) if sessions is None else sessions
+
+    result = pd.DataFrame(index=df.index)
+    result['RollingOffset'] = np.empty(n)
+    result['Drift'] = np.zeros(n, dtype=bool)
+    result['Jump'] = np.zeros(n, dtype=bool)
+    result['OutOfOrder'] = np.zeros(n, dtype=bool)
+    result.iloc[order, 0] = rolling
+    result.iloc[order, 1] = drift_sorted
+    result.iloc[order, 2] = jump_sorted
+    result.iloc[sessions["order"], 3] = sessions["out_of_order"]
+    return result
+
+
+def _drift_options(options):
+    return {
+        "window": options.get('drift_window', DRIFT_WINDOW),
+        "min_periods": options.get('drift_min_periods', DRIFT_MIN_PERIODS),
+        "median_threshold": options.get('drift_median_threshold', DRIFT_MEDIAN_THRESHOLD),
+        "jump_threshold": options.get('drift_jump_threshold', DRIFT_JUMP_THRESHOLD),
+    }
+
+
+def _carry_clock_drift(df, options):
+    """
+    다음 청크 평가에 필요한 사용자별 최근 window건의 인덱스 라벨입니다.
+    RecordID별 직전 클라이언트 시각은 행 대신 압축 상태(record state)로 넘깁니다.
+    """
+    ordered = df.sort_values('TimeStamp(Server)', kind='stable')
+    window = _drift_options(options)["window"]
+    return ordered.groupby(drift_group_keys(df), observed=True, sort=False, dropna=False).tail(window).index
+
+
+@register_rule('CLOCK_DRIFT', 'Contemporaneous', 'DI_Contemporaneous',
+               '사용자/워크스테이션별 시계 드리프트·급변 또는 RecordID 내 클라이언트 시간 역전',
+               carry=_carry_clock_drift)
+def _rule_clock_drift(df, options):
+    flags = detect_clock_drift(df, **_drift_options(options), sessions=_record_sessions(df, options))
+    return (flags['Drift'] | flags['Jump'] | flags['OutOfOrder']).to_numpy()
+
+
+def clock_drift_summary(df):
+    """
+    사용자/워크스테이션별 ClockOffset 집계(합산 가능한 형태)를 반환합니다.
+    청크별 결과는 merge_drift_summaries()로 합칩니다.
+    """
+    keys = drift_group_keys(df)
+    drift_bit = next(rule["bit"] for rule in DI_RULES if rule["id"] == 'CLOCK_DRIFT')
+    frame = df[keys].assign(
+        events=1,
+        offset_sum=df['ClockOffset'],
+        max_abs_offset=df['TimeDifference'],
+        drift_rows=(df[MASK_COLUMN].to_numpy() & (1 << drift_bit)) != 0,
+    )
+    return frame.groupby(keys, observed=True, dropna=False).agg(
+        events=('events', 'sum'),
+        offset_sum=('offset_sum', 'sum'),
+        max_abs_offset=('max_abs_offset', 'max'),
+        drift_rows=('drift_rows', 'sum'),
+    ).reset_index()
+
+
+def combine_drift_partials(summaries):
+    """
+    clock_drift_summary() 부분 집계들을 같은 형식의 부분 집계 하나로 합칩니다 (없으면 None).
+    """
+    summaries = [summary for summary in summaries if not summary.empty]
+    if not summaries:
+        return None
+    merged = pd.concat(summaries, ignore_index=True)
+    keys = [col for col in merged.columns if col not in ('events', 'offset_sum', 'max_abs_offset', 'drift_rows')]
+    return merged.groupby(keys, observed=True, dropna=False, as_index=False).agg(
+        events=('events', 'sum'),
+        offset_sum=('offset_sum', 'sum'),
+        max_abs_offset=('max_abs_offset', 'max'),
+        drift_rows=('drift_rows', 'sum'),
+    )
+
+
+def merge_drift_summaries(summaries):
+    """
+    부분 집계를 합치고 평균 편차(mean_offset)를 계산하여 드리프트 행 수 순으로 정렬합니다.
+    """
+    merged = combine_drift_partials(summaries)
+    if merged is None:
+        return pd.DataFrame(columns=['UserID', 'events', 'mean_offset', 'max_abs_offset', 'drift_rows'])
+    keys = [col for col in merged.columns if col not in ('events', 'offset_sum', 'max_abs_offset', 'drift_rows')]
+    merged['mean_offset'] = merged['offset_sum'] / merged['events']
+    return (
+        merged[keys + ['events', 'mean_offset', 'max_abs_offset', 'drift_rows']]
+        .sort_values('drift_rows', ascending=False, kind='stable')
+        .reset_index(drop=True)
+    )
+
+
+# ==============================================================================
+# RecordID별 이벤트 시퀀스 탐지 (Pre-Injection / Aborted Run)
+# ==============================================================================
+# record_sessions()가 나눈 RecordID 세션 안에서 이벤트 순서를 비교합니다.
+#  - PRE_INJECTION: 세션의 첫 공식 분석 시작(RUN_START) 이전에 수행된 RAW_DATA_PROCESS/ABORT
+#    (재분석으로 RUN_START가 다시 기록되어도 첫 분석의 처리 이력은 위반이 아님)
+#  - ABORT_UNPRESERVED: ABORT 이후 같은 세션에 원본 데이터 보존 이벤트가 없음
+# 두 규칙 모두 이후 이벤트에 따라 판정이 바뀌므로 lookahead 규칙입니다. 스트리밍 분석에서는
+# 세션이 활성 상태인 동안만 판정 보류 행을 다음 청크로 넘기고, 세션이 끝나면(유휴 기간 초과) 현재 판정으로 확정합니다.
+# 첫 RUN_START 이후의 PRE_RUN 행은 압축 상태의 run_start로 바로 확정되므로 넘기지 않습니다.
+
+SEQUENCE_START_ACTIONS = ['RUN_START']
+PRE_RUN_ACTIONS = ['RAW_DATA_PROCESS', 'ABORT']
+ABORT_ACTIONS = ['ABORT']
+PRESERVATION_ACTIONS = ['PRESERVE', 'ARCHIVE']
+
+
+def _sorted_actions(df, sessions, actions):
+    return df['ActionType'].isin(actions).to_numpy()[sessions["order"]]
+
+
+def _scatter(df, sessions, sorted_flags):
+    # 정렬 순서 기준 bool 배열을 원래 행 순서로 되돌립니다 (세션에 참여하지 않은 행은 False).
+    flags = np.zeros(len(df), dtype=bool)
+    flags[sessions["order"]] = sorted_flags
+    return flags
+
+
+def _pre_injection_flags(df, sessions):
+    # (위반, 판정 보류) 정렬 순서 기준
+    pre_run = _sorted_actions(df, sessions, PRE_RUN_ACTIONS)
+    run_start = sessions["run_start"][sessions["session"]]
+    started = run_start != NO_TIME
+    flagged = pre_run & started & (sessions["server"] < run_start)
+    pending = pre_run & ~started & sessions["active"][sessions["session"]]
+    return flagged, pending
+
+
+def _abort_unpreserved_flags(df, sessions):
+    is_preserved = _sorted_actions(df, sessions, PRESERVATION_ACTIONS)
+    last_preserved = np.maximum.reduceat(np.where(is_preserved, sessions["server"], NO_TIME), sessions["session_starts"])
+    flagged = _sorted_actions(df, sessions, ABORT_ACTIONS) & ~(last_preserved[sessions["session"]] > sessions["server"])
+    return flagged, flagged & sessions["active"][sessions["session"]]
+
+
+def _carry_pre_injection(df, options):
+    """
+    활성 세션에서 아직 RUN_START가 없는 PRE_RUN 행(판정 보류)을 넘깁니다.
+    """
+    sessions = _record_sessions(df, options)
+    _, pending = _pre_injection_flags(df, sessions)
+    return df.index[_scatter(df, sessions, pending)]
+
+
+def _carry_abort_unpreserved(df, options):
+    """
+    활성 세션에서 아직 보존 이벤트가 뒤따르지 않은 ABORT 행(판정 보류)을 넘깁니다.
+    """
+    sessions = _record_sessions(df, options)
+    _, pending = _abort_unpreserved_flags(df, sessions)
+    return df.index[_scatter(df, sessions, pending)]
+
+
+@register_rule('PRE_INJECTION', 'Complete', '21_CFR_211_194_A',
+               '같은 RecordID의 공식 분석 시작(RUN_START) 전에 RAW_DATA_PROCESS/ABORT 수행 (Pre-Injection)',
+               carry=_carry_pre_injection, lookahead=True)
+def _rule_pre_injection(df, options):
+    sessions = _record_sessions(df, options)
+    return _scatter(df, sessions, _pre_injection_flags(df, sessions)[0])
+
+
+@register_rule('ABORT_UNPRESERVED', 'Complete', '21_CFR_211_194_A',
+               'ABORT 이후 같은 RecordID에 원본 데이터 보존(PRESERVE/ARCHIVE) 이벤트 없음',
+               carry=_carry_abort_unpreserved, lookahead=True)
+def _rule_abort_unpreserved(df, options):
+    sessions = _record_sessions(df, options)
+    return _scatter(df, sessions, _abort_unpreserved_flags(df, sessions)[0])
+
+
+# ==============================================================================
+# 변경 사유(Reason for Change) 품질 분석 (상투적 사유 재사용 / 유사 사유 묶음)
+# ==============================================================================
+# REASON_MISSING 규칙은 빈 사유만 찾습니다. 실제 지적 사항은 한 사용자가 "Minor correction",
+# "Emergency Fix" 같은 상투적 사유를 수백 건의 변경에 반복 사용하는 경우이므로 로그 전체 단위로 집계합니다.
+#  - 정규화: 유니코드(NFKC) 정규화, 소문자, 구두점/공백 정리 (고유 사유에 대해서만 수행)
+#  - 유사 사유 묶음: 문자 3-gram MinHash 서명 + LSH 밴드 버킷으로 후보만 비교 (전체 쌍 비교 없음)
+#    사유에 포함된 숫자(로그북 쪽수, SOP 번호 등)가 다르면 서로 다른 사유로 봅니다.
+#  - 재사용 집계: 사용자 × 사유 묶음별 사용 건수, RecordID 수, 한 RecordID에서의 최대 반복 수, 사용자 변경 건수 대비 비중
+#    (RecordID 수는 RecordID 세션 단위이며, 한 세션에서 같은 묶음의 여러 변형을 쓰면 변형마다 셉니다.
+#     최대 반복 수는 변형별 최댓값입니다.)
+#  - 상투적 사유 판단: 사용 건수와 비중이 기준 이상이면서, 같은 묶음을 쓰는 사용자들의 중앙값 비중보다 크게 높은 경우
+#    (QA의 'Released by QA'처럼 역할상 모두가 비슷하게 쓰는 표준 문구는 개인 습관으로 보지 않습니다)
+# 부분 집계는 (사용자, 사유)별 uses/records/max_record_uses로 드리프트 집계와 같이 합산 가능합니다.
+# 스트리밍 분석은 활성 RecordID 세션의 (사용자, 사유)별 누적 건수만 state["reason_records"]에 두고
+# 세션이 끝나면(새 세션 시작, 유휴 기간 초과) 지우므로, 상태 크기는 로그 크기가 아닌 활성 RecordID 수에 비례합니다.
+# 청크마다 늘어난 건수만 부분 집계로 내보내며, 세션의 건수는 늘기만 하므로 max_record_uses는 누적 건수의 최댓값과 같습니다.
+# 전체 분석도 같은 RecordID 세션 단위로 집계하므로 전체/스트리밍/tail 분석 결과가 같습니다.
+
+REASON_SHINGLE_SIZE = 3
+REASON_MINHASH_PERMUTATIONS = 64
+REASON_LSH_BANDS = 16  # 16밴드 × 4행: 추정 Jaccard 0.5 부근부터 후보가 될 확률이 급격히 높아짐
+REASON_SIMILARITY_THRESHOLD = 0.65  # 후보 중 MinHash 추정 Jaccard가 이 값 이상이면 같은 사유 묶음
+REASON_REUSE_MIN_USES = 20  # 상투적 사유로 판단할 최소 사용 건수
+REASON_REUSE_MIN_SHARE = 0.15  # 상투적 사유로 판단할 사용자 변경 건수 대비 최소 비중
+REASON_REUSE_MIN_LIFT = 3.0  # 같은 묶음을 쓰는 사용자들의 중앙값 비중 대비 최소 배수
+REASON_SUMMARY_COLUMNS = ['UserID', 'Reason', 'variants', 'uses', 'records', 'max_record_uses', 'share',
+                          'typical_share', 'users', 'Boilerplate']
+
+# 해시 함수 k: (a_k * shingle + b_k) mod 2^64의 상위 32비트 (a_k는 홀수)
+_MINHASH_SEEDS = np.random.default_rng(20240611).integers(1, 2 ** 63, (REASON_MINHASH_PERMUTATIONS, 2), dtype=np.uint64)
+_MINHASH_SEEDS[:, 0] |= np.uint64(1)
+
+
+def normalize_reasons(values):
+    """
+    사유 문자열을 비교용으로 정규화합니다 (NFKC, 소문자, 구두점 → 공백, 공백 압축).
+    """
+    text = pd.Series(values, dtype=object).astype(str)
+    return (
+        text.str.normalize('NFKC').str.lower()
+        .str.replace(r'[^\w]+|_', ' ', regex=True)
+        .str.replace(r'\s+', ' ', regex=True)
+        .str.strip()
+    )
+
+
+def _mix64(values):
+    # splitmix64 finalizer (uint64 곱셈은 2^64에서 순환)
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xBF58476D1CE4E5B9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def minhash_signatures(texts, shingle_size=REASON_SHINGLE_SIZE, seeds=_MINHASH_SEEDS):
+    """
+    텍스트별 문자 shingle 집합의 MinHash 서명(텍스트 수 × 해시 수, uint64)을 계산합니다.
+    모든 텍스트의 shingle 해시를 한 배열로 이어 붙여, 해시 함수마다 곱셈-시프트 해시를 제자리 연산으로 계산하고
+    np.minimum.reduceat으로 텍스트별 최솟값을 구합니다.
+    """
+    padded = [f' {text} ' for text in texts]
+    if not padded:
+        return np.empty((0, len(seeds)), dtype=np.uint64)
+    chars = np.frombuffer(''.join(padded).encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+    lengths = np.fromiter(map(len, padded), dtype=np.int64, count=len(padded))
+    ends = np.cumsum(lengths)
+    counts = np.maximum(lengths - shingle_size + 1, 1)  # shingle보다 짧은 텍스트도 shingle 하나
+    first = np.cumsum(counts) - counts
+    owner = np.repeat(np.arange(len(padded)), counts)
+    positions = (ends - lengths)[owner] + np.arange(counts.sum()) - first[owner]
+    shingles = np.zeros(len(positions), dtype=np.uint64)
+    for offset in range(shingle_size):
+        index = positions + offset
+        inside = index < ends[owner]
+        shingles = _mix64(shingles * np.uint64(0x100000001B3) + np.where(inside, chars[np.minimum(index, len(chars) - 1)], 0))
+    signatures = np.empty((len(padded), len(seeds)), dtype=np.uint64)
+    hashed = np.empty_like(shingles)
+    for k, (multiplier, increment) in enumerate(seeds):
+        np.multiply(shingles, multiplier, out=hashed)
+        hashed += increment
+        hashed >>= np.uint64(32)
+        signatures[:, k] = np.minimum.reduceat(hashed, first)
+    return signatures
+
+
+def _connected_labels(n, left, right):
+    # 간선으로 연결된 원소들에 가장 작은 인덱스를 라벨로 붙입니다 (최솟값 전파 + 포인터 점프).
+    labels = np.arange(n)
+    while len(left):
+        smallest = np.minimum(labels[left], labels[right])
+        updated = labels.copy()
+        np.minimum.at(updated, left, smallest)
+        np.minimum.at(updated, right, smallest)
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            break
+        labels = updated
+    return labels
+
+
+def near_duplicate_groups(texts, bands=REASON_LSH_BANDS, threshold=REASON_SIMILARITY_THRESHOLD):
+    """
+    정규화된 고유 사유 목록을 유사 사유 묶음으로 나누어 텍스트별 묶음 번호(대표 텍스트의 인덱스)를 반환합니다.
+    LSH 밴드마다 서명 조각(+ 숫자 토큰)이 같은 텍스트만 한 버킷에 모이며, 버킷의 첫 텍스트와
+    추정 Jaccard가 threshold 이상인 경우에만 같은 묶음으로 연결합니다.
+    """
+    texts = list(texts)
+    signatures = minhash_signatures(texts)
+    n, permutations = signatures.shape
+    rows = permutations // bands
+    numbers = pd.factorize(pd.Series(texts, dtype=object).str.findall(r'\d+').str.join(' '))[0].astype(np.uint64)
+    left, right = [], []
+    for band in range(bands):
+        keys = np.column_stack([signatures[:, band * rows:(band + 1) * rows], numbers])
+        keys = np.ascontiguousarray(keys).view(np.dtype((np.void, keys.dtype.itemsize * keys.shape[1]))).ravel()
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        leader = first[inverse]
+        candidates = np.flatnonzero(leader != np.arange(n))
+        similarity = (signatures[candidates] == signatures[leader[candidates]]).mean(axis=1)
+        accepted = candidates[similarity >= threshold]
+        left.append(accepted)
+        right.append(leader[accepted])
+    return _connected_labels(n, np.concatenate(left) if left else np.array([], dtype=np.int64),
+                             np.concatenate(right) if right else np.array([], dtype=np.int64))
+
+
+REASON_KEYS = ['UserID', 'ReasonForChange']
+REASON_PARTIAL_COLUMNS = REASON_KEYS + ['uses', 'records', 'max_record_uses']
+
+
+def reason_session_counts(df, sessions):
+    """
+    새 행 중 사유가 있는 변경 행의 (세션 번호, UserID, 사유)별 건수를 반환합니다 (sessions는 record_sessions() 결과).
+    """
+    session = np.full(len(df), -1)
+    session[sessions["order"]] = sessions["session"]
+    rows = np.flatnonzero(
+        (np.arange(len(df)) >= sessions["context_rows"])
+        & df['ActionType'].isin(REASON_REQUIRED_ACTIONS).to_numpy() & ~_reason_missing(df)
+    )
+    counts = (
+        df.iloc[rows][REASON_KEYS].astype('category').assign(session=session[rows])
+        .groupby(['session'] + REASON_KEYS, observed=True, sort=False).size()
+        .rename('uses').reset_index()
+    )
+    return counts.astype({key: object for key in REASON_KEYS})
+
+
+def reason_usage_partial(df, sessions=None):
+    """
+    로그 전체(df)의 변경 사유 부분 집계((UserID, 사유)별 uses, records, max_record_uses)를 반환합니다.
+    RecordID 세션 단위로 집계하며, 청크별 결과는 reason_quality_summary()로 합칩니다.
+    """
+    sessions = record_sessions(df, {}) if sessions is None else sessions
+    return reason_session_counts(df, sessions).groupby(REASON_KEYS, sort=False, as_index=False).agg(
+        uses=('uses', 'sum'), records=('uses', 'size'), max_record_uses=('uses', 'max'),
+    )
+
+
+def advance_reason_records(active, df, sessions, expired):
+    """
+    청크의 변경 사유 건수를 활성 세션의 누적 건수(active: RecordID → {(UserID, 사유): 건수})에 더하고,
+    이 청크에서 늘어난 만큼의 부분 집계를 반환합니다. active는 제자리에서 갱신되며,
+    끝난 세션(새 세션 시작, 유휴 기간 초과)과 상태에서 제거된 RecordID(expired)의 건수는 지웁니다.
+    """
+    counts = reason_session_counts(df, sessions)
+    session_records = sessions["records"][sessions["session_record"]]
+    continues = sessions["continues"]
+    still_open = sessions["active"]
+    opened = {}
+    rows = []
+    for session, user, reason, uses in zip(counts['session'].to_numpy(), counts['UserID'].to_numpy(),
+                                           counts['ReasonForChange'].to_numpy(), counts['uses'].to_numpy()):
+        entries = opened.get(session)
+        if entries is None:
+            # 압축 상태의 세션을 이어받는 세션은 기존 누적 건수에 더합니다.
+            record = session_records[session]
+            entries = active.setdefault(record, {}) if continues[session] else {}
+            opened[session] = entries
+        key = (user, reason)
+        before = entries.get(key, 0)
+        entries[key] = before + int(uses)
+        rows.append((user, reason, int(uses), int(before == 0), before + int(uses)))
+
+    first = _sorted_group_starts(sessions["session_record"])
+    for record in session_records[(first & ~continues) | (continues & ~still_open)]:
+        active.pop(record, None)
+    for record in expired:
+        active.pop(record, None)
+    for session, entries in opened.items():
+        if still_open[session] and not continues[session]:
+            active[session_records[session]] = entries
+
+    partial = pd.DataFrame(rows, columns=REASON_PARTIAL_COLUMNS)
+    return combine_reason_partials([partial]) if rows else partial
+
+
+def combine_reason_partials(partials):
+    """
+    reason_usage_partial() 부분 집계들을 같은 형식의 부분 집계 하나로 합칩니다 (없으면 None).
+    """
+    partials = [partial for partial in partials if not partial.empty]
+    if not partials:
+        return None
+    merged = pd.concat(partials, ignore_index=True)
+    return merged.groupby(REASON_KEYS, sort=False, as_index=False).agg(
+        uses=('uses', 'sum'), records=('records', 'sum'), max_record_uses=('max_record_uses', 'max'),
+    )
+
+
+def reason_quality_summary(partials):
+    """
+    부분 집계를 합쳐 사용자 × 유사 사유 묶음별 재사용 현황을 반환합니다 (상투적 사유 판단 결과 포함).
+    2건 이상 사용된 묶음만 담으며, 상투적 사유(Boilerplate)와 사용 건수 순으로 정렬합니다.
+    """
+    merged = combine_reason_partials(partials)
+    if merged is None:
+        return pd.DataFrame(columns=REASON_SUMMARY_COLUMNS)
+
+    # 정규화와 유사 사유 묶음은 고유 사유에 대해서만 계산하여 행 수와 무관하게 만듭니다.
+    raw_codes, raw_reasons = pd.factorize(merged['ReasonForChange'].astype(object))
+    norm_codes, norm_reasons = pd.factorize(normalize_reasons(raw_reasons))
+    groups = near_duplicate_groups(norm_reasons)[norm_codes]
+    usage = pd.DataFrame({
+        'UserID': merged['UserID'].astype(object).to_numpy(),
+        'group': groups[raw_codes],
+        'variant': norm_codes[raw_codes],
+        'uses': merged['uses'].to_numpy(),
+        'records': merged['records'].to_numpy(),
+        'max_record_uses': merged['max_record_uses'].to_numpy(),
+    })
+
+    # 묶음의 대표 사유: 로그 전체에서 가장 많이 사용된 원문
+    raw_uses = np.bincount(raw_codes, weights=merged['uses'].to_numpy(), minlength=len(raw_reasons))
+    order = np.lexsort((-raw_uses, groups))
+    representative = pd.Series(np.asarray(raw_reasons, dtype=object)[order], index=groups[order])
+    representative = representative[~representative.index.duplicated()]
+
+    by_user_group = usage.groupby(['UserID', 'group'], sort=False)
+    summary = by_user_group.agg(uses=('uses', 'sum'), records=('records', 'sum'), max_record_uses=('max_record_uses', 'max'))
+    summary['variants'] = by_user_group['variant'].nunique()
+    user_uses = summary.groupby(level='UserID')['uses'].transform('sum')
+    summary['share'] = summary['uses'] / user_uses
+    by_group = summary.groupby(level='group')['share']
+    summary['typical_share'] = by_group.transform('median')
+    summary['users'] = by_group.transform('size')
+    summary = summary.reset_index()
+    summary['Reason'] = representative.reindex(summary['group']).to_numpy()
+    summary['Boilerplate'] = (
+        (summary['uses'] >= REASON_REUSE_MIN_USES)
+        & (summary['share'] >= REASON_REUSE_MIN_SHARE)
+        & (summary['share'] >= REASON_REUSE_MIN_LIFT * summary['typical_share'])
+    )
+    summary = summary[summary['uses'] >= 2].astype({'UserID': str, 'Reason': str})
+    # 부분 집계 순서와 무관하게 같은 결과가 되도록 사용자/사유로 동순위를 정렬합니다.
+    return (
+        summary.sort_values(['Boilerplate', 'uses', 'UserID', 'Reason'], ascending=[False, False, True, True])
+        [REASON_SUMMARY_COLUMNS].reset_index(drop=True)
+    )
+
+
+def format_for_display(df):
+    """
+    렌더링 직전에 (현재 페이지 등) 일부 행만 화면 표시용으로 변환합니다.
+    타임스탬프를 문자열로 포맷하고 탐지 규칙 컬럼을 채웁니다.
+    """
+    df_display = df.copy()
+    for col in TIMESTAMP_COLUMNS:
+        df_display[col] = df_display[col].dt.strftime(DISPLAY_TIME_FORMAT)
+    if MASK_COLUMN in df_display.columns:
+        df_display[RULES_COLUMN] = describe_violations(df_display[MASK_COLUMN])
+    return df_display
+
+
+def user_id_options(df):
+    """
+    뷰어 필터에 사용할 UserID 목록을 정렬하여 반환합니다.
+    """
+    if df.empty:
+        return []
+    return sorted(str(user_id) for user_id in df['UserID'].dropna().unique())
+
+
+def analyze_audit_trail(df, **options):
+    """
+    DI 위반 가능성 행을 탐지하고 화면 표시용 데이터프레임을 준비합니다.
+    options(time_diff_threshold, drift_window, record_idle_seconds 등)는 각 규칙에 그대로 전달됩니다.
+    """
+    if df.empty:
+        return {"df": df, "error_indices": pd.Index([]), "rule_counts": {}, "user_ids": [],
+                "drift_summary": merge_drift_summaries([]), "reason_summary": reason_quality_summary([])}
+
+    add_derived_columns(df)
+    options = dict(options, record_sessions=record_sessions(df, options))
+    df[MASK_COLUMN] = evaluate_rules(df, **options)
+
+    error_indices = df.index[df[MASK_COLUMN].to_numpy() != 0]
+
+    return {
+        "df": df,
+        "error_indices": error_indices,
+        "rule_counts": rule_hit_counts(df[MASK_COLUMN]),
+        "user_ids": user_id_options(df),
+        "drift_summary": merge_drift_summaries([clock_drift_summary(df)]),
+        "reason_summary": reason_quality_summary([reason_usage_partial(df, options["record_sessions"])]),
+    }
+
+
+def filter_audit_rows(df, rule_ids=None, user_ids=None, record_query=None, violations_only=False):
+    """
+    뷰어 필터 조건에 맞는 행의 위치(정수 배열)를 반환합니다.
+    데이터를 복사하지 않으므로 호출 측에서 필요한 페이지만 iloc으로 잘라 사용합니다.
+    """
+    keep = np.ones(len(df), dtype=bool)
+    if MASK_COLUMN in df.columns:
+        mask = df[MASK_COLUMN].to_numpy()
+        if rule_ids:
+            bits = sum(1 << rule["bit"] for rule in DI_RULES if rule["id"] in rule_ids)
+            keep &= (mask & bits) != 0
+        elif violations_only:
+            keep &= mask != 0
+    if user_ids:
+        keep &= df['UserID'].isin(user_ids).to_numpy()
+    if record_query:
+        keep &= df['RecordID'].astype(STRING_DTYPE).str.contains(record_query, case=False, regex=False).to_numpy(dtype=bool, na_value=False)
+    return np.flatnonzero(keep)
+
+
+# ==============================================================================
+# 대용량 Audit Trail 스트리밍 분석
+# ==============================================================================
+# 파일 전체를 메모리에 올리지 않고 청크 단위로 읽어 규칙을 적용합니다.
+# 규칙별 집계와 위반 행만 유지하므로 메모리 사용량은 파일 크기가 아닌 위반 건수에 비례합니다.
+
+STREAMING_THRESHOLD_BYTES = 200 * 1024 * 1024  # 이 크기를 넘는 파일은 스트리밍 모드로 분석
+STREAMING_CHUNK_ROWS = 250_000
+
+
+def iter_audit_chunks(path=AUDIT_LOG_PATH, chunksize=STREAMING_CHUNK_ROWS, progress=None):
+    """
+    Audit Trail을 청크 단위로 읽어 타임스탬프를 변환한 DataFrame을 순서대로 반환합니다.
+    progress(rows_read, bytes_read, total_bytes) 콜백으로 진행 상황을 알립니다.
+    """
+    total_bytes = os.path.getsize(path)
+    rows_read = 0
+    with open(path, 'rb') as f:
+        for chunk in read_audit_csv(f, chunksize=chunksize):
+            apply_schema(chunk)
+            rows_read += len(chunk)
+            if progress is not None:
+                progress(rows_read, min(f.tell(), total_bytes), total_bytes)
+            yield chunk
+
+
+def concat_flagged(frames):
+    """
+    스키마가 적용된 위반 행 DataFrame들을 이어 붙입니다. category 컬럼은 가장 큰 세그먼트의 범주 뒤에
+    나머지 세그먼트에만 있는 범주를 덧붙여 작은 세그먼트의 코드만 다시 매기므로, 누적된 위반 행 전체를 다시 인코딩하지 않습니다.
+    """
+    frames = [frame for frame in frames if len(frame)]
+    if len(frames) <= 1:
+        return frames[0] if frames else pd.DataFrame()
+    base = max(range(len(frames)), key=lambda i: len(frames[i]))
+    frames = list(frames)
+    for col in CATEGORY_COLUMNS:
+        dtypes = [frame[col].dtype if col in frame.columns else None for frame in frames]
+        if not all(isinstance(dtype, pd.CategoricalDtype) for dtype in dtypes):
+            continue
+        categories = dtypes[base].categories
+        extra = [dtype.categories.difference(categories) for dtype in dtypes]
+        extra = [values for values in extra if len(values)]
+        if extra:
+            categories = categories.append(extra).unique()
+            frames[base] = frames[base].assign(**{col: frames[base][col].cat.add_categories(categories[len(dtypes[base].categories):])})
+        dtype = frames[base][col].dtype
+        for i, frame in enumerate(frames):
+            if i != base:
+                frames[i] = frame.assign(**{col: frame[col].cat.set_categories(dtype.categories)})
+    return pd.concat(frames)
+
+
+def _append_flagged(state, rows):
+    # 위반 행은 크기가 비슷한 세그먼트끼리 합쳐(size-tiered) 세그먼트 수와 행별 재복사 횟수를 로그 수준으로 유지합니다.
+    # 작은 청크가 계속 추가되는 tail 분석에서도 갱신 비용이 누적 위반 행 수에 비례하지 않습니다.
+    segments = state["flagged"]
+    segments.append(rows)
+    while len(segments) > 1 and len(segments[-2]) <= len(segments[-1]):
+        segments[-2:] = [concat_flagged(segments[-2:])]
+        # tail 상태: 합쳐진 세그먼트의 저장 파일은 다음 저장에서 새 파일로 대체합니다.
+        saved = state.get("flagged_files")
+        if saved is not None and len(saved) >= len(segments):
+            state["stale_files"].extend(saved[len(segments) - 1:])
+            del saved[len(segments) - 1:]
+
+
+def new_scan_state():
+    """
+    청크 단위 분석의 누적 상태(규칙별 집계, 위반 행, 드리프트/변경 사유 부분 집계, 컨텍스트 행,
+    RecordID별 압축 상태와 활성 RecordID의 변경 사유 건수)를 만듭니다.
+    """
+    return {
+        "rule_counts": {rule["id"]: 0 for rule in DI_RULES},
+        "flagged": [],
+        "drift_summaries": [],
+        "reason_partials": [],
+        "total_rows": 0,
+        "context": None,
+        "records": new_record_state(),
+        "reason_records": {},
+    }
+
+
+def _finalize_rows(state, rows):
+    # 더 이상 다음 청크로 넘기지 않는 행만 집계합니다 (각 행은 정확히 한 번 집계됨).
+    mask = rows[MASK_COLUMN].to_numpy()
+    for rule_id, count in rule_hit_counts(mask).items():
+        state["rule_counts"][rule_id] += count
+    state["drift_summaries"].append(clock_drift_summary(rows))
+    hits = mask != 0
+    if hits.any():
+        flagged = apply_schema(rows.loc[hits].copy())
+        for col in CATEGORY_COLUMNS:
+            if col in flagged.columns and isinstance(flagged[col].dtype, pd.CategoricalDtype):
+                flagged[col] = flagged[col].cat.remove_unused_categories()
+        _append_flagged(state, flagged)
+
+
+def scan_chunk(state, chunk, **options):
+    """
+    청크 하나에 DI 규칙을 적용하여 state를 갱신합니다.
+    이전 청크의 컨텍스트 행(carry)을 앞에 덧붙여 평가하고, 컨텍스트에서 빠지는 행만 집계합니다.
+    RecordID 단위 비교는 state["records"](RecordID별 압축 상태)를 이어받아 평가한 뒤 갱신합니다.
+    """
+    context = state["context"]
+    state["total_rows"] += len(chunk)
+    source_columns = list(chunk.columns)
+    if context is None:
+        frame = chunk
+    else:
+        # 새 행은 모든 규칙에 대해 판정이 열려 있는 상태로 시작합니다.
+        frame = pd.concat([context, chunk])
+        frame[OPEN_BITS_COLUMN] = frame[OPEN_BITS_COLUMN].fillna(np.iinfo(mask_dtype()).max).astype(mask_dtype())
+    add_derived_columns(frame)
+    options = dict(options, context_rows=0 if context is None else len(context), record_state=state["records"])
+    options["record_sessions"] = record_sessions(frame, options)
+    mask = evaluate_rules(frame, **options)
+    if context is not None:
+        # 컨텍스트 행: 판정 보류(open) 비트만 다시 판정하고 나머지는 처음 평가된 결과를 유지
+        settled = context[MASK_COLUMN].to_numpy().astype(mask.dtype)
+        open_bits = context[OPEN_BITS_COLUMN].to_numpy().astype(mask.dtype)
+        mask[:len(context)] = (settled & ~open_bits) | (mask[:len(context)] & open_bits)
+    frame[MASK_COLUMN] = mask
+    state["records"], expired = update_record_state(options["record_sessions"])
+    state["reason_partials"].append(
+        advance_reason_records(state["reason_records"], frame, options["record_sessions"], expired)
+    )
+
+    carried = carry_context(frame, **options)
+    if carried is None:
+        _finalize_rows(state, frame)
+        return state
+    _finalize_rows(state, frame.loc[~frame.index.isin(carried.index)].drop(columns=[OPEN_BITS_COLUMN], errors='ignore'))
+    state["context"] = carried[source_columns + [MASK_COLUMN, OPEN_BITS_COLUMN]].copy()
+    return state
+
+
+def _context_rows(context):
+    rows = context.drop(columns=[OPEN_BITS_COLUMN])
+    add_derived_columns(rows)
+    return rows
+
+
+def scan_result(state, provisional=False):
+    """
+    누적 상태를 analyze_audit_trail()과 같은 형식의 결과로 변환합니다.
+    provisional=True이면 아직 컨텍스트에 남아 있는 행을 현재 판정 기준으로 포함하되 state는 바꾸지 않습니다.
+    (변경 사유 부분 집계는 행이 들어올 때 이미 반영되어 있습니다.)
+    """
+    rule_counts = dict(state["rule_counts"])
+    flagged = list(state["flagged"])
+    drift_summaries = list(state["drift_summaries"])
+    reason_partials = list(state["reason_partials"])
+    context = state["context"]
+    if provisional and context is not None and not context.empty:
+        rows = _context_rows(context)
+        mask = rows[MASK_COLUMN].to_numpy()
+        for rule_id, count in rule_hit_counts(mask).items():
+            rule_counts[rule_id] += count
+        drift_summaries.append(clock_drift_summary(rows))
+        if (mask != 0).any():
+            flagged.append(apply_schema(rows.loc[mask != 0].copy()))
+
+    # 컨텍스트에 머물렀던 행은 나중에 집계되므로 행 번호 순으로 다시 정렬합니다.
+    df = apply_schema(concat_flagged(flagged)) if flagged else pd.DataFrame()
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index()
+
+    return {
+        "df": df,
+        "error_indices": df.index,
+        "rule_counts": rule_counts,
+        "user_ids": user_id_options(df),
+        "drift_summary": merge_drift_summaries(drift_summaries),
+        "reason_summary": reason_quality_summary(reason_partials),
+        "total_rows": state["total_rows"],
+        "streamed": True,
+    }
+
+
+def scan_audit_trail(path=AUDIT_LOG_PATH, chunksize=STREAMING_CHUNK_ROWS, progress=None, **options):
+    """
+    청크 단위로 DI 규칙을 적용하여 규칙별 집계와 위반 행만 반환합니다.
+    반환 형식은 analyze_audit_trail()과 같으며, df에는 위반 행만 원래 행 번호로 담깁니다.
+    그룹/순서 기반 규칙을 위해 이전 청크의 컨텍스트 행(carry)을 앞에 덧붙여 평가하며,
+    각 행은 컨텍스트에서 빠지는 시점에 한 번만 집계됩니다.
+    """
+    state = new_scan_state()
+    for chunk in iter_audit_chunks(path, chunksize=chunksize, progress=progress):
+        scan_chunk(state, chunk, **options)
+    return finish_scan(state)
+
+
+def finish_scan(state):
+    """
+    입력이 끝났을 때 컨텍스트에 남은 행을 현재 판정으로 확정하여 집계하고 최종 결과를 반환합니다.
+    """
+    if state["context"] is not None and not state["context"].empty:
+        _finalize_rows(state, _context_rows(state["context"]))
+        state["context"] = None
+    state["reason_records"] = {}
+    return scan_result(state)
+
+
+# ==============================================================================
+# Append-only Audit Trail 증분(tail) 분석
+# ==============================================================================
+# 운영 중인 Audit Trail은 끝에 행이 계속 추가되므로, 마지막으로 읽은 바이트 오프셋과
+# 스트리밍 분석 상태(사용자별 드리프트 윈도우, RecordID별 열린 시퀀스 등 컨텍스트 행과 RecordID별 압축 상태)를 보관하고
+# 새로 추가된 완결된 행만 읽어 scan_chunk()로 이어서 평가합니다.
+# 컨텍스트, RecordID별 상태, 부분 집계는 로그 크기와 무관하게 제한되므로 갱신 비용은 새 행 수에 비례합니다.
+# 로그 크기에 비례하는 위반 행은 세그먼트 단위로 한 번만 파일에 쓰고(append-only), 상태 파일에는
+# 세그먼트 파일 이름만 기록하여 저장할 때마다 전체 이력을 다시 쓰지 않습니다.
+
+TAIL_STATE_SUFFIX = '.tailstate.pkl'
+TAIL_SEGMENT_SUFFIX = '.seg'
+TAIL_STATE_VERSION = 5
+TAIL_READ_BYTES = STREAMING_CHUNK_ROWS * 110  # 한 번에 읽는 최대 크기 (행당 약 110바이트 기준 스트리밍 청크 하나)
+
+
+def new_tail_state(path=AUDIT_LOG_PATH):
+    """
+    파일 처음부터 분석을 시작하는 tail 상태를 만듭니다.
+    """
+    state = new_scan_state()
+    state.update({
+        "version": TAIL_STATE_VERSION,
+        "path": os.path.abspath(path),
+        "rules": rule_set_version(),  # 규칙 구성이나 판정 기준값이 바뀌면 저장된 상태를 다시 사용하지 않음
+        "inode": None,
+        "offset": 0,
+        "columns": None,
+        "new_rows": 0,
+        "pending_bytes": 0,  # 아직 읽지 않은 바이트 (처음 켰을 때 기존 로그를 여러 번에 나누어 따라잡는 중)
+        "flagged_files": [],  # 저장된 위반 행 세그먼트 파일 (state["flagged"] 앞부분과 순서대로 대응)
+        "stale_files": [],  # 세그먼트가 합쳐져 다음 저장 후 지울 파일
+        "segment_serial": 0,
+    })
+    return state
+
+
+def tail_state_path(path=AUDIT_LOG_PATH):
+    return path + TAIL_STATE_SUFFIX
+
+
+def save_tail_state(state, state_path=None):
+    """
+    tail 상태를 파일로 저장하여 앱을 다시 시작해도 이어서 분석할 수 있게 합니다.
+    아직 저장되지 않은 위반 행 세그먼트만 새 파일로 쓰고, 상태 파일에는 나머지(제한된 크기의) 상태를 씁니다.
+    """
+    state_path = state_path or tail_state_path(state["path"])
+    directory = os.path.dirname(os.path.abspath(state_path))
+    saved = state["flagged_files"]
+    for segment in state["flagged"][len(saved):]:
+        name = f'{os.path.basename(state_path)}.{state["segment_serial"]}{TAIL_SEGMENT_SUFFIX}'
+        state["segment_serial"] += 1
+        pd.to_pickle(segment, os.path.join(directory, name))
+        saved.append(name)
+
+    tmp_path = state_path + '.tmp'
+    pd.to_pickle({**state, "flagged": None}, tmp_path)
+    os.replace(tmp_path, state_path)
+    # 새 상태 파일이 기록된 뒤에만 합쳐진 세그먼트의 파일을 지웁니다.
+    for name in state["stale_files"]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+    state["stale_files"] = []
+
+
+def load_tail_state(path=AUDIT_LOG_PATH, state_path=None):
+    """
+    저장된 tail 상태와 위반 행 세그먼트 파일을 읽습니다.
+    없거나 다른 파일/규칙 구성/버전의 상태이거나 세그먼트 파일이 없으면 None을 반환합니다.
+    """
+    state_path = state_path or tail_state_path(path)
+    directory = os.path.dirname(os.path.abspath(state_path))
+    try:
+        state = pd.read_pickle(state_path)
+        if (not isinstance(state, dict) or state.get("version") != TAIL_STATE_VERSION
+                or state.get("path") != os.path.abspath(path) or state.get("rules") != rule_set_version()):
+            return None
+        state["flagged"] = [pd.read_pickle(os.path.join(directory, name)) for name in state["flagged_files"]]
+    except (FileNotFoundError, EOFError, ValueError):
+        return None
+    return state
+
+
+def tail_audit_trail(state, max_bytes=TAIL_READ_BYTES, **options):
+    """
+    마지막 오프셋 이후에 추가된 완결된 행(줄바꿈으로 끝난 행)만 읽어 state를 갱신하고 새 행 수를 반환합니다.
+    파일이 교체되었거나(inode 변경) 오프셋보다 작아졌으면(truncate) 처음부터 다시 분석합니다.
+    한 번에 약 max_bytes만 읽으므로(None이면 제한 없음) 큰 로그에서 처음 켜면 여러 번의 호출에 나누어 따라잡으며,
+    남은 양은 state["pending_bytes"]에 기록합니다.
+    """
+    stat = os.stat(state["path"])
+    if state["inode"] != stat.st_ino or stat.st_size < state["offset"]:
+        stale = state["stale_files"] + state["flagged_files"]
+        state.update(new_tail_state(state["path"]), stale_files=stale)
+        state["inode"] = stat.st_ino
+
+    state["new_rows"] = 0
+    state["pending_bytes"] = stat.st_size - state["offset"]
+    if stat.st_size == state["offset"]:
+        return 0
+
+    with open(state["path"], 'rb') as f:
+        f.seek(state["offset"])
+        if state["columns"] is None:
+            header = f.readline()
+            if not header.endswith(b'\n'):
+                return 0
+            state["columns"] = pd.read_csv(io.BytesIO(header), nrows=0).columns.tolist()
+            state["offset"] = f.tell()
+        data = f.read(max_bytes) if max_bytes else f.read()
+        if max_bytes and len(data) == max_bytes and not data.endswith(b'\n'):
+            # 읽기 한도가 행 중간에서 끝나면 그 행의 나머지까지 읽습니다 (한도보다 긴 행도 진행됨).
+            data += f.readline()
+
+    # 아직 기록 중인 마지막 줄(줄바꿈 없음)은 다음 갱신에서 읽습니다.
+    complete = data.rfind(b'\n') + 1
+    if complete == 0:
+        return 0
+    data = data[:complete]
+    if not data.strip():
+        state["offset"] += complete
+        return 0
+
+    chunk = read_audit_csv(io.BytesIO(data), header=None, names=state["columns"])
+    if chunk.empty:
+        state["offset"] += complete
+        return 0
+    apply_schema(chunk)
+    chunk.index = pd.RangeIndex(state["total_rows"], state["total_rows"] + len(chunk))
+    scan_chunk(state, chunk, **options)
+
+    # 부분 집계가 갱신마다 쌓이지 않도록 하나로 합쳐 둡니다 (위반 행은 _append_flagged()가 세그먼트로 관리).
+    combined = combine_drift_partials(state["drift_summaries"])
+    state["drift_summaries"] = [] if combined is None else [combined]
+    combined = combine_reason_partials(state["reason_partials"])
+    state["reason_partials"] = [] if combined is None else [combined]
+    state["offset"] += complete
+    state["pending_bytes"] = stat.st_size - state["offset"]
+    state["new_rows"] = len(chunk)
+    return len(chunk)
+
+
+# ==============================================================================
+# 분석 결과 영속 저장소 (content-addressed Arrow 파일)
+# ==============================================================================
+# 분석 결과(스키마 dtype의 Audit Trail 프레임 + 행별 ViolationMask + 규칙 메타데이터)를
+# 원본 파일 내용 해시와 규칙 구성 버전을 키로 하는 디렉터리에 압축 없는 Arrow IPC 파일로 저장합니다.
+# 다시 열 때는 파일을 메모리 맵으로 읽으므로 CSV 재파싱과 규칙 재평가 없이 바로 사용할 수 있습니다.
+# 숫자/시각 컬럼(ViolationMask, 타임스탬프, 파생 컬럼)과 변경 사유(Arrow string)는 복사 없이 매핑된 파일을 그대로 가리키며
+# (읽기 전용), category 컬럼만 pandas Categorical로 변환하면서 코드 배열을 새로 만듭니다.
+# (경로, 수정 시각, 크기) → 내용 해시 색인을 함께 두어 변경되지 않은 파일은 해시도 다시 계산하지 않습니다.
+# 파일이 바뀔 때마다 새 결과가 쌓이므로, 저장할 때 최근 사용 순(LRU)으로 항목 수와 전체 크기 한도를 넘는 결과를 지웁니다.
+
+RESULT_STORE_DIR = '.audit_results'
+RESULT_STORE_VERSION = 4  # 저장 형식 또는 규칙 predicate 로직이 바뀌면 올립니다.
+RESULT_STORE_MAX_ENTRIES = 8  # 최근 사용 순으로 남길 결과 수
+RESULT_STORE_MAX_BYTES = 4 * 1024 ** 3  # 저장소 전체 크기 한도 (압축 없는 Arrow 파일 기준)
+HASH_BLOCK_BYTES = 8 * 1024 * 1024
+
+try:
+    import xxhash
+    HAS_XXHASH = True
+except ImportError:
+    HAS_XXHASH = False
+
+
+def content_hash(path):
+    """
+    파일 내용 해시(16진 문자열)를 블록 단위로 계산합니다 (xxhash가 있으면 XXH3-128, 없으면 BLAKE2b).
+    """
+    hasher = xxhash.xxh3_128() if HAS_XXHASH else hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b''):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def evaluation_settings(options=None):
+    """
+    판정 결과에 영향을 주는 기준값(임계값, RecordID 세션 구분 기준, 행위 목록, 변경 사유 묶음/판단 기준)에
+    평가 옵션을 덮어써 반환합니다. 스트리밍 내부 옵션(컨텍스트, RecordID 상태)은 제외합니다.
+    """
+    settings = {
+        "time_diff_threshold": TIME_DIFF_THRESHOLD,
+        "record_idle_seconds": RECORD_IDLE_SECONDS,
+        "drift_window": DRIFT_WINDOW,
+        "drift_min_periods": DRIFT_MIN_PERIODS,
+        "drift_median_threshold": DRIFT_MEDIAN_THRESHOLD,
+        "drift_jump_threshold": DRIFT_JUMP_THRESHOLD,
+        "reason_required_actions": REASON_REQUIRED_ACTIONS,
+        "sequence_start_actions": SEQUENCE_START_ACTIONS,
+        "pre_run_actions": PRE_RUN_ACTIONS,
+        "abort_actions": ABORT_ACTIONS,
+        "preservation_actions": PRESERVATION_ACTIONS,
+        "reason_shingle_size": REASON_SHINGLE_SIZE,
+        "reason_minhash_seeds": _MINHASH_SEEDS.tolist(),
+        "reason_lsh_bands": REASON_LSH_BANDS,
+        "reason_similarity_threshold": REASON_SIMILARITY_THRESHOLD,
+        "reason_reuse_min_uses": REASON_REUSE_MIN_USES,
+        "reason_reuse_min_share": REASON_REUSE_MIN_SHARE,
+        "reason_reuse_min_lift": REASON_REUSE_MIN_LIFT,
+    }
+    settings.update({key: value for key, value in (options or {}).items() if key not in STREAMING_OPTIONS})
+    return settings
+
+
+def rule_set_version(rules=None, options=None):
+    """
+    규칙 구성(ID, 비트, 원칙, 인용, 설명), 판정 기준값과 평가 옵션(evaluation_settings()), 저장 형식 버전으로
+    만든 짧은 버전 문자열입니다. 임계값이나 옵션이 다르면 다른 결과로 취급합니다.
+    """
+    rules = DI_RULES if rules is None else rules
+    payload = json.dumps([RESULT_STORE_VERSION, rule_metadata(rules), evaluation_settings(options)],
+                         ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:12]
+
+
+def rule_metadata(rules=None):
+    """
+    저장소에 함께 기록할 규칙 메타데이터(predicate 제외)를 반환합니다.
+    """
+    rules = DI_RULES if rules is None else rules
+    return [{key: rule[key] for key in ('id', 'bit', 'principle', 'citation', 'description')} for rule in rules]
+
+
+def _signature_index_path(store_dir):
+    return os.path.join(store_dir, 'signatures.json')
+
+
+def _read_signature_index(store_dir):
+    try:
+        with open(_signature_index_path(store_dir), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _write_json_atomic(path, payload):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def result_key(path, store_dir=RESULT_STORE_DIR, options=None):
+    """
+    저장소 키(내용 해시-규칙 구성 버전)를 반환합니다. options는 분석에 전달한 평가 옵션입니다.
+    파일 서명이 색인과 같으면 저장된 해시를 사용하고, 다르면 해시를 계산하여 색인을 갱신합니다.
+    """
+    abspath, mtime_ns, size = file_signature(path)
+    index = _read_signature_index(store_dir)
+    entry = index.get(abspath)
+    if entry and entry["mtime_ns"] == mtime_ns and entry["size"] == size:
+        digest = entry["hash"]
+    else:
+        digest = content_hash(path)
+        os.makedirs(store_dir, exist_ok=True)
+        index[abspath] = {"mtime_ns": mtime_ns, "size": size, "hash": digest}
+        _write_json_atomic(_signature_index_path(store_dir), index)
+    return f'{digest}-{rule_set_version(options=options)}'
+
+
+def _write_arrow(df, path, preserve_index):
+    import pyarrow as pa
+    table = pa.Table.from_pandas(df, preserve_index=preserve_index)
+    with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def _read_arrow(path):
+    import pyarrow as pa
+    with pa.memory_map(path, 'r') as source:
+        table = pa.ipc.open_file(source).read_all()
+    # 문자열 컬럼은 object로 풀지 않고 Arrow 기반 string dtype을 그대로 사용합니다.
+    # split_blocks=True이면 컬럼을 하나의 2차원 블록으로 합치지 않으므로 결측이 없는 숫자/시각 컬럼은
+    # 매핑된 버퍼를 그대로 쓰는 읽기 전용 배열이 됩니다 (self_destruct로 변환이 끝난 Arrow 버퍼는 바로 놓아 줌).
+    string_dtype = pd.StringDtype('pyarrow')
+    return table.to_pandas(types_mapper={pa.string(): string_dtype, pa.large_string(): string_dtype}.get,
+                           split_blocks=True, self_destruct=True)
+
+
+def store_analysis(path, analysis, store_dir=RESULT_STORE_DIR, key=None, options=None):
+    """
+    분석 결과를 저장소에 기록하고 키를 반환합니다 (pyarrow가 없으면 저장하지 않고 None).
+    기록한 뒤 prune_result_store()로 오래 사용하지 않은 결과를 정리합니다.
+    """
+    if not HAS_PYARROW:
+        return None
+    key = key or result_key(path, store_dir, options)
+    target = os.path.join(store_dir, key)
+    if os.path.isdir(target):
+        return key
+
+    tmp_dir = f'{target}.{os.getpid()}.tmp'
+    os.makedirs(tmp_dir, exist_ok=True)
+    _write_arrow(analysis["df"], os.path.join(tmp_dir, 'frame.arrow'), preserve_index=True)
+    _write_arrow(analysis["drift_summary"], os.path.join(tmp_dir, 'drift.arrow'), preserve_index=False)
+    _write_arrow(analysis["reason_summary"], os.path.join(tmp_dir, 'reasons.arrow'), preserve_index=False)
+    _write_json_atomic(os.path.join(tmp_dir, 'meta.json'), {
+        "source": os.path.abspath(path),
+        "rules": rule_metadata(),
+        "settings": evaluation_settings(options),
+        "rule_counts": analysis["rule_counts"],
+        "user_ids": analysis["user_ids"],
+        "total_rows": analysis.get("total_rows", len(analysis["df"])),
+        "streamed": bool(analysis.get("streamed", False)),
+    })
+    try:
+        os.rename(tmp_dir, target)
+    except OSError:
+        # 다른 프로세스가 먼저 같은 키를 저장한 경우
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    prune_result_store(store_dir, keep=key)
+    return key
+
+
+def _touch_result(target):
+    # meta.json의 수정 시각을 마지막 사용 시각으로 씁니다 (atime은 마운트 옵션에 따라 갱신되지 않음).
+    try:
+        os.utime(os.path.join(target, 'meta.json'))
+    except OSError:
+        pass
+
+
+def prune_result_store(store_dir=RESULT_STORE_DIR, keep=None, max_entries=RESULT_STORE_MAX_ENTRIES,
+                       max_bytes=RESULT_STORE_MAX_BYTES):
+    """
+    최근 사용 순으로 max_entries개, 합계 max_bytes 이내의 결과만 남기고 나머지를 지운 뒤 지운 키 목록을 반환합니다.
+    keep 키(방금 저장한 결과)와 다른 프로세스가 기록 중인 임시 디렉터리는 지우지 않습니다.
+    """
+    entries = []
+    try:
+        candidates = [entry for entry in os.scandir(store_dir) if entry.is_dir() and not entry.name.endswith('.tmp')]
+    except FileNotFoundError:
+        return []
+    for entry in candidates:
+        try:
+            last_used = os.stat(os.path.join(entry.path, 'meta.json')).st_mtime_ns
+            size = sum(item.stat().st_size for item in os.scandir(entry.path) if item.is_file())
+        except OSError:
+            continue
+        entries.append((entry.name == keep, last_used, entry.name, size))
+
+    removed = []
+    total = 0
+    for rank, (kept, _, name, size) in enumerate(sorted(entries, reverse=True)):
+        if not kept and (rank >= max_entries or total + size > max_bytes):
+            # 다른 세션이 메모리 맵으로 열어 둔 파일은 (Windows에서) 지워지지 않을 수 있으므로 다음 정리 때 다시 시도합니다.
+            shutil.rmtree(os.path.join(store_dir, name), ignore_errors=True)
+            removed.append(name)
+            continue
+        total += size
+    return removed
+
+
+def load_stored_analysis(path, store_dir=RESULT_STORE_DIR, key=None, options=None):
+    """
+    저장소에 같은 내용·규칙 구성·평가 옵션의 분석 결과가 있으면 메모리 맵으로 열어 반환합니다 (없으면 None).
+    숫자/시각 컬럼은 매핑된 파일을 읽기 전용으로 가리키고, 범주형 컬럼만 새 코드 배열로 만듭니다.
+    """
+    if not HAS_PYARROW:
+        return None
+    key = key or result_key(path, store_dir, options)
+    target = os.path.join(store_dir, key)
+    try:
+        with open(os.path.join(target, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        df = _read_arrow(os.path.join(target, 'frame.arrow'))
+        drift_summary = _read_arrow(os.path.join(target, 'drift.arrow'))
+        reason_summary = _read_arrow(os.path.join(target, 'reasons.arrow'))
+    except (FileNotFoundError, ValueError, OSError):
+        return None
+    _touch_result(target)
+
+    analysis = {
+        "df": df,
+        "error_indices": df.index[df[MASK_COLUMN].to_numpy() != 0] if not df.empty else df.index,
+        "rule_counts": meta["rule_counts"],
+        "user_ids": meta["user_ids"],
+        "drift_summary": drift_summary,
+        "reason_summary": reason_summary,
+        "stored_key": key,
+    }
+    if meta["streamed"]:
+        analysis.update({"total_rows": meta["total_rows"], "streamed": True})
+    return analysis
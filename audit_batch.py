@@ -0,0 +1,291 @@
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from audit_analysis import (
+    CATEGORY_COLUMNS, DI_RULES, HAS_PYARROW, MASK_COLUMN, STREAMING_THRESHOLD_BYTES, STRING_COLUMNS,
+    TIMESTAMP_COLUMNS, analyze_audit_trail, apply_schema, load_audit_trail, read_audit_csv, scan_audit_trail,
+)
+
+# ==============================================================================
+# 다중 사이트 Audit Trail 병렬 분석
+# ==============================================================================
+# 사이트/시스템별 Audit Trail CSV 여러 개를 프로세스 풀에서 병렬로 분석하고,
+# 사이트별·규칙별·역할별 위반 건수로 합친 교차 사이트 요약을 만듭니다.
+# 워커는 전체 DataFrame 대신 작은 집계 결과만 돌려주므로 파일 수가 많아도
+# 프로세스 간 전송 비용이 거의 없고, 처리량은 코어 수에 비례하여 늘어납니다.
+#
+# 헤드리스 실행: python audit_batch.py <디렉터리> [--workers N] [--output-dir 결과폴더]
+# 웹 화면에서는 업로드한 파일만 분석하며, 서버 디렉터리 분석은 관리자가 MULTISITE_ROOT_ENV로
+# 지정한 루트 아래에서만 허용합니다 (설정하지 않으면 화면에 표시하지 않음).
+# 웹 서버는 호출마다 풀을 새로 만들지 않고 WEB_MAX_WORKERS개짜리 풀 하나(create_site_executor)를
+# 모든 세션이 공유하며, 업로드 파일은 임시 파일로 옮겨(spool_uploads) 경로만 워커에 전달하므로
+# 업로드 내용 전체를 pickle하지 않고 대용량 파일은 디렉터리 분석과 같이 스트리밍 분석을 사용합니다.
+
+AUDIT_FILE_PATTERN = '*.csv'
+MULTISITE_ROOT_ENV = 'EDU_MULTISITE_ROOT'  # 웹 화면에서 디렉터리 분석을 허용할 서버 루트 (관리자 설정)
+WEB_MAX_WORKERS = max(1, min(4, (os.cpu_count() or 1) // 2))  # 웹 서버 공용 풀의 워커 수 (세션 처리용 코어를 남김)
+UPLOAD_SUFFIX = '.csv'
+SITE_COLUMN = 'Site'
+UNKNOWN_ROLE = '(미지정)'
+REQUIRED_COLUMNS = TIMESTAMP_COLUMNS + CATEGORY_COLUMNS + STRING_COLUMNS
+
+
+def multisite_root():
+    """
+    관리자가 지정한 디렉터리 분석 루트(절대 경로)를 반환합니다 (설정하지 않았으면 None).
+    """
+    root = os.environ.get(MULTISITE_ROOT_ENV)
+    return Path(root).resolve() if root else None
+
+
+def resolve_site_directory(root, subdirectory):
+    """
+    루트 기준 하위 경로를 절대 경로로 바꿉니다. '..'나 심볼릭 링크로 루트 밖을 가리키면 ValueError를 발생시킵니다.
+    """
+    root = Path(root).resolve()
+    target = (root / subdirectory).resolve()
+    if not target.is_relative_to(root):
+        raise ValueError(f"허용된 디렉터리 밖의 경로입니다: {subdirectory}")
+    return target
+
+
+def discover_audit_files(directory, pattern=AUDIT_FILE_PATTERN, allowed_root=None):
+    """
+    디렉터리(하위 폴더 포함)에서 Audit Trail 파일을 찾아 (사이트 이름, 경로) 목록을 반환합니다.
+    사이트 이름은 디렉터리 기준 상대 경로에서 확장자를 뺀 값입니다 (예: 'SiteA/HPLC_01').
+    allowed_root를 지정하면 심볼릭 링크를 따라 그 밖을 가리키는 파일은 제외합니다.
+    """
+    root = Path(directory)
+    if not root.is_dir():
+        raise FileNotFoundError(f"디렉터리를 찾을 수 없습니다: {directory}")
+    allowed_root = Path(allowed_root).resolve() if allowed_root is not None else None
+    return [
+        (path.relative_to(root).with_suffix('').as_posix(), str(path))
+        for path in sorted(root.rglob(pattern))
+        if path.is_file() and (allowed_root is None or path.resolve().is_relative_to(allowed_root))
+    ]
+
+
+def spool_uploads(files, directory):
+    """
+    업로드 파일(file-like, name 속성)을 디렉터리의 임시 파일로 복사하여 (사이트 이름, 경로) 목록을 반환합니다.
+    파일 이름은 순번으로 정하므로 업로드 이름에 경로 문자가 있거나 이름이 겹쳐도 안전합니다.
+    """
+    sources = []
+    for i, file in enumerate(files):
+        path = os.path.join(directory, f'{i:05d}{UPLOAD_SUFFIX}')
+        file.seek(0)
+        with open(path, 'wb') as f:
+            shutil.copyfileobj(file, f)
+        sources.append((file.name.rsplit('.', 1)[0], path))
+    return sources
+
+
+def check_audit_columns(df):
+    """
+    DI 규칙 평가에 필요한 컬럼이 모두 있는지 확인하고, 없으면 ValueError를 발생시킵니다.
+    """
+    missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Audit Trail 필수 컬럼 누락: {', '.join(missing)}")
+    return df
+
+
+def role_rule_counts(df):
+    """
+    역할(Role)별·규칙별 위반 건수를 (Role, Rule, Count) 형태로 반환합니다 (건수가 0인 조합 제외).
+    """
+    if df.empty or MASK_COLUMN not in df.columns:
+        return pd.DataFrame(columns=['Role', 'Rule', 'Count'])
+    mask = df[MASK_COLUMN].to_numpy()
+    hits = pd.DataFrame({rule["id"]: (mask & (1 << rule["bit"])) != 0 for rule in DI_RULES})
+    roles = df['Role'].astype(object).fillna(UNKNOWN_ROLE).to_numpy()
+    counts = hits.groupby(roles).sum()
+    counts.index.name = 'Role'
+    counts = counts.reset_index().melt(id_vars='Role', var_name='Rule', value_name='Count')
+    return counts[counts['Count'] > 0].reset_index(drop=True)
+
+
+def analyze_site(source, **options):
+    """
+    사이트 하나의 Audit Trail을 분석하여 집계 결과만 반환합니다 (프로세스 풀 워커).
+    source는 (사이트 이름, 파일 경로) 또는 업로드 파일용 (사이트 이름, bytes)입니다.
+    대용량 파일은 스트리밍 분석을 사용하며, 분석 오류는 해당 사이트의 error로 기록합니다.
+    """
+    site, data = source
+    try:
+        if isinstance(data, bytes):
+            df = check_audit_columns(read_audit_csv(io.BytesIO(data)))
+            if not df.empty:
+                apply_schema(df)
+            analysis = analyze_audit_trail(df, **options)
+            total_rows = len(df)
+        elif os.path.getsize(data) > STREAMING_THRESHOLD_BYTES:
+            analysis = scan_audit_trail(data, **options)
+            total_rows = analysis["total_rows"]
+        else:
+            analysis = analyze_audit_trail(check_audit_columns(load_audit_trail(data)), **options)
+            total_rows = len(analysis["df"])
+    except Exception as e:
+        return {"site": site, "rows": 0, "flagged_rows": 0, "rule_counts": {},
+                "role_counts": role_rule_counts(pd.DataFrame()), "error": str(e)}
+
+    return {
+        "site": site,
+        "rows": total_rows,
+        "flagged_rows": len(analysis["error_indices"]),
+        "rule_counts": analysis["rule_counts"],
+        "role_counts": role_rule_counts(analysis["df"]),
+        "error": None,
+    }
+
+
+def _init_worker():
+    # 워커마다 pyarrow CSV 스레드 풀을 1개로 제한하여 코어 과할당을 막습니다.
+    if HAS_PYARROW:
+        import pyarrow
+        pyarrow.set_cpu_count(1)
+
+
+def _analyze_site_with_options(args):
+    source, options = args
+    return analyze_site(source, **options)
+
+
+def create_site_executor(max_workers=None):
+    """
+    사이트 분석용 프로세스 풀을 만듭니다.
+    Streamlit 서버처럼 스레드가 있는 프로세스에서도 안전하도록 spawn 방식으로 워커를 시작합니다.
+    """
+    return ProcessPoolExecutor(max_workers=max_workers or os.cpu_count() or 1,
+                               mp_context=multiprocessing.get_context('spawn'), initializer=_init_worker)
+
+
+def analyze_sites(sources, max_workers=None, progress=None, executor=None, **options):
+    """
+    여러 사이트의 Audit Trail을 프로세스 풀에서 병렬로 분석하여 사이트별 결과 목록을 반환합니다.
+    결과는 sources 순서를 따르며, progress(done, total) 콜백으로 진행 상황을 알립니다.
+    executor를 주면 호출마다 풀을 만들지 않고 그 풀(워커 수 max_workers)을 사용하며, 끝나도 닫지 않습니다.
+    """
+    sources = list(sources)
+    total = len(sources)
+    max_workers = min(max_workers or os.cpu_count() or 1, total) if total else 1
+    tasks = [(source, options) for source in sources]
+
+    if executor is None and max_workers <= 1:
+        results = []
+        for done, task in enumerate(tasks, start=1):
+            results.append(_analyze_site_with_options(task))
+            if progress is not None:
+                progress(done, total)
+        return results
+
+    # 파일이 많을 때는 여러 작업을 묶어 보내 프로세스 간 왕복 횟수를 줄입니다.
+    chunksize = max(1, total // (max_workers * 4))
+    results = []
+    with contextlib.nullcontext(executor) if executor is not None else create_site_executor(max_workers) as pool:
+        for done, result in enumerate(pool.map(_analyze_site_with_options, tasks, chunksize=chunksize), start=1):
+            results.append(result)
+            if progress is not None:
+                progress(done, total)
+    return results
+
+
+def merge_site_results(results):
+    """
+    사이트별 결과를 교차 사이트 요약(사이트별, 규칙별, 역할별, 사이트×역할×규칙)으로 합칩니다.
+    """
+    rule_ids = [rule["id"] for rule in DI_RULES]
+    by_site = pd.DataFrame([
+        {
+            SITE_COLUMN: result["site"],
+            "rows": result["rows"],
+            "flagged_rows": result["flagged_rows"],
+            **{rule_id: result["rule_counts"].get(rule_id, 0) for rule_id in rule_ids},
+            "error": result["error"],
+        }
+        for result in results
+    ], columns=[SITE_COLUMN, 'rows', 'flagged_rows'] + rule_ids + ['error'])
+
+    role_frames = [result["role_counts"].assign(**{SITE_COLUMN: result["site"]})
+                   for result in results if not result["role_counts"].empty]
+    detail = (
+        pd.concat(role_frames, ignore_index=True)[[SITE_COLUMN, 'Role', 'Rule', 'Count']]
+        if role_frames else pd.DataFrame(columns=[SITE_COLUMN, 'Role', 'Rule', 'Count'])
+    )
+
+    rule_totals = by_site[rule_ids].sum()
+    sites_affected = (by_site[rule_ids] > 0).sum()
+    by_rule = pd.DataFrame([
+        {
+            "Rule": rule["id"],
+            "principle": rule["principle"],
+            "citation": rule["citation"],
+            "detections": int(rule_totals[rule["id"]]),
+            "sites_affected": int(sites_affected[rule["id"]]),
+        }
+        for rule in DI_RULES
+    ])
+
+    by_role = (
+        detail.pivot_table(index='Role', columns='Rule', values='Count', aggfunc='sum', fill_value=0)
+        .reindex(columns=rule_ids, fill_value=0)
+        .astype(np.int64)
+    )
+    by_role['total'] = by_role.sum(axis=1)
+    by_role = by_role.sort_values('total', ascending=False, kind='stable').reset_index()
+
+    return {
+        "by_site": by_site.sort_values('flagged_rows', ascending=False, kind='stable').reset_index(drop=True),
+        "by_rule": by_rule,
+        "by_role": by_role,
+        "detail": detail,
+        "sites": len(results),
+        "total_rows": int(by_site['rows'].sum()),
+        "failed_sites": by_site.loc[by_site['error'].notna(), SITE_COLUMN].tolist(),
+    }
+
+
+def main(argv=None):
+    """
+    디렉터리의 Audit Trail을 병렬 분석하여 교차 사이트 요약을 출력(또는 CSV로 저장)합니다.
+    """
+    parser = argparse.ArgumentParser(description='다중 사이트 Audit Trail DI 병렬 분석')
+    parser.add_argument('directory', help='사이트별 Audit Trail CSV가 있는 디렉터리')
+    parser.add_argument('--pattern', default=AUDIT_FILE_PATTERN, help='분석할 파일 패턴 (기본값: *.csv)')
+    parser.add_argument('--workers', type=int, default=None, help='워커 프로세스 수 (기본값: CPU 코어 수)')
+    parser.add_argument('--output-dir', help='요약 CSV(by_site, by_rule, by_role, detail)를 저장할 디렉터리')
+    args = parser.parse_args(argv)
+
+    sources = discover_audit_files(args.directory, args.pattern)
+    if not sources:
+        print(f"분석할 파일이 없습니다: {args.directory} ({args.pattern})", file=sys.stderr)
+        return 1
+
+    summary = merge_site_results(analyze_sites(sources, max_workers=args.workers))
+    print(f"사이트 {summary['sites']}개, 전체 {summary['total_rows']:,}행 분석 완료")
+    for name in ('by_site', 'by_rule', 'by_role'):
+        print(f"\n[{name}]")
+        print(summary[name].to_string(index=False))
+    if summary["failed_sites"]:
+        print(f"\n분석 실패 사이트: {', '.join(summary['failed_sites'])}", file=sys.stderr)
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+        for name in ('by_site', 'by_rule', 'by_role', 'detail'):
+            summary[name].to_csv(os.path.join(args.output_dir, f'{name}.csv'), index=False, encoding='utf-8-sig')
+    return 2 if summary["failed_sites"] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,304 @@
+import argparse
+import html
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from audit_analysis import (
+    AUDIT_LOG_PATH, CATEGORY_COLUMNS, DERIVED_COLUMNS, DI_RULES, MASK_COLUMN, RULES_COLUMN, STREAMING_THRESHOLD_BYTES,
+    STRING_COLUMNS, TIMESTAMP_COLUMNS, analyze_audit_trail, filter_audit_rows, format_for_display, iter_audit_chunks,
+    load_audit_trail, scan_audit_trail,
+)
+
+# ==============================================================================
+# 위반 하이라이트 Audit Trail 내보내기 (Excel / HTML, 일정한 메모리)
+# ==============================================================================
+# 화면의 Styler는 전체 행을 메모리에 올려야 하므로 대용량 로그를 내보낼 수 없습니다.
+# 여기서는 분석 결과를 청크 단위로 화면 표시 형식으로 변환하여 한 번에 이어 씁니다.
+#  - Excel: openpyxl write-only 모드 (행을 임시 XML로 바로 기록, 시트당 최대 행 수를 넘으면 다음 시트로)
+#  - HTML: 청크마다 <tbody>를 문자열 벡터 연산으로 만들어 바로 기록
+# 위반 행은 화면과 같은 색(빨간 글자, 연한 빨간 배경)으로 표시하고 규칙 ID와 규제 근거 코드를 함께 기록합니다.
+# 메모리 사용량은 전체 행 수가 아니라 청크 크기에 비례합니다.
+#
+# 헤드리스 실행: python audit_export.py <Audit Trail CSV> <결과.xlsx|결과.html> [--all-rows]
+
+EXPORT_CHUNK_ROWS = 50_000
+EXCEL_MAX_ROWS = 1_048_576  # Excel 시트당 최대 행 수 (머리글 포함)
+EXPORT_SHEET_NAME = 'AuditTrail'
+CITATIONS_COLUMN = 'Citations'
+EXPORT_HIDDEN_COLUMNS = DERIVED_COLUMNS + [MASK_COLUMN]
+EXPORT_FORMATS = {
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'html': 'text/html',
+}
+
+VIOLATION_STYLE = 'color: red; background-color: #ffeeee'  # 화면(Styler)과 HTML 공통
+VIOLATION_FONT_COLOR = 'FFFF0000'
+VIOLATION_FILL_COLOR = 'FFFFEEEE'
+
+HTML_HEAD = """<!DOCTYPE html>
+<html lang="ko">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: sans-serif; font-size: 12px; }}
+table {{ border-collapse: collapse; }}
+th, td {{ border: 1px solid #ddd; padding: 2px 6px; white-space: nowrap; }}
+th {{ position: sticky; top: 0; background: #f5f5f5; }}
+tr.violation {{ {violation_style}; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+"""
+HTML_TAIL = """</table>
+</body>
+</html>
+"""
+
+
+def describe_citations(mask, rules=None):
+    """
+    비트마스크 Series를 위반 규칙의 규제 근거 코드 목록 문자열로 변환합니다 (중복 코드는 한 번만).
+    """
+    rules = DI_RULES if rules is None else rules
+    labels = {}
+    for value in pd.unique(mask):
+        codes = [rule["citation"] for rule in rules if int(value) & (1 << rule["bit"])]
+        labels[value] = ', '.join(dict.fromkeys(codes))
+    return mask.map(labels)
+
+
+def export_columns(analysis):
+    """
+    내보낼 컬럼 목록(원본 컬럼 + 탐지 규칙 + 규제 근거)을 반환합니다.
+    """
+    columns = [col for col in analysis["df"].columns if col not in EXPORT_HIDDEN_COLUMNS + [RULES_COLUMN]]
+    if not columns:
+        columns = TIMESTAMP_COLUMNS + CATEGORY_COLUMNS + STRING_COLUMNS
+    return columns + [RULES_COLUMN, CITATIONS_COLUMN]
+
+
+def export_frame(rows, columns):
+    """
+    행 청크를 내보내기 형식(문자열 타임스탬프, 규칙 ID, 규제 근거 코드)으로 변환합니다.
+    (변환된 DataFrame, 위반 여부 bool 배열)을 반환합니다.
+    """
+    frame = format_for_display(rows)
+    frame[CITATIONS_COLUMN] = describe_citations(frame[MASK_COLUMN])
+    flagged = frame[MASK_COLUMN].to_numpy() != 0
+    return frame.reindex(columns=columns), flagged
+
+
+def iter_export_chunks(analysis, path=AUDIT_LOG_PATH, violations_only=True, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    분석 결과를 내보내기 형식의 (DataFrame, 위반 여부) 청크로 순서대로 반환합니다.
+    스트리밍/tail 분석 결과는 위반 행만 메모리에 있으므로, 전체 행을 내보낼 때는 원본 파일을 청크 단위로
+    다시 읽고 위반 행의 판정(ViolationMask)을 원래 행 번호로 붙입니다 (분석된 행 수까지만).
+    """
+    df = analysis["df"]
+    columns = export_columns(analysis)
+    if violations_only or not analysis.get("streamed"):
+        positions = filter_audit_rows(df, violations_only=violations_only) if not df.empty else np.array([], dtype=int)
+        for start in range(0, len(positions), chunk_rows):
+            yield export_frame(df.iloc[positions[start:start + chunk_rows]], columns)
+        return
+
+    masks = df[MASK_COLUMN] if not df.empty else pd.Series(dtype=np.uint8)
+    remaining = analysis["total_rows"]
+    for chunk in iter_audit_chunks(path, chunksize=chunk_rows):
+        if remaining <= 0:
+            break
+        chunk = chunk.iloc[:remaining].copy()
+        chunk[MASK_COLUMN] = masks.reindex(chunk.index, fill_value=0).to_numpy()
+        remaining -= len(chunk)
+        yield export_frame(chunk, columns)
+
+
+def rule_summary_rows(analysis):
+    """
+    내보내기 요약에 기록할 규칙별 (규칙 ID, 원칙, 규제 근거, 설명, 탐지 건수) 행 목록입니다.
+    """
+    return [
+        [rule["id"], rule["principle"], rule["citation"], rule["description"], analysis["rule_counts"].get(rule["id"], 0)]
+        for rule in DI_RULES
+    ]
+
+
+def _cell_values(frame):
+    # 결측값은 빈 칸(None)으로, 자유 텍스트의 Excel XML에 쓸 수 없는 제어 문자는 제거합니다.
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+    values = frame.astype(object)
+    values = values.where(values.notna(), None)
+    for col in STRING_COLUMNS:
+        if col in values.columns:
+            values[col] = values[col].map(lambda v: ILLEGAL_CHARACTERS_RE.sub('', v) if isinstance(v, str) else v)
+    return values.itertuples(index=False, name=None)
+
+
+def write_excel(chunks, target, columns, summary_rows=(), title=EXPORT_SHEET_NAME):
+    """
+    청크를 openpyxl write-only 통합 문서로 기록하고 기록한 데이터 행 수를 반환합니다.
+    target은 파일 경로 또는 바이너리 파일 객체입니다. 요약 시트를 먼저 만들고,
+    데이터 시트는 EXCEL_MAX_ROWS를 넘으면 '{title}_2'처럼 다음 시트로 이어집니다.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, NamedStyle, PatternFill
+    from openpyxl.utils import get_column_letter
+
+    # 문자열은 모두 텍스트(data_type 's') 셀로 씁니다. openpyxl은 '='로 시작하는 문자열을 수식으로 기록하므로,
+    # 변경 사유/ID가 수식(HYPERLINK, DDE 등)으로 바뀌어 제출용 증거 내용이 달라지고 수식 주입 경로가 됩니다.
+    def fill_cells(cells, values):
+        for cell, value in zip(cells, values):
+            cell.value = value
+            if isinstance(value, str):
+                cell.data_type = 's'
+        return cells
+
+    def text_cells(sheet, values, font=None):
+        cells = [WriteOnlyCell(sheet) for _ in values]
+        if font is not None:
+            for cell in cells:
+                cell.font = font
+        return fill_cells(cells, values)
+
+    workbook = Workbook(write_only=True)
+    summary = workbook.create_sheet('Summary')
+    summary.append(text_cells(summary, ['Rule', 'Principle', 'Citation', 'Description', 'Detections']))
+    for row in summary_rows:
+        summary.append(text_cells(summary, row))
+
+    # 위반 셀마다 Font/PatternFill을 지정하면 셀마다 스타일 해시 조회가 일어나므로 이름 있는 스타일 하나를 공유합니다.
+    header_font = Font(bold=True)
+    workbook.add_named_style(NamedStyle(
+        name='Violation',
+        font=Font(color=VIOLATION_FONT_COLOR),
+        fill=PatternFill(fill_type='solid', fgColor=VIOLATION_FILL_COLOR),
+    ))
+
+    def new_sheet(number):
+        sheet = workbook.create_sheet(title if number == 1 else f'{title}_{number}')
+        sheet.freeze_panes = 'A2'
+        for i, col in enumerate(columns, start=1):
+            sheet.column_dimensions[get_column_letter(i)].width = max(12, min(len(col) + 4, 40))
+        sheet.append(text_cells(sheet, columns, font=header_font))
+        # write-only 시트는 append() 안에서 행을 바로 기록하므로 컬럼별 셀 객체를 행마다 다시 사용합니다.
+        plain = [WriteOnlyCell(sheet) for _ in columns]
+        violation = [WriteOnlyCell(sheet) for _ in columns]
+        for cell in violation:
+            cell.style = 'Violation'
+        return sheet, plain, violation
+
+    sheet_number, sheet_rows, written = 1, 0, 0
+    sheet, plain, violation = new_sheet(sheet_number)
+    for frame, flagged in chunks:
+        for values, is_violation in zip(_cell_values(frame), flagged):
+            if sheet_rows == EXCEL_MAX_ROWS - 1:
+                sheet_number += 1
+                (sheet, plain, violation), sheet_rows = new_sheet(sheet_number), 0
+            sheet.append(fill_cells(violation if is_violation else plain, values))
+            sheet_rows += 1
+        written += len(frame)
+    workbook.save(target)
+    return written
+
+
+def _html_text(values):
+    text = values.astype(object).where(values.notna(), '').astype(str)
+    for char, entity in (('&', '&amp;'), ('<', '&lt;'), ('>', '&gt;'), ('"', '&quot;')):
+        text = text.str.replace(char, entity, regex=False)
+    return text
+
+
+def html_rows(frame, flagged):
+    """
+    청크 하나를 <tr> 행 문자열 목록으로 변환합니다 (컬럼 단위 문자열 벡터 연산).
+    """
+    cells = pd.Series('', index=frame.index, dtype=object)
+    for col in frame.columns:
+        cells = cells + '<td>' + _html_text(frame[col]) + '</td>'
+    return (np.where(flagged, '<tr class="violation">', '<tr>') + cells.to_numpy(dtype=object) + '</tr>').tolist()
+
+
+def write_html(chunks, target, columns, summary_rows=(), title='Audit Trail DI 분석 결과'):
+    """
+    청크를 HTML 표로 이어서 기록하고 기록한 데이터 행 수를 반환합니다 (청크마다 <tbody> 하나).
+    target은 파일 경로 또는 바이너리 파일 객체입니다.
+    """
+    own_file = isinstance(target, (str, os.PathLike))
+    f = open(target, 'wb') if own_file else target
+    try:
+        def write(text):
+            f.write(text.encode('utf-8'))
+
+        write(HTML_HEAD.format(title=html.escape(title), violation_style=VIOLATION_STYLE))
+        if summary_rows:
+            write('<table>\n<thead><tr><th>Rule</th><th>Principle</th><th>Citation</th><th>Description</th>'
+                  '<th>Detections</th></tr></thead>\n<tbody>\n')
+            for row in summary_rows:
+                write('<tr>' + ''.join(f'<td>{html.escape(str(value))}</td>' for value in row) + '</tr>\n')
+            write('</tbody>\n</table>\n<br>\n')
+        write('<table>\n<thead><tr>' + ''.join(f'<th>{html.escape(col)}</th>' for col in columns) + '</tr></thead>\n')
+        written = 0
+        for frame, flagged in chunks:
+            write('<tbody>\n' + '\n'.join(html_rows(frame, flagged)) + '\n</tbody>\n')
+            written += len(frame)
+        write(HTML_TAIL)
+    finally:
+        if own_file:
+            f.close()
+    return written
+
+
+def export_audit_trail(analysis, target, fmt, path=AUDIT_LOG_PATH, violations_only=True, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    분석 결과를 fmt('xlsx' 또는 'html') 형식으로 target에 내보내고 기록한 행 수를 반환합니다.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"지원하지 않는 내보내기 형식입니다: {fmt}")
+    writer = write_excel if fmt == 'xlsx' else write_html
+    chunks = iter_export_chunks(analysis, path, violations_only, chunk_rows)
+    return writer(chunks, target, export_columns(analysis), rule_summary_rows(analysis))
+
+
+def export_bytes(analysis, fmt, path=AUDIT_LOG_PATH, violations_only=True):
+    """
+    내보내기 결과를 익명 임시 파일에 청크 단위로 기록한 뒤 완성된 파일 내용(bytes)을 반환합니다.
+    st.download_button의 지연 생성(callable) 데이터로 사용합니다 (생성 중 메모리는 청크 크기에 비례).
+    """
+    with tempfile.TemporaryFile() as f:
+        export_audit_trail(analysis, f, fmt, path, violations_only)
+        f.seek(0)
+        return f.read()
+
+
+def main(argv=None):
+    """
+    Audit Trail을 분석하여 위반 하이라이트 Excel/HTML 파일로 내보냅니다.
+    """
+    parser = argparse.ArgumentParser(description='위반 하이라이트 Audit Trail 내보내기 (Excel/HTML)')
+    parser.add_argument('source', help='Audit Trail CSV')
+    parser.add_argument('output', help='결과 파일 (.xlsx 또는 .html)')
+    parser.add_argument('--all-rows', action='store_true', help='위반 행뿐 아니라 전체 행을 내보냅니다')
+    args = parser.parse_args(argv)
+
+    fmt = os.path.splitext(args.output)[1].lstrip('.').lower()
+    if fmt not in EXPORT_FORMATS:
+        print(f"출력 파일 확장자는 {', '.join(EXPORT_FORMATS)} 중 하나여야 합니다.", file=sys.stderr)
+        return 1
+    if os.path.getsize(args.source) > STREAMING_THRESHOLD_BYTES:
+        analysis = scan_audit_trail(args.source)
+    else:
+        analysis = analyze_audit_trail(load_audit_trail(args.source))
+    written = export_audit_trail(analysis, args.output, fmt, args.source, violations_only=not args.all_rows)
+    print(f"{args.output}: {written:,}행 내보내기 완료")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
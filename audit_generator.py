@@ -0,0 +1,330 @@
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from audit_analysis import AUDIT_TIME_FORMAT, WORKSTATION_COLUMN
+
+# ==============================================================================
+# 합성 Audit Trail 생성기 (벤치마크/부하 테스트용)
+# ==============================================================================
+# 실제 Audit Trail과 비슷한 구조의 로그를 원하는 행 수만큼 만듭니다.
+#  - RecordID별 수명 주기: CREATE → RUN_START → 처리/수정/검토/상태 변경 ...
+#  - 사용자는 역할(QC_ANALYST/QA_REVIEWER/SYS_ADMIN)에 고정되며 행위에 맞는 역할이 수행
+#  - 사용자별 시계 오차(일부 사용자는 체계적 드리프트)와 개별 시간 급변
+#  - 변경 사유 누락, 상투적 사유(boilerplate)를 표기만 바꿔 가며 반복하는 사용자, 역할 오용
+#  - 공식 분석 시작 전 처리(Pre-Injection), ABORT 후 보존 이벤트 누락
+# 행은 청크 단위로 만들어 서버 시간순으로 이어 쓰므로 1,000만 행도 일정한 메모리로 생성됩니다.
+#
+# 실행: python audit_generator.py 1000000 audit_1m.csv [--seed 0] [--users 200] ...
+
+GENERATOR_CHUNK_ROWS = 500_000
+GENERATOR_START = '2025-01-01 00:00:00'
+OUTPUT_COLUMNS = ['TimeStamp(Server)', 'ActionTime(Client)', 'UserID', 'Role', 'ActionType', 'RecordID', 'ReasonForChange']
+
+ROLES = ['QC_ANALYST', 'QA_REVIEWER', 'SYS_ADMIN']
+ROLE_PREFIXES = ['A', 'B', 'C']
+ACTIONS = ['CREATE', 'RUN_START', 'RAW_DATA_PROCESS', 'MODIFY', 'REVIEW', 'CHANGE_STATUS', 'ABORT', 'PRESERVE', 'ARCHIVE']
+(CREATE, RUN_START, RAW_DATA_PROCESS, MODIFY, REVIEW, CHANGE_STATUS, ABORT, PRESERVE, ARCHIVE) = range(len(ACTIONS))
+
+# 수명 주기 3번째 이벤트부터의 행위 비율
+BODY_ACTIONS = np.array([RAW_DATA_PROCESS, MODIFY, REVIEW, CHANGE_STATUS, ARCHIVE])
+BODY_WEIGHTS = np.array([0.40, 0.25, 0.20, 0.10, 0.05])
+
+# 행위별 변경 사유 (MODIFY/CHANGE_STATUS는 구체적인 사유와 상투적 사유를 구분)
+ACTION_REASONS = {
+    CREATE: ['Initial Entry'],
+    RUN_START: ['Sequence start'],
+    RAW_DATA_PROCESS: ['System suitability check', 'Integration parameters per method', 'Reprocessed after baseline review'],
+    MODIFY: (
+        [f'Sample weight corrected per logbook p.{n}' for n in range(1, 101)]
+        + [f'Dilution factor updated per SOP-QC-{n:03d}' for n in range(1, 51)]
+        + ['Transcription error in lot number corrected', 'Calculation corrected after second-person check']
+    ),
+    REVIEW: ['Review Complete'],
+    CHANGE_STATUS: ['Approved after review', 'Released by QA', 'Returned to analyst for correction'],
+    ABORT: ['Instrument error', 'Pump pressure alarm', 'Vial position error'],
+    PRESERVE: ['Raw data preserved'],
+    ARCHIVE: ['Archived to LIMS'],
+}
+BOILERPLATE_REASONS = ['Minor correction', 'Emergency Fix', 'Data correction', 'As per discussion']
+BOILERPLATE_VARIANTS = 6  # 상투적 사유 하나당 표기 변형 수 (boilerplate_variants 참고)
+
+# 기본 생성 프로파일 (generate_audit_chunks의 키워드 인자로 덮어쓸 수 있음)
+DEFAULT_PROFILE = {
+    "users": 50,
+    "role_mix": (0.6, 0.3, 0.1),           # QC_ANALYST, QA_REVIEWER, SYS_ADMIN 비율
+    "workstations": 0,                     # 0이면 Workstation 컬럼 없음
+    "events_per_record": 12,               # RecordID당 평균 이벤트 수
+    "record_interval": 60.0,               # RecordID 생성 간격 평균(초)
+    "event_gap": 900.0,                    # 같은 RecordID 안 이벤트 간격 평균(초)
+    "clock_jitter": 2.0,                   # 정상 시계 오차 표준편차(초)
+    "drifting_user_rate": 0.05,            # 시계가 체계적으로 어긋난 사용자 비율 (90~600초)
+    "time_sync_rate": 0.002,               # 개별 행의 시간 급변(150~900초) 비율
+    "missing_reason_rate": 0.02,           # MODIFY/CHANGE_STATUS 사유 누락 비율
+    "boilerplate_user_rate": 0.1,          # 상투적 사유를 습관적으로 쓰는 사용자 비율
+    "boilerplate_variant_rate": 0.3,       # 상투적 사유 중 표기 변형(대소문자, 오타 등)으로 쓰는 비율
+    "role_misuse_rate": 0.01,              # RAW_DATA_PROCESS를 QA_REVIEWER가 수행하는 비율
+    "pre_injection_rate": 0.005,           # RUN_START 전에 RAW_DATA_PROCESS가 있는 RecordID 비율
+    "abort_rate": 0.02,                    # ABORT가 포함된 RecordID 비율
+    "abort_unpreserved_rate": 0.3,         # 그중 보존(PRESERVE/ARCHIVE) 이벤트가 없는 비율
+}
+
+
+def boilerplate_variants(phrase):
+    """
+    상투적 사유 하나의 표기 변형(소문자, 대문자, 마침표, 글자 하나 누락, 덧붙인 말)을 BOILERPLATE_VARIANTS개 만듭니다.
+    """
+    middle = len(phrase) // 2
+    return [phrase.lower(), phrase.upper(), f'{phrase}.', phrase[:middle] + phrase[middle + 1:],
+            f'{phrase} - see comment', f'{phrase} (per QA)']
+
+
+def _reason_table():
+    """
+    사유 문자열 목록과 행위별 사유 코드 범위(시작, 개수)를 반환합니다.
+    상투적 사유의 표기 변형은 사유마다 BOILERPLATE_VARIANTS개씩 이어서 배치합니다.
+    """
+    texts = []
+    ranges = {}
+    for action, reasons in ACTION_REASONS.items():
+        ranges[action] = (len(texts), len(reasons))
+        texts.extend(reasons)
+    ranges['boilerplate'] = (len(texts), len(BOILERPLATE_REASONS))
+    texts.extend(BOILERPLATE_REASONS)
+    ranges['boilerplate_variants'] = (len(texts), BOILERPLATE_VARIANTS)
+    for phrase in BOILERPLATE_REASONS:
+        texts.extend(boilerplate_variants(phrase))
+    return texts, ranges
+
+
+def make_users(rng, users, role_mix, workstations=0):
+    """
+    사용자 표(UserID, 역할 코드, 기준 시계 오차, 상투적 사유 습관, 워크스테이션)를 만듭니다.
+    역할마다 최소 1명을 두며 UserID는 역할 접두어 + 일련번호입니다 (예: A001, B002).
+    """
+    users = max(users, len(ROLES))
+    counts = np.maximum(1, np.floor(np.asarray(role_mix) / np.sum(role_mix) * users).astype(int))
+    counts[0] += users - counts.sum()
+    roles = np.repeat(np.arange(len(ROLES)), counts)
+    ids = np.array([f'{ROLE_PREFIXES[role]}{i:03d}' for i, role in enumerate(roles, start=1)])
+    return {"ids": ids, "roles": roles, "workstations": (
+        np.array([f'WS-{k:02d}' for k in rng.integers(1, workstations + 1, len(ids))]) if workstations else None
+    )}
+
+
+def _user_traits(rng, users, profile):
+    n = len(users["ids"])
+    offset = rng.normal(0, profile["clock_jitter"], n)
+    drifting = rng.random(n) < profile["drifting_user_rate"]
+    offset[drifting] = rng.choice([-1, 1], drifting.sum()) * rng.uniform(90, 600, drifting.sum())
+    return {
+        **users,
+        "base_offset": offset,
+        "boilerplate": rng.random(n) < profile["boilerplate_user_rate"],
+        "by_role": [np.flatnonzero(users["roles"] == role) for role in range(len(ROLES))],
+    }
+
+
+def _lifecycle_chunk(rng, n_records, first_record, window_start, users, profile, reasons):
+    """
+    n_records개 RecordID의 전체 이벤트를 만들어 (서버 시각 정렬 전) 컬럼 배열 dict로 반환합니다.
+    """
+    lengths = 3 + rng.poisson(max(profile["events_per_record"] - 3, 0), n_records)
+    total = int(lengths.sum())
+    record = np.repeat(np.arange(n_records), lengths)
+    first = np.cumsum(lengths) - lengths
+    pos = np.arange(total) - first[record]
+
+    # 서버 시각: RecordID 시작 시각 + 이벤트 간격 누적
+    starts = window_start + np.sort(rng.uniform(0, n_records * profile["record_interval"], n_records))
+    gaps = rng.exponential(profile["event_gap"], total)
+    gaps[pos == 0] = 0.0
+    elapsed = np.cumsum(gaps)
+    server = np.floor(starts[record] + elapsed - (elapsed[first] - gaps[first])[record]).astype(np.int64)
+
+    # 행위: CREATE, RUN_START 이후 가중 무작위
+    action = BODY_ACTIONS[rng.choice(len(BODY_ACTIONS), total, p=BODY_WEIGHTS)]
+    action[pos == 0] = CREATE
+    action[pos == 1] = RUN_START
+
+    pre_injection = rng.random(n_records) < profile["pre_injection_rate"]
+    action[pre_injection[record] & (pos == 1)] = RAW_DATA_PROCESS
+    action[pre_injection[record] & (pos == 2)] = RUN_START
+
+    aborted = (rng.random(n_records) < profile["abort_rate"]) & (lengths >= 4) & ~pre_injection
+    abort_pos = 2 + np.floor(rng.random(n_records) * np.maximum(lengths - 3, 1)).astype(np.int64)
+    unpreserved = aborted & (rng.random(n_records) < profile["abort_unpreserved_rate"])
+    after_abort = aborted[record] & (pos > abort_pos[record])
+    action[aborted[record] & (pos == abort_pos[record])] = ABORT
+    action[after_abort & ~unpreserved[record] & (pos == abort_pos[record] + 1)] = PRESERVE
+    action[after_abort & unpreserved[record] & np.isin(action, [PRESERVE, ARCHIVE])] = REVIEW
+
+    # 사용자: RecordID 담당 분석자/검토자, 상태 변경 일부와 보관은 관리자
+    analysts, reviewers, admins = users["by_role"]
+    owner = analysts[rng.integers(0, len(analysts), n_records)][record]
+    reviewer = reviewers[rng.integers(0, len(reviewers), n_records)][record]
+    admin = admins[rng.integers(0, len(admins), total)]
+    user = owner.copy()
+    by_reviewer = np.isin(action, [REVIEW, CHANGE_STATUS])
+    by_reviewer |= (action == RAW_DATA_PROCESS) & (rng.random(total) < profile["role_misuse_rate"])
+    user[by_reviewer] = reviewer[by_reviewer]
+    by_admin = (action == ARCHIVE) | ((action == CHANGE_STATUS) & (rng.random(total) < 0.2))
+    user[by_admin] = admin[by_admin]
+
+    # 클라이언트 시각: 사용자 기준 오차 + 행별 오차 + 일부 급변
+    offset = users["base_offset"][user] + rng.normal(0, profile["clock_jitter"], total)
+    spikes = rng.random(total) < profile["time_sync_rate"]
+    offset[spikes] += rng.choice([-1, 1], spikes.sum()) * rng.uniform(150, 900, spikes.sum())
+    client = server - np.round(offset).astype(np.int64)
+
+    # 변경 사유: 행위별 사유, 상투적 사유 습관, 누락(-1 → 빈 값)
+    reason = np.empty(total, dtype=np.int64)
+    for code, (start, count) in ((code, reasons[code]) for code in ACTION_REASONS):
+        rows = action == code
+        reason[rows] = start + rng.integers(0, count, rows.sum())
+    changes = np.isin(action, [MODIFY, CHANGE_STATUS])
+    habit = np.where(users["boilerplate"][user], 0.8, 0.02)
+    boilerplate = changes & (rng.random(total) < habit)
+    start, count = reasons['boilerplate']
+    phrase = rng.integers(0, count, boilerplate.sum())
+    variant_start, variants = reasons['boilerplate_variants']
+    varied = rng.random(len(phrase)) < profile["boilerplate_variant_rate"]
+    reason[boilerplate] = np.where(varied, variant_start + phrase * variants + rng.integers(0, variants, len(phrase)),
+                                   start + phrase)
+    reason[changes & (rng.random(total) < profile["missing_reason_rate"])] = -1
+
+    columns = {
+        "server": server,
+        "client": client,
+        "user": user,
+        "action": action,
+        "record": first_record + record,
+        "reason": reason,
+    }
+    if users["workstations"] is not None:
+        # 대부분 자기 워크스테이션, 10%는 다른 사용자의 워크스테이션
+        shared = rng.random(total) < 0.1
+        columns["workstation"] = np.where(shared, rng.integers(0, len(users["ids"]), total), user)
+    return columns
+
+
+def _to_frame(columns, users, reason_texts):
+    """
+    정렬된 컬럼 배열을 Audit Trail 스키마의 DataFrame으로 변환합니다.
+    """
+    records = np.unique(columns["record"])
+    record_codes = np.searchsorted(records, columns["record"])
+    df = pd.DataFrame({
+        'TimeStamp(Server)': columns["server"].astype('datetime64[s]'),
+        'ActionTime(Client)': columns["client"].astype('datetime64[s]'),
+        'UserID': pd.Categorical.from_codes(columns["user"], users["ids"]),
+        'Role': pd.Categorical.from_codes(users["roles"][columns["user"]], ROLES),
+        'ActionType': pd.Categorical.from_codes(columns["action"], ACTIONS),
+        'RecordID': pd.Categorical.from_codes(record_codes, [f'BATCH_{i:07d}' for i in records]),
+        'ReasonForChange': pd.Categorical.from_codes(columns["reason"], reason_texts),
+    })
+    if "workstation" in columns:
+        df[WORKSTATION_COLUMN] = users["workstations"][columns["workstation"]]
+    return df
+
+
+def generate_audit_chunks(rows, seed=0, chunk_rows=GENERATOR_CHUNK_ROWS, start=GENERATOR_START, **profile):
+    """
+    합성 Audit Trail을 서버 시각 순서의 DataFrame 청크로 생성합니다 (전체 rows행).
+    profile 키워드는 DEFAULT_PROFILE 값을 덮어씁니다. 같은 seed와 인자는 같은 로그를 만듭니다.
+    RecordID는 시간 창 단위로 만들고, 창 끝을 넘어선 이벤트는 다음 청크와 합쳐 정렬하므로
+    청크 사이에서도 서버 시각 순서가 유지됩니다.
+    """
+    unknown = set(profile) - set(DEFAULT_PROFILE)
+    if unknown:
+        raise ValueError(f"알 수 없는 생성 옵션: {', '.join(sorted(unknown))}")
+    profile = {**DEFAULT_PROFILE, **profile}
+    rng = np.random.default_rng(seed)
+    users = _user_traits(rng, make_users(rng, profile["users"], profile["role_mix"], profile["workstations"]), profile)
+    reason_texts, reason_ranges = _reason_table()
+
+    window_start = pd.Timestamp(start).value // 10**9
+    pending = None
+    next_record = 1
+    emitted = 0
+    while emitted < rows:
+        n_records = max(1, chunk_rows // profile["events_per_record"])
+        columns = _lifecycle_chunk(rng, n_records, next_record, window_start, users, profile, reason_ranges)
+        next_record += n_records
+        window_start += int(n_records * profile["record_interval"])
+        if pending is not None:
+            columns = {key: np.concatenate([pending[key], columns[key]]) for key in columns}
+        order = np.argsort(columns["server"], kind='stable')
+        columns = {key: values[order] for key, values in columns.items()}
+
+        # 다음 창보다 늦은 이벤트는 다음 청크로 넘깁니다 (마지막 청크는 모두 내보냄).
+        generated = emitted + len(columns["server"])
+        cut = len(columns["server"]) if generated >= rows else int(np.searchsorted(columns["server"], window_start))
+        cut = min(cut, rows - emitted)
+        pending = {key: values[cut:] for key, values in columns.items()}
+        if cut:
+            emitted += cut
+            yield _to_frame({key: values[:cut] for key, values in columns.items()}, users, reason_texts)
+
+
+def generate_audit_trail(rows, seed=0, **profile):
+    """
+    합성 Audit Trail 전체를 DataFrame 하나로 반환합니다 (작은 규모용).
+    """
+    chunks = list(generate_audit_chunks(rows, seed, **profile))
+    if not chunks:
+        return pd.DataFrame(columns=OUTPUT_COLUMNS)
+    df = pd.concat(chunks, ignore_index=True)
+    df['RecordID'] = df['RecordID'].astype('category')  # 청크마다 범주가 달라 concat 후 object가 됨
+    return df
+
+
+def write_audit_trail(path, rows, seed=0, chunk_rows=GENERATOR_CHUNK_ROWS, progress=None, **profile):
+    """
+    합성 Audit Trail을 청크 단위로 CSV에 기록하고 기록한 행 수를 반환합니다.
+    progress(written, rows) 콜백으로 진행 상황을 알립니다.
+    """
+    written = 0
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for chunk in generate_audit_chunks(rows, seed, chunk_rows, **profile):
+            chunk.to_csv(f, header=written == 0, index=False, date_format=AUDIT_TIME_FORMAT, lineterminator='\n')
+            written += len(chunk)
+            if progress is not None:
+                progress(written, rows)
+    if not written:
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(','.join(OUTPUT_COLUMNS) + '\n')
+    return written
+
+
+def main(argv=None):
+    """
+    합성 Audit Trail CSV를 생성합니다.
+    """
+    parser = argparse.ArgumentParser(description='합성 Audit Trail 생성기')
+    parser.add_argument('rows', type=int, help='생성할 행 수')
+    parser.add_argument('output', help='출력 CSV 경로')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunk-rows', type=int, default=GENERATOR_CHUNK_ROWS)
+    for name, default in DEFAULT_PROFILE.items():
+        if name == 'role_mix':
+            parser.add_argument('--role-mix', type=float, nargs=3, default=default,
+                                metavar=('ANALYST', 'REVIEWER', 'ADMIN'), help='역할 비율')
+        else:
+            parser.add_argument(f'--{name.replace("_", "-")}', type=type(default), default=default)
+    args = vars(parser.parse_args(argv))
+    path, rows, seed, chunk_rows = args.pop('output'), args.pop('rows'), args.pop('seed'), args.pop('chunk_rows')
+
+    written = write_audit_trail(
+        path, rows, seed, chunk_rows,
+        progress=lambda done, total: print(f"\r{done:,} / {total:,}행", end='', file=sys.stderr),
+        **args,
+    )
+    print(f"\n{path}: {written:,}행 생성 완료", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
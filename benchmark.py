@@ -0,0 +1,280 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from audit_analysis import (
+    DI_RULES, HAS_PYARROW, MASK_COLUMN, add_derived_columns, apply_schema, clock_drift_summary, evaluate_rules,
+    filter_audit_rows, format_for_display, merge_drift_summaries, read_audit_csv, reason_quality_summary,
+    reason_usage_partial, rule_hit_counts, scan_audit_trail, store_analysis, user_id_options,
+)
+from audit_generator import write_audit_trail
+from load_test import current_rss_mb
+
+# ==============================================================================
+# 모듈 2 분석 벤치마크
+# ==============================================================================
+# 합성 Audit Trail(10k / 1M / 10M행)로 분석 파이프라인의 단계별 처리 시간, 처리량(행/초),
+# 최대 메모리(RSS)를 측정합니다. 결과를 JSON으로 저장하고 이전 결과(baseline)와 비교하여
+# 허용 범위를 넘는 성능 저하가 있으면 종료 코드 1을 반환하므로 회귀 검사에 사용할 수 있습니다.
+#
+# 실행: python benchmark.py [--sizes 10k 1m 10m] [--output 결과.json] [--baseline 이전.json]
+# 생성한 데이터셋은 BENCH_DATA_DIR에 보관하여 다음 실행에서 재사용합니다.
+
+BENCH_SIZES = {'10k': 10_000, '1m': 1_000_000, '10m': 10_000_000}
+BENCH_DATA_DIR = '.bench_data'
+BENCH_PAGE_SIZE = 200  # 뷰어의 최대 페이지 크기
+RSS_SAMPLE_SECONDS = 0.005
+REGRESSION_TOLERANCE = 0.25  # baseline 대비 25% 이상 느려지거나 메모리가 늘면 회귀
+REGRESSION_MIN_SECONDS = 0.05  # 이보다 짧은 단계는 측정 잡음이 커서 시간 회귀 판정에서 제외
+
+
+def dataset_path(rows, seed=0, data_dir=BENCH_DATA_DIR):
+    """
+    행 수와 seed로 정해지는 벤치마크 데이터셋 경로입니다.
+    """
+    return os.path.join(data_dir, f'audit_{rows}_{seed}.csv')
+
+
+def ensure_dataset(rows, seed=0, data_dir=BENCH_DATA_DIR):
+    """
+    벤치마크 데이터셋이 없으면 합성 생성기로 만들고 경로를 반환합니다.
+    """
+    path = dataset_path(rows, seed, data_dir)
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        started = time.perf_counter()
+        write_audit_trail(tmp_path, rows, seed)
+        os.replace(tmp_path, path)
+        print(f"데이터셋 생성: {path} ({time.perf_counter() - started:.1f}초)", file=sys.stderr)
+    return path
+
+
+def _max_rss_mb():
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+@contextlib.contextmanager
+def track_peak_rss(interval=RSS_SAMPLE_SECONDS):
+    """
+    블록 실행 중의 최대 RSS(MB)를 측정합니다. 결과 dict의 start_mb/peak_mb는 블록이 끝난 뒤 채워집니다.
+    백그라운드 스레드의 주기적 샘플링에, 프로세스 최고치(ru_maxrss)가 블록 안에서 갱신된 경우 그 값을 더해
+    짧은 순간의 최고치도 놓치지 않습니다.
+    """
+    result = {"start_mb": current_rss_mb()}
+    samples = [result["start_mb"]]
+    max_before = _max_rss_mb()
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(interval):
+            samples.append(current_rss_mb())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        yield result
+    finally:
+        done.set()
+        sampler.join()
+        samples.append(current_rss_mb())
+        max_after = _max_rss_mb()
+        result["peak_mb"] = max(max(samples), max_after if max_after > max_before else 0)
+
+
+def run_stage(stages, name, rows, func, *args, **kwargs):
+    """
+    단계 하나를 실행하여 시간, 처리량, 최대 RSS와 단계 중 증가분을 stages에 추가하고 func의 결과를 반환합니다.
+    """
+    with track_peak_rss() as rss:
+        started = time.perf_counter()
+        result = func(*args, **kwargs)
+        seconds = time.perf_counter() - started
+    stages.append({
+        "stage": name,
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_second": rows / seconds if seconds > 0 else None,
+        "peak_rss_mb": rss["peak_mb"],
+        "delta_rss_mb": rss["peak_mb"] - rss["start_mb"],
+    })
+    return result
+
+
+def _display_page(df):
+    """
+    뷰어와 같은 방식으로 위반 행 첫 페이지를 화면 표시용으로 준비합니다 (st.dataframe 직렬화 포함).
+    """
+    positions = filter_audit_rows(df, violations_only=True)
+    page = format_for_display(df.iloc[positions[:BENCH_PAGE_SIZE]])
+    if HAS_PYARROW:
+        import pyarrow as pa
+        pa.Table.from_pandas(page)
+    return page
+
+
+def _export_flagged_csv(df, path):
+    flagged = format_for_display(df.iloc[filter_audit_rows(df, violations_only=True)])
+    flagged.to_csv(path, index=False, encoding='utf-8-sig')
+    return len(flagged)
+
+
+def benchmark_full(path, rows, work_dir):
+    """
+    파일 전체를 메모리에 올리는 분석 경로(모듈 2 기본 경로)를 단계별로 측정합니다.
+    """
+    stages = []
+    df = run_stage(stages, 'load', rows, read_audit_csv, path)
+    run_stage(stages, 'parse_timestamps', rows, apply_schema, df)
+    run_stage(stages, 'derive_columns', rows, add_derived_columns, df)
+    for rule in DI_RULES:
+        run_stage(stages, f'rule:{rule["id"]}', rows, rule["predicate"], df, {})
+    df[MASK_COLUMN] = run_stage(stages, 'evaluate_rules', rows, evaluate_rules, df)
+    analysis = {
+        "df": df,
+        "rule_counts": rule_hit_counts(df[MASK_COLUMN]),
+        "user_ids": user_id_options(df),
+        "drift_summary": run_stage(stages, 'drift_summary', rows,
+                                   lambda: merge_drift_summaries([clock_drift_summary(df)])),
+        "reason_summary": run_stage(stages, 'reason_quality', rows,
+                                    lambda: reason_quality_summary([reason_usage_partial(df)])),
+    }
+    run_stage(stages, 'display_page', rows, _display_page, df)
+    run_stage(stages, 'export_flagged_csv', rows, _export_flagged_csv, df, os.path.join(work_dir, 'flagged.csv'))
+    if HAS_PYARROW:
+        run_stage(stages, 'export_result_store', rows, store_analysis, path, analysis,
+                  store_dir=os.path.join(work_dir, 'store'))
+    return stages, analysis["rule_counts"]
+
+
+def benchmark_streaming(path, rows):
+    """
+    청크 단위 스트리밍 분석 경로(대용량 파일)를 한 단계로 측정합니다.
+    """
+    stages = []
+    analysis = run_stage(stages, 'streaming_scan', rows, scan_audit_trail, path)
+    return stages, analysis["rule_counts"]
+
+
+def run_benchmark(sizes, seed=0, data_dir=BENCH_DATA_DIR, modes=('full', 'streaming')):
+    """
+    크기별로 데이터셋을 준비하고 분석 경로별 단계 측정 결과를 반환합니다.
+    같은 크기에서 경로별 규칙 탐지 건수가 다르면 오류로 처리합니다.
+    """
+    results = []
+    for size in sizes:
+        rows = BENCH_SIZES[size] if size in BENCH_SIZES else int(size)
+        path = ensure_dataset(rows, seed, data_dir)
+        counts = {}
+        for mode in modes:
+            work_dir = tempfile.mkdtemp(prefix='audit_bench_')
+            try:
+                if mode == 'full':
+                    stages, counts[mode] = benchmark_full(path, rows, work_dir)
+                else:
+                    stages, counts[mode] = benchmark_streaming(path, rows)
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+            results.extend({"size": size, "mode": mode, **stage} for stage in stages)
+        if len({json.dumps(c, sort_keys=True) for c in counts.values()}) > 1:
+            raise RuntimeError(f"분석 경로별 탐지 건수가 다릅니다 ({size}): {counts}")
+    return results
+
+
+def environment_info():
+    """
+    결과 파일에 함께 기록할 실행 환경 정보입니다.
+    """
+    info = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+    }
+    if HAS_PYARROW:
+        import pyarrow
+        info["pyarrow"] = pyarrow.__version__
+    return info
+
+
+def compare_to_baseline(results, baseline, tolerance=REGRESSION_TOLERANCE):
+    """
+    같은 (크기, 경로, 단계)의 baseline과 비교하여 시간 또는 메모리 증가분이 허용 범위를 넘은 항목을 반환합니다.
+    """
+    previous = {(r["size"], r["mode"], r["stage"]): r for r in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get((result["size"], result["mode"], result["stage"]))
+        if before is None:
+            continue
+        if (max(result["seconds"], before["seconds"]) >= REGRESSION_MIN_SECONDS
+                and result["seconds"] > before["seconds"] * (1 + tolerance)):
+            regressions.append({**result, "metric": "seconds", "before": before["seconds"], "after": result["seconds"]})
+        if (result["delta_rss_mb"] > before["delta_rss_mb"] * (1 + tolerance)
+                and result["delta_rss_mb"] - before["delta_rss_mb"] > 16):
+            regressions.append({**result, "metric": "delta_rss_mb", "before": before["delta_rss_mb"],
+                                "after": result["delta_rss_mb"]})
+    return regressions
+
+
+def results_table(results):
+    """
+    측정 결과를 표 문자열로 만듭니다.
+    """
+    lines = [f"{'size':<6}{'mode':<11}{'stage':<26}{'seconds':>10}{'rows/s':>14}{'peak MB':>10}{'+MB':>9}"]
+    for r in results:
+        throughput = f"{r['rows_per_second']:,.0f}" if r['rows_per_second'] else '-'
+        lines.append(f"{r['size']:<6}{r['mode']:<11}{r['stage']:<26}{r['seconds']:>10.3f}{throughput:>14}"
+                     f"{r['peak_rss_mb']:>10.1f}{r['delta_rss_mb']:>9.1f}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    """
+    벤치마크를 실행하여 결과 표를 출력하고, 필요하면 JSON 저장 및 baseline 비교를 수행합니다.
+    """
+    parser = argparse.ArgumentParser(description='모듈 2 Audit Trail 분석 벤치마크')
+    parser.add_argument('--sizes', nargs='+', default=['10k', '1m'],
+                        help=f"데이터 크기 ({', '.join(BENCH_SIZES)} 또는 행 수, 기본값: 10k 1m)")
+    parser.add_argument('--modes', nargs='+', choices=['full', 'streaming'], default=['full', 'streaming'])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir', default=BENCH_DATA_DIR, help='합성 데이터셋 보관 디렉터리')
+    parser.add_argument('--output', help='결과 JSON 저장 경로')
+    parser.add_argument('--baseline', help='비교할 이전 결과 JSON')
+    parser.add_argument('--tolerance', type=float, default=REGRESSION_TOLERANCE, help='허용 성능 저하 비율')
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.sizes, args.seed, args.data_dir, args.modes)
+    print(results_table(results))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"environment": environment_info(), "seed": args.seed, "results": results}, f,
+                      ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare_to_baseline(results, json.load(f)["results"], args.tolerance)
+        for r in regressions:
+            print(f"[회귀] {r['size']} {r['mode']} {r['stage']}: {r['metric']} {r['before']:.3f} → {r['after']:.3f}",
+                  file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
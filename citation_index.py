@@ -0,0 +1,222 @@
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import re
+import sys
+
+import numpy as np
+
+from regulatory_store import SNIPPET_PATH, load_citation_store, rank_citations
+
+# ==============================================================================
+# 규제 근거 벡터 검색 (모듈 1 Q&A, 오프라인 LanceDB 색인)
+# ==============================================================================
+# 규제 조항(원문/번역)을 문장 단위 청크로 나누어 로컬 임베딩 모델로 벡터화하고,
+# 로컬 LanceDB 테이블에 저장합니다. 색인 생성은 별도의 오프라인 단계이며
+# (python citation_index.py build), 앱은 만들어진 색인을 열어 질문과 가까운 조항 top-k만 조회합니다.
+# 임베딩 모델은 로컬 디렉터리에서 local_files_only=True로 읽으므로 모델 파일을 내려받지 않습니다.
+# lancedb/sentence-transformers(torch)는 벡터 검색을 실제로 사용할 때만 import하므로 앱 시작 비용이 없으며,
+# 설치되어 있지 않거나 색인이 없으면 키워드 색인 검색으로 대체합니다.
+
+INDEX_DIR = '.citation_index'
+TABLE_NAME = 'citations'
+EMBEDDING_MODEL_PATH = os.environ.get('EDU_EMBEDDING_MODEL', os.path.join('models', 'paraphrase-multilingual-MiniLM-L12-v2'))
+CHUNK_MAX_CHARS = 500
+VECTOR_INDEX_MIN_ROWS = 10_000  # 이 이상이면 IVF_PQ 근사 색인을 만듭니다 (작으면 전수 검색이 더 빠름)
+RETRIEVAL_TOP_K = 5
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?。])\s+')
+
+
+def vector_search_available():
+    """
+    lancedb와 sentence-transformers가 설치되어 있는지 import하지 않고 확인합니다.
+    """
+    return all(importlib.util.find_spec(name) is not None for name in ('lancedb', 'sentence_transformers'))
+
+
+def citation_chunks(store, max_chars=CHUNK_MAX_CHARS):
+    """
+    조항 원문(en)과 번역(ko)을 문장 경계에서 max_chars 이하 청크로 나눕니다.
+    각 청크에는 코드와 언어가 함께 기록되어 검색 결과를 조항 단위로 합칠 수 있습니다.
+    """
+    chunks = []
+    for code, citation in store["citations"].items():
+        for lang in ('en', 'ko'):
+            current = ''
+            for sentence in SENTENCE_BOUNDARY.split(citation[lang].strip()):
+                if current and len(current) + len(sentence) + 1 > max_chars:
+                    chunks.append({"code": code, "lang": lang, "text": current})
+                    current = sentence
+                else:
+                    current = f'{current} {sentence}'.strip()
+            if current:
+                chunks.append({"code": code, "lang": lang, "text": current})
+    return chunks
+
+
+def corpus_version(chunks, model_path=EMBEDDING_MODEL_PATH):
+    """
+    청크 내용과 임베딩 모델 경로로 만든 색인 버전 문자열입니다 (쿼리 캐시 키로 사용).
+    """
+    digest = hashlib.sha1(os.path.basename(os.path.normpath(model_path)).encode('utf-8'))
+    for chunk in chunks:
+        digest.update(f'{chunk["code"]}\x1f{chunk["lang"]}\x1f{chunk["text"]}\x1e'.encode('utf-8'))
+    return digest.hexdigest()[:12]
+
+
+def load_embedding_model(model_path=EMBEDDING_MODEL_PATH):
+    """
+    로컬 경로의 문장 임베딩 모델을 읽습니다 (local_files_only=True, 내려받지 않음).
+    huggingface_hub는 import할 때 HF_HUB_OFFLINE을 읽으므로 sentence_transformers를 처음 import하기 직전에 설정합니다
+    (운영자가 직접 지정한 값은 그대로 둠).
+    """
+    if not os.path.isdir(model_path):
+        raise FileNotFoundError(f"로컬 임베딩 모델이 없습니다: {model_path}")
+    os.environ.setdefault('HF_HUB_OFFLINE', '1')
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_path, device='cpu', local_files_only=True)
+
+
+def embed_texts(model, texts, batch_size=64):
+    """
+    정규화된 float32 임베딩 행렬을 반환합니다 (코사인 유사도 = 내적).
+    """
+    return model.encode(list(texts), batch_size=batch_size, normalize_embeddings=True,
+                        convert_to_numpy=True, show_progress_bar=False).astype(np.float32)
+
+
+def _meta_path(index_dir):
+    return os.path.join(index_dir, 'index_meta.json')
+
+
+def build_citation_index(store, model_path=EMBEDDING_MODEL_PATH, index_dir=INDEX_DIR, model=None):
+    """
+    규제 조항 청크를 임베딩하여 LanceDB 테이블을 (덮어쓰기로) 만들고 색인 메타데이터를 반환합니다.
+    model을 지정하면 model_path 대신 해당 임베딩 모델(encode() 제공)을 사용합니다.
+    """
+    import lancedb
+    import pyarrow as pa
+
+    chunks = citation_chunks(store)
+    model = model or load_embedding_model(model_path)
+    vectors = embed_texts(model, [chunk["text"] for chunk in chunks])
+
+    data = pa.table({
+        "code": [chunk["code"] for chunk in chunks],
+        "lang": [chunk["lang"] for chunk in chunks],
+        "text": [chunk["text"] for chunk in chunks],
+        "vector": pa.FixedSizeListArray.from_arrays(pa.array(vectors.ravel()), vectors.shape[1]),
+    })
+    table = lancedb.connect(index_dir).create_table(TABLE_NAME, data=data, mode='overwrite')
+    if len(chunks) >= VECTOR_INDEX_MIN_ROWS:
+        table.create_index(
+            metric='cosine',
+            vector_column_name='vector',
+            num_partitions=max(1, int(np.sqrt(len(chunks)))),
+            num_sub_vectors=max(1, vectors.shape[1] // 8),
+        )
+
+    meta = {
+        "version": corpus_version(chunks, model_path),
+        "model": os.path.abspath(model_path),
+        "chunks": len(chunks),
+        "dimension": int(vectors.shape[1]),
+    }
+    with open(_meta_path(index_dir), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    return meta
+
+
+def open_citation_retriever(model_path=EMBEDDING_MODEL_PATH, index_dir=INDEX_DIR, store=None, model=None):
+    """
+    만들어진 색인과 임베딩 모델을 엽니다. 사용할 수 없으면 None을 반환합니다 (키워드 검색으로 대체).
+    반환값은 {"model", "table", "meta"} dict이며 프로세스 전체에서 공유하도록 캐싱하여 사용합니다.
+    store를 지정하면 색인 생성 이후 조항이 바뀌었는지 meta["stale"]에 기록합니다.
+    색인 메타데이터가 없으면 lancedb/모델을 import하지 않고 바로 None을 반환합니다.
+    """
+    if not os.path.isfile(_meta_path(index_dir)):
+        return None
+    if model is None and not vector_search_available():
+        return None
+    try:
+        import lancedb
+        with open(_meta_path(index_dir), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        table = lancedb.connect(index_dir).open_table(TABLE_NAME)
+        model = model or load_embedding_model(model_path)
+    except (ImportError, FileNotFoundError, ValueError, OSError):
+        return None
+    if store is not None:
+        meta["stale"] = meta["version"] != corpus_version(citation_chunks(store), model_path)
+    return {"model": model, "table": table, "meta": meta}
+
+
+def retrieve_citations(retriever, store, question, k=RETRIEVAL_TOP_K):
+    """
+    질문과 가까운 조항 top-k를 (EN/KO 원문 포함) 유사도 순으로 반환합니다.
+    청크 단위로 검색한 뒤 조항별 최고 점수만 남깁니다. retriever가 None이면 키워드 검색 결과를 반환합니다.
+    """
+    if retriever is None:
+        return [{**citation, "score": None, "matched": None}
+                for citation in rank_citations(store, question, limit=k)]
+
+    vector = embed_texts(retriever["model"], [question])[0]
+    # 한 조항이 여러 청크로 나뉘므로 k보다 넉넉히 가져와 조항 단위로 합칩니다.
+    hits = (
+        retriever["table"].search(vector)
+        .distance_type('cosine')
+        .limit(k * 4)
+        .select(['code', 'text'])
+        .to_list()
+    )
+    results = {}
+    for hit in hits:
+        code = hit["code"]
+        citation = store["citations"].get(code)
+        if citation is None or code in results:
+            continue
+        results[code] = {**citation, "score": 1.0 - float(hit["_distance"]), "matched": hit["text"]}
+        if len(results) == k:
+            break
+    return list(results.values())
+
+
+def main(argv=None):
+    """
+    오프라인 색인 생성(build) 및 질문 검색(query) 명령을 실행합니다.
+    """
+    parser = argparse.ArgumentParser(description='규제 근거 벡터 색인 (오프라인)')
+    parser.add_argument('--snippets', default=SNIPPET_PATH, help='규제 스니펫 파일 경로')
+    parser.add_argument('--model', default=EMBEDDING_MODEL_PATH, help='로컬 임베딩 모델 디렉터리')
+    parser.add_argument('--index-dir', default=INDEX_DIR, help='LanceDB 색인 디렉터리')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('build', help='색인 생성')
+    query = commands.add_parser('query', help='질문으로 조항 검색')
+    query.add_argument('question')
+    query.add_argument('-k', type=int, default=RETRIEVAL_TOP_K)
+    args = parser.parse_args(argv)
+
+    if not vector_search_available():
+        print("lancedb 및 sentence-transformers가 설치되어 있어야 합니다.", file=sys.stderr)
+        return 1
+
+    store = load_citation_store(args.snippets)
+    if args.command == 'build':
+        meta = build_citation_index(store, args.model, args.index_dir)
+        print(f"색인 생성 완료: 청크 {meta['chunks']:,}개, 차원 {meta['dimension']}, 버전 {meta['version']}")
+        return 0
+
+    retriever = open_citation_retriever(args.model, args.index_dir)
+    if retriever is None:
+        print("색인이 없습니다. 먼저 'python citation_index.py build'를 실행하십시오.", file=sys.stderr)
+        return 1
+    for result in retrieve_citations(retriever, store, args.question, args.k):
+        print(f"[{result['score']:.3f}] {result['code']}: {result['en']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
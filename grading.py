@@ -0,0 +1,255 @@
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+# ==============================================================================
+# 시나리오 답안 채점 엔진 (모듈 1-2, 3-1, 3-2)
+# ==============================================================================
+# 각 시나리오의 판정 로직을 결정 테이블(decision table)로 정의합니다.
+# 규칙은 위에서부터 순서대로 평가되며 처음 일치한 규칙의 판정이 적용됩니다 (UI의 if/elif 순서와 동일).
+# grade_answers()는 답안 DataFrame을 받아 고유 답안 조합에 대해서만 규칙을 평가한 뒤
+# 행 단위로 펼치므로, 수십만 건의 제출 답안도 한 번에 채점할 수 있습니다.
+# Streamlit UI와 헤드리스 CLI(python grading.py answers.csv)가 같은 엔진을 사용합니다.
+
+NOT_SELECTED = '선택 안 함'
+ANY = None  # 결정 테이블 조건: 모든 값 허용
+
+VERDICT_CRITICAL = 'CRITICAL'
+VERDICT_WARNING = 'WARNING'
+VERDICT_PASS = 'PASS'
+VERDICT_INCOMPLETE = 'INCOMPLETE'      # 선택하지 않은 항목이 있음
+VERDICT_UNDETERMINED = 'UNDETERMINED'  # 일치하는 규칙 없음 (판정 보류)
+VERDICT_INVALID = 'INVALID'            # 보기에 없는 답안 값
+
+GRADE_COLUMNS = ['verdict', 'rule', 'citation']
+
+# ------------------------------------------------------------------------------
+# 보기 (UI selectbox 옵션과 공유)
+# ------------------------------------------------------------------------------
+MODEL_CHANGE_MINOR = 'v1.0 -> v1.1 (알고리즘 Minor 변경)'
+MODEL_CHANGE_MAJOR = 'v1.0 -> v1.2 (학습 데이터셋 Major 변경)'
+MODEL_VALIDATION_REDUCED = '재밸리데이션 범위가 Minor 변경에 맞춰 축소됨'
+MODEL_VALIDATION_FULL = '전체 기능에 대한 Full Validation이 계획됨'
+
+SYSTEM_LOGGING = '단순 데이터 로깅/저장 기능'
+SYSTEM_COMPLEX_LOGIC = '복잡한 Process Parameter 계산/결정 로직 포함'
+SYSTEM_NON_CRITICAL = '데이터 처리 로직은 있으나 비판적이지 않은 시스템'
+GAMP_CATEGORY_3 = 'Category 3 (Non-Configured Software)'
+GAMP_CATEGORY_4 = 'Category 4 (Configured Software)'
+GAMP_CATEGORY_5 = 'Category 5 (Custom Application)'
+
+QS_CUSTOM_ERP = 'Batch Record 관리용 Custom ERP'
+QS_EXCEL = 'CAPA/Complaint 기록용 Excel 스프레드시트'
+QS_FIRMWARE = '장비 제어용 펌웨어'
+QS_VALIDATION_FULL = 'Full Validation 수행'
+QS_VALIDATION_VENDOR = 'Vendor Qualification만 수행'
+QS_VALIDATION_NONE = '미수행 (상용 소프트웨어라 가정)'
+
+# ------------------------------------------------------------------------------
+# 결정 테이블
+# ------------------------------------------------------------------------------
+# answers: 답안 컬럼(UI 위젯 key와 동일) → 보기 목록
+# rules: {"id", "when": {컬럼: 허용 값 목록 또는 ANY}, "verdict", "citation"(REGULATORY_DATA 코드)}
+
+SCENARIOS = {
+    '1-2': {
+        "title": 'AI 모델 변경 관리 리스크 (Annex 22.10)',
+        "answers": {
+            'model_change_status': (NOT_SELECTED, MODEL_CHANGE_MINOR, MODEL_CHANGE_MAJOR),
+            'validation_status': (NOT_SELECTED, MODEL_VALIDATION_REDUCED, MODEL_VALIDATION_FULL),
+        },
+        "rules": [
+            {"id": 'M12_SCOPE_INSUFFICIENT', "verdict": VERDICT_CRITICAL, "citation": 'A22_10',
+             "when": {'model_change_status': [MODEL_CHANGE_MAJOR], 'validation_status': [MODEL_VALIDATION_REDUCED]}},
+            {"id": 'M12_SCOPE_ADEQUATE', "verdict": VERDICT_PASS, "citation": 'A22_10',
+             "when": {'model_change_status': [MODEL_CHANGE_MINOR], 'validation_status': [MODEL_VALIDATION_REDUCED, MODEL_VALIDATION_FULL]}},
+            {"id": 'M12_SCOPE_ADEQUATE', "verdict": VERDICT_PASS, "citation": 'A22_10',
+             "when": {'model_change_status': [MODEL_CHANGE_MAJOR], 'validation_status': [MODEL_VALIDATION_FULL]}},
+            {"id": 'M12_INCOMPLETE', "verdict": VERDICT_INCOMPLETE, "citation": None,
+             "when": {'model_change_status': [NOT_SELECTED], 'validation_status': ANY}},
+            {"id": 'M12_INCOMPLETE', "verdict": VERDICT_INCOMPLETE, "citation": None,
+             "when": {'model_change_status': ANY, 'validation_status': [NOT_SELECTED]}},
+        ],
+    },
+    '3-1': {
+        "title": 'GAMP 5 Category 분류 일치',
+        "answers": {
+            'system_type_gamp': (NOT_SELECTED, SYSTEM_LOGGING, SYSTEM_COMPLEX_LOGIC, SYSTEM_NON_CRITICAL),
+            'validation_category_gamp': (NOT_SELECTED, GAMP_CATEGORY_3, GAMP_CATEGORY_4, GAMP_CATEGORY_5),
+        },
+        "rules": [
+            {"id": 'M31_CATEGORY_UNDERESTIMATED', "verdict": VERDICT_CRITICAL, "citation": 'GAMP5_CriticalThinking',
+             "when": {'system_type_gamp': [SYSTEM_COMPLEX_LOGIC], 'validation_category_gamp': [GAMP_CATEGORY_3, GAMP_CATEGORY_4]}},
+            {"id": 'M31_CATEGORY_OVERAPPLIED', "verdict": VERDICT_WARNING, "citation": 'GAMP5_RiskBased',
+             "when": {'system_type_gamp': [SYSTEM_LOGGING], 'validation_category_gamp': [GAMP_CATEGORY_5]}},
+            {"id": 'M31_CATEGORY_MATCHED', "verdict": VERDICT_PASS, "citation": 'GAMP5_RiskBased',
+             "when": {'system_type_gamp': [SYSTEM_LOGGING], 'validation_category_gamp': [GAMP_CATEGORY_3, GAMP_CATEGORY_4]}},
+            {"id": 'M31_CATEGORY_MATCHED', "verdict": VERDICT_PASS, "citation": 'GAMP5_RiskBased',
+             "when": {'system_type_gamp': [SYSTEM_COMPLEX_LOGIC], 'validation_category_gamp': [GAMP_CATEGORY_5]}},
+            {"id": 'M31_INCOMPLETE', "verdict": VERDICT_INCOMPLETE, "citation": None,
+             "when": {'system_type_gamp': [NOT_SELECTED], 'validation_category_gamp': ANY}},
+            {"id": 'M31_INCOMPLETE', "verdict": VERDICT_INCOMPLETE, "citation": None,
+             "when": {'system_type_gamp': ANY, 'validation_category_gamp': [NOT_SELECTED]}},
+        ],
+    },
+    '3-2': {
+        "title": 'QS 소프트웨어 Validation 리스크 (21 CFR 820.70(i))',
+        "answers": {
+            'qs_tool_gamp': (NOT_SELECTED, QS_CUSTOM_ERP, QS_EXCEL, QS_FIRMWARE),
+            'validation_status_qs': (NOT_SELECTED, QS_VALIDATION_FULL, QS_VALIDATION_VENDOR, QS_VALIDATION_NONE),
+        },
+        "rules": [
+            {"id": 'M32_QS_NOT_VALIDATED', "verdict": VERDICT_CRITICAL, "citation": '21_CFR_820_70_I',
+             "when": {'qs_tool_gamp': [QS_EXCEL], 'validation_status_qs': [QS_VALIDATION_NONE]}},
+            {"id": 'M32_INCOMPLETE', "verdict": VERDICT_INCOMPLETE, "citation": None,
+             "when": {'qs_tool_gamp': [NOT_SELECTED], 'validation_status_qs': ANY}},
+            {"id": 'M32_INCOMPLETE', "verdict": VERDICT_INCOMPLETE, "citation": None,
+             "when": {'qs_tool_gamp': ANY, 'validation_status_qs': [NOT_SELECTED]}},
+            {"id": 'M32_QS_ADEQUATE', "verdict": VERDICT_PASS, "citation": '21_CFR_820_70_I',
+             "when": {'qs_tool_gamp': ANY, 'validation_status_qs': ANY}},
+        ],
+    },
+}
+
+
+def answer_options(scenario, column):
+    """
+    UI selectbox에 사용할 답안 보기 목록을 반환합니다.
+    """
+    return SCENARIOS[scenario]["answers"][column]
+
+
+def _match_rules(scenario, combos):
+    """
+    답안 조합 DataFrame의 각 행에 대해 처음 일치하는 규칙의 위치(없으면 -1)를 반환합니다.
+    """
+    rule_index = np.full(len(combos), -1, dtype=np.int64)
+    for position, rule in enumerate(SCENARIOS[scenario]["rules"]):
+        hits = rule_index == -1
+        for column, allowed in rule["when"].items():
+            if allowed is not ANY:
+                hits &= combos[column].isin(allowed).to_numpy()
+        rule_index[hits] = position
+    return rule_index
+
+
+def _factorize_answers(df, columns):
+    """
+    답안 컬럼별로 factorize한 코드를 하나의 조합 코드로 합쳐 (행별 조합 코드, 고유 조합 DataFrame)을 반환합니다.
+    빈 값/결측은 '선택 안 함'으로 취급합니다.
+    """
+    column_codes = []
+    column_values = []
+    for column in columns:
+        col_codes, col_uniques = pd.factorize(df[column])
+        values = np.append(np.asarray(col_uniques, dtype=object), NOT_SELECTED)
+        values[pd.isna(values) | (values == '')] = NOT_SELECTED
+        col_codes[col_codes < 0] = len(values) - 1
+        column_codes.append(col_codes)
+        column_values.append(values)
+    shape = tuple(len(values) for values in column_values)
+    combined = np.ravel_multi_index(column_codes, shape) if len(df) else np.zeros(0, dtype=np.int64)
+    unique_combined, codes = np.unique(combined, return_inverse=True)
+    unravelled = np.unravel_index(unique_combined, shape)
+    combos = pd.DataFrame({column: values[index] for column, values, index in zip(columns, column_values, unravelled)})
+    return codes.reshape(-1), combos
+
+
+def grade_answers(df, scenario):
+    """
+    답안 DataFrame을 채점하여 같은 인덱스의 (verdict, rule, citation) DataFrame을 반환합니다.
+    고유 답안 조합에 대해서만 결정 테이블을 평가한 뒤 코드 배열로 펼치므로 행 수에 선형입니다.
+    보기에 없는 값이 포함된 답안은 INVALID, 일치하는 규칙이 없으면 UNDETERMINED로 판정합니다.
+    """
+    spec = SCENARIOS[scenario]
+    columns = list(spec["answers"])
+    missing = [col for col in columns if col not in df.columns]
+    if missing:
+        raise ValueError(f"시나리오 {scenario} 답안 컬럼 누락: {', '.join(missing)}")
+
+    codes, combos = _factorize_answers(df, columns)
+    rule_index = _match_rules(scenario, combos)
+    # 조합별 결과 위치: 규칙 위치, 일치 규칙 없음(len(rules)), 보기에 없는 값(len(rules) + 1)
+    rules = spec["rules"]
+    outcome = np.where(rule_index >= 0, rule_index, len(rules))
+    valid = np.ones(len(combos), dtype=bool)
+    for column, options in spec["answers"].items():
+        valid &= combos[column].isin(options).to_numpy()
+    outcome[~valid] = len(rules) + 1
+    row_outcome = outcome[codes]
+
+    return pd.DataFrame({
+        "verdict": _outcome_categorical([rule["verdict"] for rule in rules] + [VERDICT_UNDETERMINED, VERDICT_INVALID], row_outcome),
+        "rule": _outcome_categorical([rule["id"] for rule in rules] + [None, None], row_outcome),
+        "citation": _outcome_categorical([rule["citation"] for rule in rules] + [None, None], row_outcome),
+    }, index=df.index)
+
+
+def _outcome_categorical(values, row_outcome):
+    # 결과 위치별 값(작은 목록)을 category 코드로 바꾼 뒤 행 단위로 펼칩니다 (문자열 배열을 만들지 않음).
+    value_codes, categories = pd.factorize(pd.Series(values, dtype=object))
+    return pd.Categorical.from_codes(value_codes[row_outcome], categories=categories)
+
+
+def grade_answer(scenario, **answers):
+    """
+    답안 한 건을 채점하여 {verdict, rule, citation} dict를 반환합니다 (UI에서 사용).
+    """
+    graded = grade_answers(pd.DataFrame([answers]), scenario)
+    row = graded.iloc[0]
+    return {column: (row[column] if pd.notna(row[column]) else None) for column in GRADE_COLUMNS}
+
+
+def grade_submissions(df):
+    """
+    답안 컬럼이 모두 있는 시나리오를 전부 채점하여 '{시나리오}_verdict' 등의 컬럼을 덧붙인 DataFrame을 반환합니다.
+    """
+    graded = [df]
+    for scenario, spec in SCENARIOS.items():
+        if all(column in df.columns for column in spec["answers"]):
+            graded.append(grade_answers(df, scenario).add_prefix(f'{scenario}_'))
+    if len(graded) == 1:
+        raise ValueError("채점할 수 있는 시나리오 답안 컬럼이 없습니다.")
+    return pd.concat(graded, axis=1)
+
+
+def verdict_summary(graded):
+    """
+    채점 결과에서 시나리오별·판정별 건수를 집계합니다.
+    """
+    rows = []
+    for scenario in SCENARIOS:
+        column = f'{scenario}_verdict'
+        if column in graded.columns:
+            counts = graded[column].value_counts(sort=False)
+            rows.extend({"scenario": scenario, "verdict": verdict, "count": int(count)}
+                        for verdict, count in counts.items() if count)
+    return pd.DataFrame(rows, columns=['scenario', 'verdict', 'count'])
+
+
+def main(argv=None):
+    """
+    제출 답안 CSV를 일괄 채점하여 결과 CSV와 판정별 요약을 출력합니다.
+    """
+    parser = argparse.ArgumentParser(description='시나리오 답안 일괄 채점')
+    parser.add_argument('answers', help='답안 CSV (컬럼: UI 위젯 key, 예: system_type_gamp, validation_category_gamp)')
+    parser.add_argument('--output', help='채점 결과 CSV 경로 (기본값: 요약만 출력)')
+    args = parser.parse_args(argv)
+
+    try:
+        graded = grade_submissions(pd.read_csv(args.answers, dtype='category', keep_default_na=False))
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+
+    print(f"답안 {len(graded):,}건 채점 완료")
+    print(verdict_summary(graded).to_string(index=False))
+    if args.output:
+        graded.to_csv(args.output, index=False, encoding='utf-8-sig')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
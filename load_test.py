@@ -0,0 +1,171 @@
+import argparse
+import os
+import resource
+import sys
+import time
+
+import numpy as np
+
+# ==============================================================================
+# 다중 세션 부하 테스트 (Streamlit AppTest 기반)
+# ==============================================================================
+# N개의 교육생 세션을 AppTest로 만들고, 각 세션이 모듈 1~3을 차례로 클릭하는 시나리오를
+# 세션 간에 번갈아(interleaved) 실행하며 rerun 지연 시간과 프로세스 메모리(RSS)를 측정합니다.
+# 모든 세션이 같은 프로세스에서 실행되므로 st.cache_resource로 공유되는 자원(규제 근거 저장소,
+# Audit Trail 분석 결과)은 한 번만 만들어지고, 세션당 메모리는 세션 상태만큼만 늘어나야 합니다.
+#
+# 실행: python load_test.py --sessions 50 [--rounds 2] [--audit-log 대용량.csv]
+
+APP_PATH = 'Edu_simulation.py'
+APP_TIMEOUT = 120
+
+
+def current_rss_mb():
+    """
+    현재 프로세스의 RSS(MB)를 반환합니다 (Linux는 /proc, 그 외에는 최대 RSS로 대체).
+    """
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except FileNotFoundError:
+        pass
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def _select_module(at, index):
+    nav = at.radio(key='active_module')
+    nav.set_value(nav.options[index])
+
+
+def _set(at, key, value):
+    at.selectbox(key=key).set_value(value)
+
+
+# 시나리오 단계: (이름, AppTest 조작 함수). 각 단계 후 한 번 rerun합니다.
+SCENARIO_STEPS = [
+    ("module1_open", lambda at: None),
+    ("module1_ai_answer", lambda at: at.button(key='btn_ai_analysis').click()),
+    ("module1_model_change", lambda at: (
+        _set(at, 'model_change_status', 'v1.0 -> v1.2 (학습 데이터셋 Major 변경)'),
+        _set(at, 'validation_status', '재밸리데이션 범위가 Minor 변경에 맞춰 축소됨'),
+        at.button(key='btn_model_drift').click(),
+    )),
+    ("module2_open", lambda at: _select_module(at, 1)),
+    ("module2_detect", lambda at: at.button(key='audit_start').click()),
+    ("module2_time_sync", lambda at: at.button(key='btn_s1_start').click()),
+    ("module2_role_misuse", lambda at: at.button(key='btn_s2_start').click()),
+    ("module2_reason_missing", lambda at: at.button(key='btn_s3_start').click()),
+    ("module2_raw_data", lambda at: at.button(key='btn_s4_start').click()),
+    ("module3_open", lambda at: _select_module(at, 2)),
+    ("module3_gamp", lambda at: (
+        _set(at, 'system_type_gamp', '복잡한 Process Parameter 계산/결정 로직 포함'),
+        _set(at, 'validation_category_gamp', 'Category 4 (Configured Software)'),
+        at.button(key='gamp_start').click(),
+    )),
+    ("module3_qs", lambda at: (
+        _set(at, 'qs_tool_gamp', 'CAPA/Complaint 기록용 Excel 스프레드시트'),
+        _set(at, 'validation_status_qs', '미수행 (상용 소프트웨어라 가정)'),
+        at.button(key='qs_validation_start').click(),
+    )),
+    ("module1_return", lambda at: _select_module(at, 0)),
+]
+
+
+def run_load_test(sessions, rounds=1, app_path=APP_PATH):
+    """
+    sessions개 세션으로 시나리오를 rounds번 실행하고 단계별 지연 시간(ms) 목록과 RSS 측정값을 반환합니다.
+    첫 세션의 첫 단계(공유 자원 생성 포함)는 워밍업으로 따로 기록합니다.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    rss_start = current_rss_mb()
+    latencies = {name: [] for name, _ in SCENARIO_STEPS}
+    apps = []
+    errors = []
+
+    # 워밍업: 첫 세션이 공유 자원을 만듭니다.
+    started = time.perf_counter()
+    apps.append(AppTest.from_file(app_path, default_timeout=APP_TIMEOUT))
+    apps[0].run()
+    warmup_ms = (time.perf_counter() - started) * 1000
+    rss_warm = current_rss_mb()
+
+    for _ in range(sessions - 1):
+        apps.append(AppTest.from_file(app_path, default_timeout=APP_TIMEOUT))
+
+    for round_index in range(rounds):
+        for step_index, (name, action) in enumerate(SCENARIO_STEPS):
+            for session_index, at in enumerate(apps):
+                if round_index == 0 and step_index == 0 and session_index == 0:
+                    continue  # 워밍업에서 이미 실행
+                action(at)
+                started = time.perf_counter()
+                at.run()
+                latencies[name].append((time.perf_counter() - started) * 1000)
+                if at.exception:
+                    errors.append((session_index, name, at.exception[0].value))
+
+    rss_end = current_rss_mb()
+    return {
+        "sessions": sessions,
+        "rounds": rounds,
+        "latencies": latencies,
+        "warmup_ms": warmup_ms,
+        "rss_start_mb": rss_start,
+        "rss_warm_mb": rss_warm,
+        "rss_end_mb": rss_end,
+        # 공유 자원이 만들어진 뒤 세션이 늘어날 때의 증가분
+        "rss_per_session_mb": (rss_end - rss_warm) / max(sessions - 1, 1),
+        "errors": errors,
+    }
+
+
+def latency_report(result):
+    """
+    단계별·전체 p50/p99 지연 시간(ms) 표를 문자열로 만듭니다.
+    """
+    lines = [f"{'step':<24}{'runs':>6}{'p50(ms)':>10}{'p99(ms)':>10}{'max(ms)':>10}"]
+    all_latencies = []
+    for name, values in result["latencies"].items():
+        if not values:
+            continue
+        all_latencies.extend(values)
+        p50, p99 = np.percentile(values, [50, 99])
+        lines.append(f"{name:<24}{len(values):>6}{p50:>10.1f}{p99:>10.1f}{max(values):>10.1f}")
+    if all_latencies:
+        p50, p99 = np.percentile(all_latencies, [50, 99])
+        lines.append(f"{'ALL':<24}{len(all_latencies):>6}{p50:>10.1f}{p99:>10.1f}{max(all_latencies):>10.1f}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    """
+    부하 테스트를 실행하고 지연 시간과 세션당 메모리 사용량을 출력합니다.
+    """
+    parser = argparse.ArgumentParser(description='다중 세션 rerun 지연 시간/메모리 부하 테스트 (AppTest)')
+    parser.add_argument('--sessions', type=int, default=20, help='동시 세션 수')
+    parser.add_argument('--rounds', type=int, default=1, help='시나리오 반복 횟수')
+    parser.add_argument('--audit-log', help='모듈 2에서 분석할 Audit Trail CSV (기본값: audit_log_error.csv)')
+    args = parser.parse_args(argv)
+
+    if args.audit_log:
+        os.environ['EDU_AUDIT_LOG'] = args.audit_log
+    # AppTest는 앱 폴더를 import 경로에 넣지 않으므로 로컬 모듈을 찾을 수 있게 합니다.
+    sys.path.insert(0, os.path.dirname(os.path.abspath(APP_PATH)))
+
+    result = run_load_test(args.sessions, args.rounds)
+    print(f"세션 {result['sessions']}개 x 시나리오 {len(SCENARIO_STEPS)}단계 x {result['rounds']}회")
+    print(f"워밍업(공유 자원 생성 포함): {result['warmup_ms']:.1f} ms")
+    print(latency_report(result))
+    print(f"RSS: 시작 {result['rss_start_mb']:.1f} MB, 워밍업 후 {result['rss_warm_mb']:.1f} MB, "
+          f"종료 {result['rss_end_mb']:.1f} MB, 세션당 {result['rss_per_session_mb']:.2f} MB")
+    for session_index, step, message in result["errors"]:
+        print(f"[오류] 세션 {session_index} / {step}: {message}", file=sys.stderr)
+    return 1 if result["errors"] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,182 @@
+import argparse
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# ==============================================================================
+# Rerun 구간별 실행 시간 계측
+# ==============================================================================
+# Streamlit rerun(또는 fragment rerun) 하나를 기록(recorder)으로 만들고, 화면 구간마다
+# span(recorder, 이름)으로 경과 시간을 잽니다. 끝난 기록은 JSON Lines 지표 파일에 한 줄씩 추가하여
+# 세션/구간별로 나중에 집계할 수 있습니다. Streamlit과 무관한 순수 로직이며,
+# 계측을 켜고 끄는 판단과 사이드바 패널은 UI(Edu_simulation.py) 쪽에서 담당합니다.
+#
+# 지표 파일 요약: python perf_metrics.py [지표 파일] [--session ID] [--last N]
+
+METRICS_PATH = os.environ.get('EDU_METRICS_PATH', os.path.join('.metrics', 'reruns.jsonl'))
+PROFILING_ENV = 'EDU_PROFILING'  # '1'이면 모든 세션의 rerun을 계측하여 지표 파일에 기록
+PERF_HISTORY_RERUNS = 50  # 세션별로 보관하는 최근 rerun 기록 수
+OTHER_SPAN = '(기타)'  # 최상위 구간에 속하지 않은 시간
+
+_metrics_lock = threading.Lock()
+
+
+def new_recorder(kind, session, context=None):
+    """
+    rerun 하나의 계측 기록을 시작합니다. kind는 'script'(전체 rerun) 또는 'fragment'입니다.
+    """
+    return {
+        "kind": kind,
+        "session": session,
+        "ts": datetime.now().isoformat(timespec='milliseconds'),
+        "t0": time.perf_counter(),
+        "context": dict(context or {}),
+        "spans": [],
+        "depth": 0,
+        "finished": False,
+    }
+
+
+@contextlib.contextmanager
+def span(recorder, name):
+    """
+    블록의 경과 시간을 recorder에 구간으로 기록합니다 (중첩 깊이 포함).
+    st.rerun() 등으로 블록이 예외로 끝나도 그때까지의 시간을 기록합니다.
+    """
+    depth = recorder["depth"]
+    recorder["depth"] = depth + 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        ended = time.perf_counter()
+        recorder["depth"] = depth
+        recorder["spans"].append({
+            "name": name,
+            "depth": depth,
+            "start_ms": (started - recorder["t0"]) * 1000,
+            "ms": (ended - started) * 1000,
+        })
+
+
+def finish_recorder(recorder, **context):
+    """
+    기록을 끝내고 지표 파일에 쓸 수 있는 rerun 기록(dict)을 반환합니다.
+    context(활성 모듈, 단계 등)는 기록의 context에 더해집니다.
+    """
+    recorder["finished"] = True
+    recorder["context"].update(context)
+    return {
+        "ts": recorder["ts"],
+        "session": recorder["session"],
+        "kind": recorder["kind"],
+        "total_ms": (time.perf_counter() - recorder["t0"]) * 1000,
+        "context": recorder["context"],
+        "spans": sorted(recorder["spans"], key=lambda s: s["start_ms"]),
+    }
+
+
+def append_metrics(record, path=METRICS_PATH):
+    """
+    rerun 기록을 지표 파일(JSON Lines)에 한 줄로 추가합니다. 여러 세션 스레드가 동시에 호출해도 안전합니다.
+    """
+    line = json.dumps(record, ensure_ascii=False) + '\n'
+    with _metrics_lock:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+
+def read_metrics(path=METRICS_PATH, session=None, limit=None):
+    """
+    지표 파일의 rerun 기록을 읽습니다 (session으로 거르고, limit이면 마지막 limit개만).
+    중간에 잘린 줄은 건너뜁니다.
+    """
+    records = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if session is None or record["session"] == session:
+                    records.append(record)
+    except FileNotFoundError:
+        pass
+    return records[-limit:] if limit else records
+
+
+def span_breakdown(records):
+    """
+    rerun별 최상위 구간 시간(ms) 표를 반환합니다 (행: rerun, 열: 구간, 누적 막대 차트용).
+    최상위 구간에 속하지 않은 시간은 OTHER_SPAN 열에 담깁니다.
+    """
+    rows = []
+    for index, record in enumerate(records, start=1):
+        row = {}
+        for s in record["spans"]:
+            if s["depth"] == 0:
+                row[s["name"]] = row.get(s["name"], 0.0) + s["ms"]
+        row[OTHER_SPAN] = max(record["total_ms"] - sum(row.values()), 0.0)
+        rows.append(row)
+    labels = [f'{i:02d} {record["kind"]}' for i, record in enumerate(records, start=1)]
+    return pd.DataFrame(rows, index=pd.Index(labels, name='rerun')).fillna(0.0)
+
+
+def span_summary(records):
+    """
+    구간별 호출 수, 평균/p95/최대 시간(ms)과 rerun 전체 시간 대비 비중을 집계합니다 (총 시간 순).
+    """
+    columns = ['span', 'depth', 'calls', 'total_ms', 'mean_ms', 'p95_ms', 'max_ms', 'share']
+    spans = [s for record in records for s in record["spans"]]
+    if not spans:
+        return pd.DataFrame(columns=columns)
+    frame = pd.DataFrame(spans)
+    total = sum(record["total_ms"] for record in records) or 1.0
+    summary = frame.groupby('name', sort=False).agg(
+        depth=('depth', 'min'),
+        calls=('ms', 'size'),
+        total_ms=('ms', 'sum'),
+        mean_ms=('ms', 'mean'),
+        p95_ms=('ms', lambda values: float(np.percentile(values, 95))),
+        max_ms=('ms', 'max'),
+    )
+    summary['share'] = summary['total_ms'] / total
+    return summary.rename_axis('span').reset_index().sort_values('total_ms', ascending=False)[columns]
+
+
+def main(argv=None):
+    """
+    지표 파일을 읽어 rerun 수와 구간별 집계를 출력합니다.
+    """
+    parser = argparse.ArgumentParser(description='rerun 구간별 실행 시간 지표 요약')
+    parser.add_argument('path', nargs='?', default=METRICS_PATH, help='지표 파일 (JSON Lines)')
+    parser.add_argument('--session', help='특정 세션만 집계')
+    parser.add_argument('--last', type=int, help='마지막 N개 rerun만 집계')
+    args = parser.parse_args(argv)
+
+    records = read_metrics(args.path, args.session, args.last)
+    if not records:
+        print(f"기록이 없습니다: {args.path}", file=sys.stderr)
+        return 1
+    totals = np.array([record["total_ms"] for record in records])
+    sessions = len({record["session"] for record in records})
+    print(f"rerun {len(records):,}건 (세션 {sessions}개): p50 {np.percentile(totals, 50):.1f} ms, "
+          f"p95 {np.percentile(totals, 95):.1f} ms, 최대 {totals.max():.1f} ms")
+    with pd.option_context('display.width', 160, 'display.max_rows', None):
+        print(span_summary(records).to_string(index=False, float_format=lambda v: f'{v:.2f}'))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
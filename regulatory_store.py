@@ -0,0 +1,216 @@
+import bisect
+import os
+import re
+
+# ==============================================================================
+# 규제 근거(Citation) 저장소
+# ==============================================================================
+# regulatory_snippets.txt의 조항 원문과 한국어 번역을 한 번만 읽어 색인된 저장소로 만듭니다.
+#  - 코드 → 조항 (en, ko, source, principles)
+#  - 원칙(ALCOA+/RNR 등) → 코드 목록
+#  - 키워드(원문/번역/코드/원칙의 단어) → 코드 집합 (정렬된 토큰 목록으로 접두어 검색)
+# UI에서는 st.cache_resource로 프로세스 전체에서 한 번만 만들어 모든 세션이 공유합니다.
+#
+# 스니펫 파일 형식: "CODE: 원문" 또는 원칙을 함께 지정하는 "CODE [원칙1, 원칙2]: 원문"
+
+SNIPPET_PATH = 'regulatory_snippets.txt'
+
+KO_TRANSLATIONS = {
+    "PIC/S_R2": "원본 데이터는 종이에 기록되었거나 전자적으로 기록된 정보의 첫 번째 획득으로 설명할 수 있는 원본 기록(데이터)으로 정의된다. 원래 동적 상태에서 획득한 정보는 해당 상태에서 계속 사용할 수 있어야 한다.",
+    "A22_8": "AI 모델의 출력은 설명 가능해야 합니다. 이는 AI 모델이 주어진 출력에 어떻게 도달했는지 설명할 수 있어야 함을 의미합니다.",
+    "A22_10": "AI 모델의 변경 사항이 모델 성능과 신뢰성에 미치는 영향도에 따라 재밸리데이션 범위를 설정해야 합니다. Major 변경 시 광범위한 재밸리데이션이 필수입니다.",
+    "P11_300": "식별 코드와 암호 발행은 주기적으로 점검, 회수 또는 개정되어야 합니다 (예: 암호 유효 기간 만료와 같은 이벤트를 다루기 위함).",
+    "P11_10_B": "회사는 전자 기록 및 서명의 진위, 무결성 그리고 적절한 경우 **기밀성**을 보장하도록 설계된 절차 및 통제를 적용해야 합니다. (21 CFR Part 11)",
+    "21_CFR_211_194_A": "시험소 기록에는 설정된 규격 및 표준 준수를 보장하는 데 필요한 **모든 시험으로부터 도출된 완전한 데이터**가 포함되어야 합니다. (21 CFR 211.194(a))",
+    "21_CFR_820_70_I": "컴퓨터 또는 자동화된 데이터 처리 시스템이 품질 시스템의 일부로 사용될 경우, 제조업체는 해당 컴퓨터 소프트웨어가 **의도된 용도에 대해 검증**되었음을 보장하는 절차를 수립해야 합니다. (21 CFR 820.70(i))",
+    "DI_Contemporaneous": "데이터 기록 및 변경은 발생 시점에 이루어져야 합니다. (PIC/S DI - ALCOA+)",
+    "DI_RNR": "각 개인은 자신의 역할에 따른 책임과 권한을 가져야 하며, 시스템 접근 권한은 이 책임에 따라 제한되어야 합니다. (Part 11, Annex 11 - RNR)",
+    "DI_Attributable": "데이터를 누가, 언제, 왜 기록 또는 수정했는지 명확히 추적 가능해야 합니다. (PIC/S DI - ALCOA+)",
+    "GAMP5_CriticalThinking": "시스템의 복잡성, 기능 및 리스크에 따라 적절한 GAMP Category를 선택해야 하며, 낮은 Category 선택은 Validation 불충분을 의미합니다.",
+    "GAMP5_RiskBased": "Validation 노력은 시스템의 품질 및 환자 안전에 미치는 리스크에 비례해야 합니다. 단순 시스템에 과도한 노력을 투입하는 것은 비효율적입니다.",
+}
+
+# 스니펫 파일에 원칙이 지정되지 않은 조항의 기본 원칙
+CODE_PRINCIPLES = {
+    "PIC/S_R2": ["Original"],
+    "A22_8": ["Explainability"],
+    "A22_10": ["Change Management"],
+    "P11_300": ["Security"],
+    "P11_10_B": ["Integrity", "Confidentiality"],
+    "21_CFR_211_194_A": ["Complete"],
+    "21_CFR_820_70_I": ["Validation"],
+    "DI_Contemporaneous": ["Contemporaneous"],
+    "DI_RNR": ["RNR (Roles & Responsibilities)"],
+    "DI_Attributable": ["Attributable"],
+    "GAMP5_CriticalThinking": ["Critical Thinking"],
+    "GAMP5_RiskBased": ["Risk-Based"],
+}
+
+# 코드 접두어 → 출처 규정
+CODE_SOURCES = [
+    ("PIC/S", "PIC/S DI"),
+    ("DI_", "PIC/S DI"),
+    ("A22_", "EU GMP Annex 22"),
+    ("A11_", "EU GMP Annex 11"),
+    ("P11_", "21 CFR Part 11"),
+    ("21_CFR_", "21 CFR"),
+    ("GAMP5_", "GAMP 5"),
+]
+
+SNIPPET_LINE = re.compile(r'^\s*(?P<code>[^:\[\]]+?)\s*(?:\[(?P<principles>[^\]]*)\])?\s*:\s*(?P<text>.*)$')
+TOKEN_PATTERN = re.compile(r'\w+')
+# 접두어 검색은 짧은 단어('a', 'de')나 흔한 접두어에서 저장소 대부분의 토큰을 합치게 되므로,
+# MIN_PREFIX_CHARS보다 짧거나 MAX_PREFIX_EXPANSIONS개보다 많은 토큰으로 펼쳐지는 단어는 정확히 일치하는 토큰만 찾습니다.
+# 한글 음절은 로마자 한 글자보다 훨씬 선택적이므로 두 글자로 셉니다 ('기록'으로 '기록은'을 찾을 수 있음).
+MIN_PREFIX_CHARS = 3
+MAX_PREFIX_EXPANSIONS = 64
+HANGUL_SYLLABLE = re.compile(r'[\uac00-\ud7a3]')
+
+
+def citation_source(code):
+    """
+    코드 접두어로 조항의 출처 규정을 반환합니다.
+    """
+    return next((source for prefix, source in CODE_SOURCES if code.startswith(prefix)), "기타")
+
+
+def tokenize(text):
+    """
+    색인/검색용 토큰(소문자 단어)을 반환합니다. 한글 단어도 \\w로 분리됩니다.
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def store_signature(snippet_path=SNIPPET_PATH):
+    """
+    캐시 키로 사용할 스니펫 파일 서명(경로, 수정 시각)을 반환합니다 (파일이 없으면 수정 시각은 None).
+    """
+    try:
+        return os.path.abspath(snippet_path), os.stat(snippet_path).st_mtime_ns
+    except FileNotFoundError:
+        return os.path.abspath(snippet_path), None
+
+
+def read_snippets(snippet_path=SNIPPET_PATH):
+    """
+    스니펫 파일을 읽어 {코드: (원문, 원칙 목록)}을 반환합니다. 파일이 없으면 빈 dict입니다.
+    """
+    snippets = {}
+    try:
+        with open(snippet_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                match = SNIPPET_LINE.match(line)
+                if match is None:
+                    continue
+                principles = [p.strip() for p in (match['principles'] or '').split(',') if p.strip()]
+                snippets[match['code']] = (match['text'].strip(), principles)
+    except FileNotFoundError:
+        pass
+    return snippets
+
+
+def build_citation_store(snippets, translations=KO_TRANSLATIONS):
+    """
+    조항 dict와 코드/원칙/키워드 색인으로 구성된 저장소를 만듭니다.
+    번역만 있고 원문이 없는 조항도 포함합니다.
+    """
+    citations = {}
+    for code in list(snippets) + [code for code in translations if code not in snippets]:
+        en, principles = snippets.get(code, (f"Regulatory principle related to {code}", []))
+        citations[code] = {
+            "code": code,
+            "en": en,
+            "ko": translations.get(code, f"번역 내용 없음 (코드: {code})"),
+            "source": citation_source(code),
+            "principles": principles or CODE_PRINCIPLES.get(code, []),
+        }
+
+    by_principle = {}
+    keywords = {}
+    for code, citation in citations.items():
+        for principle in citation["principles"]:
+            by_principle.setdefault(principle.lower(), []).append(code)
+        text = ' '.join([code, citation["en"], citation["ko"], citation["source"]] + citation["principles"])
+        for token in set(tokenize(text)):
+            keywords.setdefault(token, set()).add(code)
+
+    return {
+        "citations": citations,
+        "by_principle": by_principle,
+        "keywords": {token: frozenset(codes) for token, codes in keywords.items()},
+        "tokens": sorted(keywords),
+        "principles": sorted({p for citation in citations.values() for p in citation["principles"]}),
+    }
+
+
+def load_citation_store(snippet_path=SNIPPET_PATH):
+    """
+    스니펫 파일을 읽어 색인된 규제 근거 저장소를 만듭니다.
+    """
+    return build_citation_store(read_snippets(snippet_path))
+
+
+def lookup_citation(store, code):
+    """
+    코드로 조항을 찾습니다 (없으면 None).
+    """
+    return store["citations"].get(code)
+
+
+def citations_by_principle(store, principle):
+    """
+    원칙(대소문자 무시)에 연결된 조항 목록을 반환합니다.
+    """
+    return [store["citations"][code] for code in store["by_principle"].get(principle.lower(), [])]
+
+
+def _prefix_matches(store, token):
+    exact = store["keywords"].get(token, frozenset())
+    if len(token) + len(HANGUL_SYLLABLE.findall(token)) < MIN_PREFIX_CHARS:
+        return exact
+    tokens = store["tokens"]
+    start = bisect.bisect_left(tokens, token)
+    end = bisect.bisect_left(tokens, token + '\uffff')
+    if end - start > MAX_PREFIX_EXPANSIONS:
+        return exact
+    matches = set()
+    for candidate in tokens[start:end]:
+        matches |= store["keywords"][candidate]
+    return matches
+
+
+def search_citations(store, query, principle=None, limit=None):
+    """
+    검색어의 모든 단어를 (접두어 일치로) 포함하는 조항을 코드 순으로 반환합니다.
+    한국어 조사가 붙은 단어('데이터는')도 어간('데이터')으로 찾을 수 있습니다.
+    짧거나 너무 흔한 접두어는 정확히 일치하는 단어로만 찾습니다 (MIN_PREFIX_CHARS, MAX_PREFIX_EXPANSIONS).
+    principle을 지정하면 해당 원칙의 조항으로 한정합니다.
+    """
+    tokens = tokenize(query)
+    if not tokens and principle is None:
+        return []
+    codes = None
+    for token in tokens:
+        matches = _prefix_matches(store, token)
+        codes = matches if codes is None else codes & matches
+        if not codes:
+            return []
+    if principle is not None:
+        allowed = set(store["by_principle"].get(principle.lower(), []))
+        codes = allowed if codes is None else codes & allowed
+    results = [store["citations"][code] for code in sorted(codes)]
+    return results[:limit] if limit else results
+
+
+def rank_citations(store, query, limit=None):
+    """
+    검색어 단어 중 (접두어 일치로) 포함된 단어가 많은 조항 순으로 반환합니다 (자연어 질문용 OR 검색).
+    각 결과에는 일치한 단어 수(hits)가 함께 담깁니다.
+    """
+    hits = {}
+    for token in set(tokenize(query)):
+        for code in _prefix_matches(store, token):
+            hits[code] = hits.get(code, 0) + 1
+    ranked = sorted(hits.items(), key=lambda item: (-item[1], item[0]))
+    results = [{**store["citations"][code], "hits": count} for code, count in ranked]
+    return results[:limit] if limit else results
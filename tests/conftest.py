@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+# 저장소 루트의 모듈(audit_analysis 등)을 패키지 설치 없이 import할 수 있도록 경로에 추가합니다.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audit_generator import write_audit_trail  # noqa: E402
+
+# 규칙마다 위반이 충분히 나오도록 비율을 높인 합성 로그 (수 초 안에 전체/스트리밍/tail 분석 가능)
+TEST_LOG_ROWS = 6000
+TEST_LOG_PROFILE = {
+    "users": 20,
+    "events_per_record": 8,
+    "drifting_user_rate": 0.2,
+    "time_sync_rate": 0.02,
+    "missing_reason_rate": 0.05,
+    "boilerplate_user_rate": 0.3,
+    "pre_injection_rate": 0.1,
+    "abort_rate": 0.1,
+    "abort_unpreserved_rate": 0.5,
+}
+
+
+@pytest.fixture(scope='session')
+def audit_log_path(tmp_path_factory):
+    """
+    테스트용 합성 Audit Trail CSV 경로 (세션마다 한 번 생성).
+    """
+    path = str(tmp_path_factory.mktemp('audit') / 'audit_trail.csv')
+    write_audit_trail(path, TEST_LOG_ROWS, seed=7, **TEST_LOG_PROFILE)
+    return path
@@ -0,0 +1,54 @@
+import io
+
+import pytest
+
+from audit_batch import analyze_sites, create_site_executor, merge_site_results, spool_uploads
+
+
+class Upload(io.BytesIO):
+    # Streamlit UploadedFile처럼 name 속성이 있는 메모리 파일입니다.
+    def __init__(self, name, data):
+        super().__init__(data)
+        self.name = name
+
+
+@pytest.fixture(scope='module')
+def executor():
+    with create_site_executor(2) as pool:
+        yield pool
+
+
+def test_uploads_are_spooled_to_paths(audit_log_path, tmp_path):
+    """
+    업로드 파일이 순번 이름의 임시 파일로 복사되고, 사이트 이름은 업로드 이름에서 확장자를 뺀 값인지 확인합니다.
+    """
+    with open(audit_log_path, 'rb') as f:
+        data = f.read()
+    uploads = [Upload('../SiteA.csv', data), Upload('SiteA.csv', data[:2000])]
+    uploads[0].read(100)  # 읽던 위치와 관계없이 처음부터 복사함
+
+    sources = spool_uploads(uploads, str(tmp_path))
+    assert [site for site, _ in sources] == ['../SiteA', 'SiteA']
+    assert [path for _, path in sources] == [str(tmp_path / '00000.csv'), str(tmp_path / '00001.csv')]
+    with open(sources[0][1], 'rb') as f:
+        assert f.read() == data
+
+
+def test_shared_executor_matches_in_process_and_stays_open(audit_log_path, executor, tmp_path):
+    """
+    공용 풀로 분석한 결과가 프로세스 안에서 순차 분석한 결과와 같고, 호출이 끝나도 풀을 닫지 않아 재사용되는지 확인합니다.
+    """
+    broken = tmp_path / 'broken.csv'
+    broken.write_text('a,b\n1,2\n', encoding='utf-8')
+    sources = [('A', audit_log_path), ('broken', str(broken)), ('B', audit_log_path)]
+
+    expected = merge_site_results(analyze_sites(sources, max_workers=1))
+    progress = []
+    for _ in range(2):
+        results = analyze_sites(sources, max_workers=2, executor=executor,
+                                progress=lambda done, total: progress.append((done, total)))
+        summary = merge_site_results(results)
+        assert summary["by_site"].equals(expected["by_site"])
+        assert summary["by_role"].equals(expected["by_role"])
+        assert summary["failed_sites"] == ['broken']
+    assert progress == [(1, 3), (2, 3), (3, 3)] * 2
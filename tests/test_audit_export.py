@@ -0,0 +1,51 @@
+import pandas as pd
+import pytest
+
+from audit_export import write_excel
+
+openpyxl = pytest.importorskip('openpyxl')
+
+FORMULA_VALUES = ['=1+1', '=HYPERLINK("http://example.com","click")', "=cmd|' /C calc'!A0"]
+
+
+def test_excel_writes_formula_like_strings_as_text(tmp_path):
+    """
+    '='로 시작하는 변경 사유/ID/머리글이 수식이 아닌 텍스트로 기록되고 그대로 읽히는지 확인합니다.
+    """
+    frame = pd.DataFrame({
+        'UserID': ['=USER', 'analyst1', 'analyst2'],
+        'RecordID': ['R-1', '=2*3', 'R-3'],
+        'ReasonForChange': FORMULA_VALUES,
+        '=Header': ['a', None, 'c'],
+    })
+    target = tmp_path / 'export.xlsx'
+    summary_rows = [['=RULE', 'Principle', 'Citation', '=Description', 3]]
+    written = write_excel([(frame, [True, False, True])], target, list(frame.columns), summary_rows)
+    assert written == len(frame)
+
+    workbook = openpyxl.load_workbook(target)
+    sheet = workbook['AuditTrail']
+    rows = list(sheet.iter_rows())
+    assert [cell.value for cell in rows[0]] == list(frame.columns)
+    for row, expected in zip(rows[1:], frame.itertuples(index=False, name=None)):
+        assert [cell.value for cell in row] == list(expected)
+    summary = workbook['Summary']
+    assert [cell.value for cell in list(summary.iter_rows())[1]] == summary_rows[0]
+
+    for worksheet in workbook.worksheets:
+        for row in worksheet.iter_rows():
+            for cell in row:
+                assert cell.data_type != 'f', (worksheet.title, cell.coordinate, cell.value)
+
+
+def test_excel_marks_violation_rows_only(tmp_path):
+    """
+    위반 행만 Violation 스타일(빨간 글자, 연한 빨간 배경)로 기록되는지 확인합니다 (셀 객체를 행마다 다시 사용해도 스타일이 섞이지 않음).
+    """
+    frame = pd.DataFrame({'UserID': ['u1', 'u2', 'u3', 'u4'], 'ReasonForChange': ['=x', 'ok', None, 'ok']})
+    target = tmp_path / 'export.xlsx'
+    write_excel([(frame.iloc[:2], [True, False]), (frame.iloc[2:], [False, True])], target, list(frame.columns))
+
+    sheet = openpyxl.load_workbook(target)['AuditTrail']
+    styles = [[cell.style for cell in row] for row in list(sheet.iter_rows())[1:]]
+    assert styles == [['Violation'] * 2, ['Normal'] * 2, ['Normal'] * 2, ['Violation'] * 2]
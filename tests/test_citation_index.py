@@ -0,0 +1,108 @@
+import os
+import sys
+import zlib
+
+import numpy as np
+import pytest
+
+import citation_index
+from citation_index import build_citation_index, citation_chunks, open_citation_retriever, retrieve_citations
+from regulatory_store import build_citation_store, tokenize
+
+lancedb = pytest.importorskip('lancedb')
+
+STUB_DIMENSION = 64
+SNIPPETS = {
+    "DI_AUDIT": ("Audit trail entries must record who changed data and why. " * 12, ["Attributable"]),
+    "DI_CLOCK": ("System clocks must be synchronised to a trusted time source.", ["Contemporaneous"]),
+    "P11_SIGN": ("Electronic signatures must be linked to their records.", ["Integrity"]),
+    "A11_BACKUP": ("Backups must be checked for accuracy and the ability to restore data.", ["Original"]),
+}
+
+
+class StubEmbeddingModel:
+    """
+    단어 해시 bag-of-words 임베딩 (sentence-transformers encode()와 같은 호출 형식, 정규화된 벡터).
+    """
+
+    def encode(self, texts, batch_size=64, normalize_embeddings=True, convert_to_numpy=True, show_progress_bar=False):
+        vectors = np.zeros((len(texts), STUB_DIMENSION), dtype=np.float64)
+        for row, text in enumerate(texts):
+            for token in tokenize(text):
+                vectors[row, zlib.crc32(token.encode('utf-8')) % STUB_DIMENSION] += 1.0
+        vectors += 1e-3  # 공통 단어가 없는 텍스트도 영벡터가 되지 않도록 함
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.fixture()
+def retriever(tmp_path):
+    store = build_citation_store(SNIPPETS, translations={})
+    model = StubEmbeddingModel()
+    meta = build_citation_index(store, model_path=str(tmp_path / 'stub-model'), index_dir=str(tmp_path / 'index'),
+                                model=model)
+    opened = open_citation_retriever(model_path=str(tmp_path / 'stub-model'), index_dir=str(tmp_path / 'index'),
+                                     store=store, model=model)
+    return store, model, meta, opened
+
+
+def test_build_and_open_index(retriever):
+    """
+    색인 메타데이터(청크 수, 차원, 버전)가 기록되고 같은 조항으로 열면 최신 상태로 판단하는지 확인합니다.
+    """
+    store, _, meta, opened = retriever
+    assert meta["chunks"] == len(citation_chunks(store))
+    assert meta["chunks"] > len(store["citations"])  # 긴 조항이 여러 청크로 나뉨
+    assert meta["dimension"] == STUB_DIMENSION
+    assert opened["meta"]["version"] == meta["version"]
+    assert opened["meta"]["stale"] is False
+
+
+def test_retrieve_scores_are_cosine_similarity_and_codes_unique(retriever):
+    """
+    점수가 질문과 일치 청크의 코사인 유사도이고, 조항마다 최고 점수 청크 하나만 유사도 순으로 남는지 확인합니다.
+    """
+    store, model, _, opened = retriever
+    question = 'who changed the audit trail data and why'
+    results = retrieve_citations(opened, store, question, k=3)
+
+    assert [result["code"] for result in results][0] == 'DI_AUDIT'
+    assert len(results) == 3
+    assert len({result["code"] for result in results}) == 3
+    scores = [result["score"] for result in results]
+    assert scores == sorted(scores, reverse=True)
+
+    question_vector = model.encode([question])[0]
+    for result in results:
+        assert result["en"] == store["citations"][result["code"]]["en"]
+        assert result["matched"] in result["en"] or result["matched"] in result["ko"]
+        expected = float(question_vector @ model.encode([result["matched"]])[0])
+        assert result["score"] == pytest.approx(expected, abs=1e-4)
+
+        # 같은 조항의 다른 청크보다 점수가 낮지 않음 (조항별 최고 점수 청크)
+        chunks = [chunk["text"] for chunk in citation_chunks(store) if chunk["code"] == result["code"]]
+        best = max(float(question_vector @ vector) for vector in model.encode(chunks))
+        assert result["score"] == pytest.approx(best, abs=1e-4)
+
+
+def test_retriever_missing_index_falls_back_to_keywords(tmp_path):
+    """
+    색인이 없으면 retriever가 None이고 키워드 검색 결과(score 없음)를 반환하는지 확인합니다.
+    """
+    store = build_citation_store(SNIPPETS, translations={})
+    assert open_citation_retriever(index_dir=str(tmp_path / 'missing'), store=store) is None
+    results = retrieve_citations(None, store, 'clocks synchronised', k=2)
+    assert results[0]["code"] == 'DI_CLOCK'
+    assert results[0]["score"] is None
+
+
+def test_import_does_not_load_vector_dependencies():
+    """
+    모듈 import만으로는 lancedb/sentence_transformers를 불러오지 않고 HF_HUB_OFFLINE도 설정하지 않는지 확인합니다.
+    """
+    import subprocess
+    code = ("import os, sys; os.environ.pop('HF_HUB_OFFLINE', None); import citation_index; "
+            "print(sorted(m for m in ('lancedb', 'sentence_transformers', 'torch') if m in sys.modules), "
+            "os.environ.get('HF_HUB_OFFLINE'))")
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(citation_index.__file__))).stdout
+    assert output.strip() == '[] None'
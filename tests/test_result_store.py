@@ -0,0 +1,57 @@
+import os
+
+import pandas as pd
+import pytest
+
+from audit_analysis import (
+    MASK_COLUMN, analyze_audit_trail, load_audit_trail, load_stored_analysis, prune_result_store, result_key,
+    rule_set_version, store_analysis,
+)
+
+pytest.importorskip('pyarrow')
+
+
+@pytest.fixture(scope='module')
+def analysis(audit_log_path):
+    return analyze_audit_trail(load_audit_trail(audit_log_path))
+
+
+def test_stored_analysis_round_trip_is_memory_mapped(audit_log_path, analysis, tmp_path):
+    """
+    저장한 결과를 다시 열면 같은 값이 나오고, 숫자/시각 컬럼은 매핑된 파일을 가리키는 읽기 전용 배열인지 확인합니다.
+    """
+    store_dir = str(tmp_path / 'store')
+    key = store_analysis(audit_log_path, analysis, store_dir=store_dir)
+    loaded = load_stored_analysis(audit_log_path, store_dir=store_dir)
+
+    assert loaded["stored_key"] == key
+    assert loaded["rule_counts"] == analysis["rule_counts"]
+    assert loaded["error_indices"].equals(analysis["error_indices"])
+    pd.testing.assert_frame_equal(loaded["df"].astype(str), analysis["df"].astype(str))
+    for col in [MASK_COLUMN, 'TimeStamp(Server)']:
+        assert not loaded["df"][col].to_numpy().flags.writeable, col
+
+
+def test_result_key_depends_on_thresholds_and_options(audit_log_path, tmp_path):
+    """
+    평가 옵션이 다르면 다른 키가 되고, 스트리밍 내부 옵션은 키에 영향을 주지 않는지 확인합니다.
+    """
+    store_dir = str(tmp_path / 'store')
+    default = result_key(audit_log_path, store_dir)
+    assert result_key(audit_log_path, store_dir, {"time_diff_threshold": 60}) != default
+    assert result_key(audit_log_path, store_dir, {"record_idle_seconds": 3600}) != default
+    assert rule_set_version(options={"context_rows": 10}) == rule_set_version()
+
+
+def test_prune_keeps_recently_used_results(audit_log_path, analysis, tmp_path):
+    """
+    항목 수 한도를 넘으면 가장 오래 사용하지 않은 결과부터 지우고, 최근에 읽은 결과는 남기는지 확인합니다.
+    """
+    store_dir = str(tmp_path / 'store')
+    for i in range(4):
+        store_analysis(audit_log_path, analysis, store_dir=store_dir, key=f'k{i}')
+        os.utime(os.path.join(store_dir, f'k{i}', 'meta.json'), ns=(i * 10**9, i * 10**9))
+    assert load_stored_analysis(audit_log_path, store_dir=store_dir, key='k0') is not None  # k0을 최근 사용으로 갱신
+
+    assert sorted(prune_result_store(store_dir, max_entries=2)) == ['k1', 'k2']
+    assert sorted(name for name in os.listdir(store_dir) if name.startswith('k')) == ['k0', 'k3']
@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from audit_analysis import (
+    DI_RULES, MASK_COLUMN, analyze_audit_trail, finish_scan, load_audit_trail, load_tail_state, new_scan_state,
+    new_tail_state, save_tail_state, scan_audit_trail, scan_chunk, scan_result, tail_audit_trail,
+)
+
+# 전체 분석(analyze_audit_trail)과 청크 단위 스트리밍(scan_audit_trail/scan_chunk), 파일 끝 증분 분석
+# (tail_audit_trail + 상태 저장/복원)이 같은 결과를 내는지 확인합니다.
+# RecordID 세션, 드리프트 윈도우, lookahead 규칙의 판정 보류 행이 청크 경계에 걸치는 경우를 포함합니다.
+
+SOURCE_COLUMNS = ['TimeStamp(Server)', 'ActionTime(Client)', 'UserID', 'Role', 'ActionType', 'RecordID',
+                  'ReasonForChange']
+OPTION_CASES = [{}, {"record_idle_seconds": 3600}]  # 기본 세션 기준과 짧은 유휴 기준(세션이 자주 나뉨)
+
+
+def _rule_bit(rule_id):
+    return next(rule["bit"] for rule in DI_RULES if rule["id"] == rule_id)
+
+
+def _flagged(analysis):
+    df = analysis["df"]
+    return df if analysis.get("streamed") else df.loc[analysis["error_indices"]]
+
+
+def _sorted_summary(summary):
+    keys = [col for col in summary.columns if summary[col].dtype == object or isinstance(summary[col].dtype, pd.CategoricalDtype)]
+    frame = summary.astype({col: str for col in keys})
+    return frame.sort_values(keys).reset_index(drop=True)
+
+
+def assert_same_analysis(expected, actual):
+    """
+    규칙별 건수, 위반 행과 행별 ViolationMask, 원본 값, 변경 사유/드리프트 요약이 모두 같은지 확인합니다.
+    """
+    assert actual["rule_counts"] == expected["rule_counts"]
+    expected_rows, actual_rows = _flagged(expected), _flagged(actual)
+    assert actual_rows.index.equals(expected_rows.index)
+    np.testing.assert_array_equal(actual_rows[MASK_COLUMN].to_numpy(), expected_rows[MASK_COLUMN].to_numpy())
+    pd.testing.assert_frame_equal(actual_rows[SOURCE_COLUMNS].astype(str), expected_rows[SOURCE_COLUMNS].astype(str))
+    pd.testing.assert_frame_equal(actual["reason_summary"].reset_index(drop=True),
+                                  expected["reason_summary"].reset_index(drop=True), check_dtype=False)
+    pd.testing.assert_frame_equal(_sorted_summary(actual["drift_summary"]), _sorted_summary(expected["drift_summary"]),
+                                  check_dtype=False)
+
+
+def _scan_at(df, boundaries, **options):
+    # 지정한 행 위치에서 청크를 나누어 scan_chunk()로 차례로 평가합니다.
+    state = new_scan_state()
+    edges = [0] + sorted(set(boundaries)) + [len(df)]
+    for start, end in zip(edges, edges[1:]):
+        if end > start:
+            scan_chunk(state, df.iloc[start:end].copy(), **options)
+    return finish_scan(state)
+
+
+@pytest.fixture(scope='module')
+def full_analyses(audit_log_path):
+    return {i: analyze_audit_trail(load_audit_trail(audit_log_path), **options) for i, options in enumerate(OPTION_CASES)}
+
+
+@pytest.mark.parametrize('case', range(len(OPTION_CASES)))
+@pytest.mark.parametrize('chunksize', [211, 997, 2999, 10_000])
+def test_scan_matches_full_analysis(audit_log_path, full_analyses, chunksize, case):
+    """
+    청크 크기와 관계없이 스트리밍 분석 결과가 전체 분석과 같은지 확인합니다.
+    """
+    streamed = scan_audit_trail(audit_log_path, chunksize=chunksize, **OPTION_CASES[case])
+    assert streamed["total_rows"] == len(full_analyses[case]["df"])
+    assert_same_analysis(full_analyses[case], streamed)
+
+
+@pytest.mark.parametrize('case', range(len(OPTION_CASES)))
+def test_scan_matches_full_analysis_across_split_sessions(audit_log_path, full_analyses, case):
+    """
+    판정이 뒤 행에 달린 행(Pre-Injection, ABORT) 바로 뒤, RUN_START 바로 앞, 드리프트 윈도우 중간에서
+    청크를 나누어도 결과가 같은지 확인합니다.
+    """
+    full = full_analyses[case]
+    df = full["df"]
+    mask = df[MASK_COLUMN].to_numpy()
+    actions = df['ActionType'].astype(str).to_numpy()
+    positions = np.arange(len(df))
+
+    boundaries = []
+    for rule_id in ('PRE_INJECTION', 'ABORT_UNPRESERVED', 'CLOCK_DRIFT'):
+        hits = positions[(mask & (1 << _rule_bit(rule_id))) != 0]
+        assert len(hits), rule_id
+        boundaries += (hits[:15] + 1).tolist()
+    boundaries += (positions[actions == 'ABORT'][:15] + 1).tolist()
+    boundaries += positions[actions == 'RUN_START'][:15].tolist()
+
+    # 경계가 실제로 열린 RecordID 세션을 가르는지 확인 (같은 RecordID가 경계 앞뒤에 모두 있음)
+    records = df['RecordID'].astype(str).to_numpy()
+    split = [b for b in boundaries if 0 < b < len(df) and records[b - 1] in set(records[b:b + 500])]
+    assert len(split) >= 10
+
+    streamed = _scan_at(load_audit_trail(audit_log_path), boundaries, **OPTION_CASES[case])
+    assert_same_analysis(full, streamed)
+
+
+def test_tail_with_saved_state_matches_full_analysis(audit_log_path, tmp_path):
+    """
+    로그를 행 중간을 포함한 임의 위치에서 나누어 덧붙이고, 덧붙일 때마다 상태를 저장/복원하며 tail 분석한 결과가
+    지금까지 완결된 행의 전체 분석과 같은지 확인합니다.
+    """
+    with open(audit_log_path, 'rb') as f:
+        data = f.read()
+    source = load_audit_trail(audit_log_path)
+    cuts = sorted(np.random.default_rng(3).choice(np.arange(1, len(data)), size=9, replace=False).tolist())
+    target = str(tmp_path / 'live_audit.csv')
+
+    written = 0
+    for cut in cuts + [len(data)]:
+        with open(target, 'ab') as f:
+            f.write(data[written:cut])
+        written = cut
+
+        state = load_tail_state(target) or new_tail_state(target)
+        while tail_audit_trail(state, max_bytes=20_000):
+            pass
+        save_tail_state(state)
+
+        complete_rows = state["total_rows"]
+        assert complete_rows == max(data[:cut].count(b'\n') - 1, 0)
+        if complete_rows:
+            expected = analyze_audit_trail(source.iloc[:complete_rows].copy())
+            assert_same_analysis(expected, scan_result(load_tail_state(target), provisional=True))
+
+    assert state["total_rows"] == len(source)
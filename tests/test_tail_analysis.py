@@ -0,0 +1,42 @@
+import os
+
+from audit_analysis import (
+    MASK_COLUMN, analyze_audit_trail, load_audit_trail, new_tail_state, scan_result, tail_audit_trail,
+)
+
+
+def _flagged_masks(analysis):
+    df = analysis["df"]
+    return df.loc[analysis["error_indices"], MASK_COLUMN] if not analysis.get("streamed") else df[MASK_COLUMN]
+
+
+def test_tail_catches_up_in_bounded_reads(audit_log_path):
+    """
+    max_bytes 단위로 나누어 읽어도 기존 로그를 따라잡으며, 결과가 전체 분석과 같은지 확인합니다.
+    """
+    full = analyze_audit_trail(load_audit_trail(audit_log_path))
+    max_bytes = 40_000
+    state = new_tail_state(audit_log_path)
+    calls = 0
+    while True:
+        new_rows = tail_audit_trail(state, max_bytes=max_bytes)
+        calls += 1
+        if not new_rows:
+            break
+        assert state["pending_bytes"] == os.path.getsize(audit_log_path) - state["offset"]
+
+    assert state["pending_bytes"] == 0
+    assert calls > os.path.getsize(audit_log_path) // (max_bytes * 2)
+    result = scan_result(state, provisional=True)
+    assert result["rule_counts"] == full["rule_counts"]
+    assert _flagged_masks(result).equals(_flagged_masks(full))
+
+
+def test_tail_reads_lines_longer_than_max_bytes(audit_log_path):
+    """
+    한 번에 읽는 양이 한 행보다 작아도 행 단위로 진행하는지 확인합니다.
+    """
+    state = new_tail_state(audit_log_path)
+    assert tail_audit_trail(state, max_bytes=10) == 1
+    assert tail_audit_trail(state, max_bytes=10) == 1
+    assert state["total_rows"] == 2